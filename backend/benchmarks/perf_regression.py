@@ -0,0 +1,129 @@
+"""
+Offline performance regression suite for the landing endpoints.
+
+Drives the real app, routes and generator code in-process with provider
+responses replayed from LLM fixtures, so timings only move when our code
+does. Record the fixtures once against the real provider, then replay:
+
+    python -m benchmarks.perf_regression --record          # needs EMERGENT_LLM_KEY
+    python -m benchmarks.perf_regression --save-baseline perf_baseline.json
+    python -m benchmarks.perf_regression --baseline perf_baseline.json
+
+Run from backend/. Replay uses --time-scale 0 by default, so provider latency
+is left out and only our own overhead is measured; pass 1 to replay the
+recorded provider timing as well.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+from metrics import percentile
+
+SPECS = [
+    {"theme": "Online programming school", "language": "English", "traffic_source": "Google Ads", "target_action": "Sign up"},
+    {"theme": "Онлайн школа программирования", "language": "Русский", "traffic_source": "Google Ads", "target_action": "Зарегистрироваться"},
+    {"theme": "Fitness app for busy people", "language": "Deutsch", "traffic_source": "Facebook", "target_action": "App herunterladen"},
+]
+SECTION = "pricing"
+
+
+def _run(client, iterations: int) -> dict:
+    timings = {}
+
+    def timed(name, call):
+        wall, cpu = time.perf_counter(), time.process_time()
+        response = call()
+        sample = timings.setdefault(name, {"wall": [], "cpu": []})
+        sample["wall"].append(time.perf_counter() - wall)
+        sample["cpu"].append(time.process_time() - cpu)
+        if response.status_code != 200:
+            sys.exit(f"{name} failed with {response.status_code}: {response.text[:300]}")
+        return response
+
+    for _ in range(iterations):
+        for spec in SPECS:
+            # Fresh landings every round keep each prompt, and so each fixture key, identical
+            landing = timed("generate_landing", lambda: client.post(
+                "/api/generate-landing", json={**spec, "use_cache": False})).json()
+            timed("get_landing", lambda: client.get(f"/api/landings/{landing['id']}"))
+            timed("get_landing_html_external_assets", lambda: client.get(
+                f"/api/landings/{landing['id']}/html", params={"external_assets": "true"}))
+            timed("regenerate_section", lambda: client.post(
+                f"/api/landings/{landing['id']}/sections/{SECTION}/regenerate"))
+            timed("search_landings", lambda: client.get("/api/landings/search", params={"q": spec["theme"]}))
+        timed("get_all_landings", lambda: client.get("/api/landings"))
+
+    return {
+        name: {
+            "runs": len(sample["wall"]),
+            "p50_ms": statistics.median(sample["wall"]) * 1000,
+            "p95_ms": percentile(sample["wall"], 0.95) * 1000,
+            "cpu_ms": statistics.mean(sample["cpu"]) * 1000,
+        }
+        for name, sample in timings.items()
+    }
+
+
+def _compare(results: dict, baseline: dict, tolerance: float, noise_ms: float) -> list:
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric in ("p50_ms", "cpu_ms"):
+            if current[metric] > before[metric] * (1 + tolerance) and current[metric] - before[metric] > noise_ms:
+                regressions.append(f"{name} {metric}: {before[metric]:.2f} -> {current[metric]:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline performance regression suite for the landing endpoints")
+    parser.add_argument("--record", action="store_true", help="call the real provider and save fixtures")
+    parser.add_argument("--fixtures", default=str(Path(__file__).parent / "fixtures" / "llm"))
+    parser.add_argument("--time-scale", type=float, default=0.0, help="replayed provider time multiplier")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--baseline", help="fail when slower than this saved result")
+    parser.add_argument("--save-baseline", help="write the results here")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--noise-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    # The app reads its configuration at import time
+    os.environ.update({
+        "LLM_FIXTURE_MODE": "record" if args.record else "replay",
+        "LLM_FIXTURE_DIR": args.fixtures,
+        "LLM_FIXTURE_TIME_SCALE": str(args.time_scale),
+        "LLM_HEDGE_ENABLED": "false",
+        "LANDING_STORE": "memory",
+    })
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "perf_regression")
+    from fastapi.testclient import TestClient
+    import server
+
+    # No lifespan: the suite needs neither Mongo nor provider prewarming
+    client = TestClient(server.app)
+    results = _run(client, 1 if args.record else args.iterations)
+    if args.record:
+        print(f"Recorded fixtures in {args.fixtures}")
+        return
+
+    print(f"{'operation':34} {'runs':>5} {'p50 ms':>9} {'p95 ms':>9} {'cpu ms':>9}")
+    for name, result in results.items():
+        print(f"{name:34} {result['runs']:5} {result['p50_ms']:9.2f} {result['p95_ms']:9.2f} {result['cpu_ms']:9.2f}")
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        regressions = _compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance, args.noise_ms)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nNo regressions against", args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+CPU cost of serialising landing responses.
+
+Compares FastAPI's default response path (response_model validation plus
+json.dumps) with the fast path used by the landing routes: JSON bytes
+produced once at write time and served as is.
+
+Run from backend/: python -m benchmarks.serialization [--landings N] [--html-kb KB]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from typing import List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from fast_json import FastJSONResponse, SerializedCache, json_array, orjson
+from models import LandingPage, LandingPageMetadata
+
+
+def _landing(html_kb: int) -> LandingPage:
+    section = '<section class="features"><h2>Fast payouts</h2><p>Withdraw winnings in minutes — «без комиссии».</p></section>\n'
+    html = "<!DOCTYPE html><html><body>" + section * (html_kb * 1024 // len(section.encode())) + "</body></html>"
+    return LandingPage(
+        id=str(uuid.uuid4()),
+        theme="Online casino with fast payouts",
+        language="English",
+        traffic_source="Facebook",
+        target_action="Sign up",
+        html=html,
+        lighthouse=98,
+        created_at=datetime.utcnow(),
+        metadata=LandingPageMetadata(company_name="LuckySpin", email="support@luckyspin.example",
+                                     phone="+1 555 0100", address="1 Casino Way, Valletta"),
+    )
+
+
+def _cpu_per_call(fn, repeat: int) -> float:
+    fn()
+    started = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--landings", type=int, default=50, help="landings returned by the list endpoint")
+    parser.add_argument("--html-kb", type=int, default=60, help="size of each landing's html")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    landings = [_landing(args.html_kb) for _ in range(args.landings)]
+    one_field = create_response_field(name="Response_get_landing", type_=LandingPage)
+    list_field = create_response_field(name="Response_get_all_landings", type_=List[LandingPage])
+    cache = SerializedCache(max_bytes=1 << 30)
+    for landing in landings:
+        cache.put(landing.id, landing.model_dump_json().encode())
+    loop = asyncio.new_event_loop()
+
+    def default_path(field, content):
+        return lambda: JSONResponse(loop.run_until_complete(serialize_response(field=field, response_content=content))).body
+
+    cases = {
+        "get_landing": {
+            "response_model + json.dumps": default_path(one_field, landings[0]),
+            "model_dump_json per request": lambda: FastJSONResponse(landings[0].model_dump_json().encode()).body,
+            "cached bytes": lambda: FastJSONResponse(cache.get(landings[0].id)).body,
+        },
+        "get_all_landings": {
+            "response_model + json.dumps": default_path(list_field, landings),
+            "model_dump_json per request": lambda: FastJSONResponse(
+                json_array(landing.model_dump_json().encode() for landing in landings)).body,
+            "cached bytes": lambda: FastJSONResponse(json_array(cache.get(landing.id) for landing in landings)).body,
+        },
+    }
+
+    print(f"orjson: {'yes' if orjson is not None else 'no (json fallback)'}, "
+          f"{args.landings} landings of {args.html_kb} KB html")
+    for endpoint, variants in cases.items():
+        repeat = args.repeat if endpoint == "get_landing" else max(1, args.repeat // 10)
+        baseline = None
+        print(f"\n{endpoint}")
+        for name, fn in variants.items():
+            cpu = _cpu_per_call(fn, repeat)
+            baseline = baseline or cpu
+            print(f"  {name:30} {cpu * 1e6:10.1f} us CPU/request  {baseline / cpu:6.1f}x")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import os
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEADLINE_SECONDS = float(os.getenv('GENERATION_DEADLINE_SECONDS', '120'))
+MAX_DEADLINE_SECONDS = float(os.getenv('GENERATION_MAX_DEADLINE_SECONDS', '300'))
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+class GenerationTimeout(Exception):
+    pass
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+class WorkStats:
+    """Counts how in-flight generations ended"""
+
+    def __init__(self):
+        self.counts = {"completed": 0, "failed": 0, "cancelled": 0, "timed_out": 0, "in_flight": 0}
+
+    def snapshot(self) -> dict:
+        return dict(self.counts)
+
+
+work_stats = WorkStats()
+
+
+def resolve_deadline(requested: Optional[float]) -> float:
+    """Clamp a client-requested deadline to the configured maximum"""
+    if requested is None or requested <= 0:
+        return DEFAULT_DEADLINE_SECONDS
+    return min(requested, MAX_DEADLINE_SECONDS)
+
+
+async def run_with_deadline(work: Awaitable, deadline: float,
+                            is_disconnected: Callable[[], Awaitable[bool]] = None,
+                            stats: WorkStats = work_stats):
+    """
+    Await `work` until it finishes, the deadline passes or the client goes away.
+
+    On timeout or disconnect the work is cancelled, which propagates into the
+    in-flight provider calls, and GenerationTimeout / ClientDisconnected is raised.
+    """
+    loop = asyncio.get_running_loop()
+    task = asyncio.ensure_future(work)
+    deadline_at = loop.time() + deadline
+    stats.counts["in_flight"] += 1
+    try:
+        while True:
+            remaining = deadline_at - loop.time()
+            if remaining <= 0:
+                task.cancel()
+                stats.counts["timed_out"] += 1
+                raise GenerationTimeout(f"Generation did not finish within {deadline:g}s")
+
+            done, _ = await asyncio.wait({task}, timeout=min(DISCONNECT_POLL_SECONDS, remaining))
+            if done:
+                try:
+                    result = task.result()
+                except Exception:
+                    stats.counts["failed"] += 1
+                    raise
+                stats.counts["completed"] += 1
+                return result
+
+            if is_disconnected is not None and await is_disconnected():
+                task.cancel()
+                stats.counts["cancelled"] += 1
+                logger.info("Client disconnected, cancelled in-flight generation")
+                raise ClientDisconnected("Client closed request")
+    except asyncio.CancelledError:
+        task.cancel()
+        stats.counts["cancelled"] += 1
+        raise
+    finally:
+        stats.counts["in_flight"] -= 1
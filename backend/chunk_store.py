@@ -0,0 +1,283 @@
+import os
+import re
+import time
+import zlib
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+# Smaller style/script pieces stay inline in the page record
+CHUNK_MIN_BYTES = int(os.getenv('CHUNK_MIN_BYTES', '128'))
+CHUNK_CACHE_ENTRIES = int(os.getenv('CHUNK_CACHE_ENTRIES', '2048'))
+# Unreferenced chunks younger than this survive garbage collection (in-flight writes, served assets)
+CHUNK_GC_GRACE_SECONDS = float(os.getenv('CHUNK_GC_GRACE_SECONDS', '86400'))
+ASSET_MIN_BYTES = int(os.getenv('ASSET_MIN_BYTES', '512'))
+ASSET_URL_PREFIX = os.getenv('ASSET_URL_PREFIX', '/api/assets/')
+
+# A chunk ends after a unit (CSS statement or script line) whose crc has these bits clear,
+# so boundaries depend on content only and identical runs of rules resync across pages
+_BOUNDARY_MASK = 0x7
+_MAX_CHUNK_BYTES = 16384
+
+_BLOCK = re.compile(r"(<(style|script)\b([^>]*)>)(.*?)(</\2\s*>)", re.IGNORECASE | re.DOTALL)
+_HASH = re.compile(r"[0-9a-f]{32}")
+_INLINE_TYPES = {"", 'type="text/css"', 'type="text/javascript"'}
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _css_units(css: str) -> Iterable[str]:
+    """Top-level CSS statements; braces inside strings only make the split coarser"""
+    depth = 0
+    start = 0
+    for i, ch in enumerate(css):
+        if ch == "{":
+            depth += 1
+        elif ch == "}" and depth:
+            depth -= 1
+            if not depth:
+                yield css[start:i + 1]
+                start = i + 1
+    if start < len(css):
+        yield css[start:]
+
+
+def _content_chunks(units: Iterable[str]) -> Iterable[str]:
+    chunk = []
+    size = 0
+    for unit in units:
+        chunk.append(unit)
+        size += len(unit)
+        if zlib.crc32(unit.strip().encode()) & _BOUNDARY_MASK == 0 or size >= _MAX_CHUNK_BYTES:
+            yield "".join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield "".join(chunk)
+
+
+def split_page(html: str) -> List[tuple]:
+    """Split a page into ("t", markup) and ("c", style/script text) pieces that concatenate back to it"""
+    pieces = []
+    position = 0
+    for match in _BLOCK.finditer(html):
+        pieces.append(("t", html[position:match.start(4)]))
+        body = match.group(4)
+        units = _css_units(body) if match.group(2).lower() == "style" else body.splitlines(keepends=True)
+        pieces.extend(("c", chunk) for chunk in _content_chunks(units))
+        position = match.end(4)
+    pieces.append(("t", html[position:]))
+    return pieces
+
+
+class ChunkStore:
+    """
+    Write-once content-addressed text chunks, keyed by their blake2b hash.
+
+    Stored as files under `directory` (two-level fan-out, written atomically so
+    several workers can add the same chunk at once), or kept in memory when no
+    directory is given.
+    """
+
+    def __init__(self, directory: str = None, cache_entries: int = CHUNK_CACHE_ENTRIES):
+        self.directory = Path(directory) if directory else None
+        self.cache_entries = cache_entries
+        self._memory = {}
+        # Last write of each in-memory chunk, the counterpart of a chunk file's mtime
+        self._touched = {}
+        # Orders in-memory writes against collect(), which runs in a worker thread
+        self._memory_lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._metrics = {"writes": 0, "bytes_written": 0, "dedup_hits": 0, "bytes_deduplicated": 0, "collected": 0}
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / digest
+
+    def _remember(self, digest: str, text: str):
+        self._cache[digest] = text
+        self._cache.move_to_end(digest)
+        if len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+
+    def _write(self, path: Path, text: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as out:
+            out.write(text.encode())
+        os.replace(tmp_path, path)
+
+    def put(self, text: str) -> str:
+        digest = chunk_hash(text)
+        if self.directory is None:
+            with self._memory_lock:
+                exists = digest in self._memory
+                self._memory[digest] = text
+                self._touched[digest] = time.time()
+        else:
+            path = self._path(digest)
+            try:
+                # Refresh the mtime so garbage collection sees the chunk as recently used
+                os.utime(path)
+                exists = True
+            except FileNotFoundError:
+                exists = False
+                self._write(path, text)
+        if exists:
+            self._metrics["dedup_hits"] += 1
+            self._metrics["bytes_deduplicated"] += len(text)
+        else:
+            self._metrics["writes"] += 1
+            self._metrics["bytes_written"] += len(text)
+        self._remember(digest, text)
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        if not _HASH.fullmatch(digest):
+            return None
+        if digest in self._cache:
+            self._cache.move_to_end(digest)
+            return self._cache[digest]
+        if self.directory is None:
+            return self._memory.get(digest)
+        try:
+            text = self._path(digest).read_bytes().decode()
+        except FileNotFoundError:
+            return None
+        self._remember(digest, text)
+        return text
+
+    def restore(self, chunks: dict):
+        """
+        Write back any of these {hash: text} chunks that were collected since
+        they were put; call it holding the lock collect() deletes under.
+        """
+        if self.directory is None:
+            return
+        for digest, text in chunks.items():
+            path = self._path(digest)
+            if not path.exists():
+                self._write(path, text)
+
+    def encode_page(self, html: str, chunks: dict = None) -> list:
+        """
+        Store a page's style/script chunks and return its recipe of ["t", text]
+        / ["c", hash] entries; `chunks` receives the {hash: text} of each chunk.
+        """
+        recipe = []
+        for kind, text in split_page(html):
+            if kind == "c" and len(text) >= CHUNK_MIN_BYTES:
+                digest = self.put(text)
+                if chunks is not None:
+                    chunks[digest] = text
+                recipe.append(["c", digest])
+            elif recipe and recipe[-1][0] == "t":
+                recipe[-1][1] += text
+            elif text:
+                recipe.append(["t", text])
+        return recipe
+
+    def decode_page(self, recipe: list) -> str:
+        parts = []
+        for kind, value in recipe:
+            if kind == "t":
+                parts.append(value)
+                continue
+            text = self.get(value)
+            if text is None:
+                raise ValueError(f"Missing chunk {value}")
+            parts.append(text)
+        return "".join(parts)
+
+    def collect(self, live: set, grace_seconds: float = CHUNK_GC_GRACE_SECONDS,
+                exclusive: Callable = None) -> int:
+        """
+        Delete chunks that no live record references and nobody wrote recently.
+
+        Candidates are listed without locks; each one's mtime is checked again
+        right before it is deleted, inside `exclusive()` when given (the lock
+        writers hold while they append records referencing chunks).
+        """
+        cutoff = time.time() - grace_seconds
+        removed = 0
+        if self.directory is None:
+            # Snapshot: this runs in a worker thread while the event loop keeps writing
+            stale = [digest for digest, touched in list(self._touched.items())
+                     if digest not in live and touched <= cutoff]
+            with self._memory_lock:
+                for digest in stale:
+                    if self._touched.get(digest, cutoff + 1) > cutoff:
+                        continue
+                    self._memory.pop(digest, None)
+                    self._touched.pop(digest, None)
+                    self._cache.pop(digest, None)
+                    removed += 1
+            self._metrics["collected"] += removed
+            return removed
+        if not self.directory.exists():
+            return 0
+        stale = []
+        for fanout in os.scandir(self.directory):
+            if not fanout.is_dir():
+                continue
+            for entry in os.scandir(fanout.path):
+                if entry.name not in live and entry.stat().st_mtime <= cutoff:
+                    stale.append(entry.path)
+        with exclusive() if exclusive else nullcontext():
+            for path in stale:
+                try:
+                    # A writer may have reused the chunk since it was listed
+                    if os.stat(path).st_mtime > cutoff:
+                        continue
+                    os.unlink(path)
+                    removed += 1
+                except FileNotFoundError:
+                    continue
+                self._cache.pop(os.path.basename(path), None)
+        self._metrics["collected"] += removed
+        return removed
+
+    def stats(self) -> dict:
+        if self.directory is None:
+            chunks, size = len(self._memory), sum(len(text) for text in self._memory.values())
+        else:
+            chunks = size = 0
+            if self.directory.exists():
+                for fanout in os.scandir(self.directory):
+                    if fanout.is_dir():
+                        for entry in os.scandir(fanout.path):
+                            chunks += 1
+                            size += entry.stat().st_size
+        return {"chunks": chunks, "bytes": size, **self._metrics}
+
+
+def _asset_body(match) -> Optional[str]:
+    """The body of an inline <style>/<script> block large enough to be served as an asset"""
+    attrs, body = match.group(3).strip().lower(), match.group(4)
+    if attrs not in _INLINE_TYPES or len(body) < ASSET_MIN_BYTES:
+        return None
+    return body
+
+
+def asset_digests(html: str) -> set:
+    """Hashes of the assets externalize_assets() makes of a page, which must outlive their grace period"""
+    return {chunk_hash(body) for body in map(_asset_body, _BLOCK.finditer(html)) if body is not None}
+
+
+def externalize_assets(html: str, chunks: ChunkStore, url_prefix: str = ASSET_URL_PREFIX) -> str:
+    """Replace large inline <style>/<script> blocks with links to hashed, long-cacheable assets"""
+    def replace(match):
+        body = _asset_body(match)
+        if body is None:
+            return match.group(0)
+        digest = chunks.put(body)
+        if match.group(2).lower() == "style":
+            return f'<link rel="stylesheet" href="{url_prefix}{digest}.css">'
+        return f'<script src="{url_prefix}{digest}.js"></script>'
+
+    return _BLOCK.sub(replace, html)
@@ -0,0 +1,165 @@
+import os
+import time
+import hashlib
+import logging
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+from html_text import extract_visible_text, token_spans
+from languages import language_code
+from models import ComplianceFinding, ComplianceReport
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# One <language code>.txt per language plus common.txt for every page; lines are category|phrase
+COMPLIANCE_RULES_DIR = os.getenv('COMPLIANCE_RULES_DIR', str(Path(__file__).parent / 'compliance_rules'))
+CONTEXT_CHARS = 60
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over word tokens.
+
+    Matching on tokens instead of characters gives whole-word matches for
+    free and visits each word of the page once, however many phrases there
+    are.
+    """
+
+    def __init__(self, phrases: List[Tuple[str, ...]]):
+        self.phrases = phrases
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for index, tokens in enumerate(phrases):
+            node = 0
+            for token in tokens:
+                next_node = self._goto[node].get(token)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][token] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = next_node
+            self._out[node].append(index)
+
+        # Breadth-first, so a node's failure link is final before its children need it
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                if node:
+                    fail = self._fail[node]
+                    while fail and token not in self._goto[fail]:
+                        fail = self._fail[fail]
+                    self._fail[child] = self._goto[fail].get(token, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def find(self, tokens: List[str]) -> List[Tuple[int, int]]:
+        """(phrase index, index of its last token) of every match"""
+        matches = []
+        node = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for position, token in enumerate(tokens):
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            for index in out[node]:
+                matches.append((index, position))
+        return matches
+
+
+def load_rules(path: Path) -> List[Tuple[str, str]]:
+    rules = []
+    for number, line in enumerate(path.read_text(encoding="utf-8").splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        category, separator, phrase = line.partition("|")
+        if not separator or not phrase.strip():
+            logger.warning("Skipping malformed compliance rule %s:%d: %r", path.name, number, line)
+            continue
+        rules.append((category.strip(), phrase.strip()))
+    return rules
+
+
+class ComplianceScanner:
+    """
+    Scans the visible text of pages for restricted ad-policy phrases: those of
+    the page's language and the common ones, in a single pass.
+    """
+
+    def __init__(self, rules_dir: str = COMPLIANCE_RULES_DIR):
+        self.rules_dir = Path(rules_dir)
+        self._matchers: Dict[str, tuple] = {}
+        self._stats = {"scans": 0, "non_compliant": 0, "findings": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+    def _rule_files(self, language: str) -> List[Path]:
+        return [path for path in (self.rules_dir / "common.txt", self.rules_dir / f"{language}.txt") if path.exists()]
+
+    def _matcher(self, language: str) -> tuple:
+        """The matcher, rule list and rules version for a language, built on first use"""
+        if language not in self._matchers:
+            rules = {}
+            digest = hashlib.blake2b(digest_size=8)
+            for path in self._rule_files(language):
+                digest.update(path.read_bytes())
+                for category, phrase in load_rules(path):
+                    tokens = tuple(token for token, _, _ in token_spans(phrase))
+                    if tokens:
+                        rules.setdefault(tokens, (category, phrase))
+            phrases = list(rules)
+            self._matchers[language] = (PhraseMatcher(phrases), [rules[p] for p in phrases], digest.hexdigest())
+        return self._matchers[language]
+
+    def scan(self, html: str, language: str) -> ComplianceReport:
+        started = time.perf_counter()
+        code = language_code(language)
+        matcher, rules, version = self._matcher(code)
+        text = extract_visible_text(html)
+        spans = token_spans(text)
+
+        findings = {}
+        for index, end in matcher.find([token for token, _, _ in spans]):
+            category, phrase = rules[index]
+            finding = findings.get(index)
+            if finding is None:
+                start = spans[end - len(matcher.phrases[index]) + 1][1]
+                context = text[max(0, start - CONTEXT_CHARS):spans[end][2] + CONTEXT_CHARS]
+                finding = findings[index] = ComplianceFinding(category=category, phrase=phrase, count=0,
+                                                              context=" ".join(context.split()))
+            finding.count += 1
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._stats["scans"] += 1
+        self._stats["total_ms"] += elapsed_ms
+        self._stats["max_ms"] = max(self._stats["max_ms"], elapsed_ms)
+        if findings:
+            self._stats["non_compliant"] += 1
+            self._stats["findings"] += len(findings)
+            for finding in findings.values():
+                metrics.compliance_findings.inc(category=finding.category)
+        return ComplianceReport(
+            compliant=not findings,
+            language=code,
+            rules_version=version,
+            patterns=len(matcher),
+            findings=sorted(findings.values(), key=lambda f: (f.category, f.phrase)),
+            scan_ms=round(elapsed_ms, 3),
+            checked_at=datetime.utcnow(),
+        )
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["avg_ms"] = stats["total_ms"] / stats["scans"] if stats["scans"] else 0.0
+        stats["languages"] = {code: len(matcher) for code, (matcher, _, _) in self._matchers.items()}
+        return stats
+
+
+compliance_scanner = ComplianceScanner()
@@ -0,0 +1,189 @@
+import zlib
+from html import escape
+from languages import language_code
+
+# Placeholder copy of draft pages; the generated page replaces all of it
+DRAFT_COPY = {
+    "en": {
+        "subtitle": "Everything you need, in one place. The full page is being prepared for you.",
+        "features": "Why choose us",
+        "items": ["Fast start", "Proven results", "Support that cares"],
+        "item_text": "Details are on their way.",
+        "form": "Leave your details",
+        "name": "Name",
+        "email": "Email",
+        "notice": "Preview",
+        "rights": "All rights reserved.",
+    },
+    "ru": {
+        "subtitle": "Всё, что нужно, в одном месте. Полная версия страницы уже готовится.",
+        "features": "Почему мы",
+        "items": ["Быстрый старт", "Проверенный результат", "Внимательная поддержка"],
+        "item_text": "Подробности скоро появятся.",
+        "form": "Оставьте заявку",
+        "name": "Имя",
+        "email": "Email",
+        "notice": "Черновик",
+        "rights": "Все права защищены.",
+    },
+    "uk": {
+        "subtitle": "Усе, що потрібно, в одному місці. Повна версія сторінки вже готується.",
+        "features": "Чому ми",
+        "items": ["Швидкий старт", "Перевірений результат", "Уважна підтримка"],
+        "item_text": "Подробиці незабаром.",
+        "form": "Залиште заявку",
+        "name": "Ім'я",
+        "email": "Email",
+        "notice": "Чернетка",
+        "rights": "Усі права захищено.",
+    },
+    "de": {
+        "subtitle": "Alles, was Sie brauchen, an einem Ort. Die vollständige Seite wird gerade erstellt.",
+        "features": "Warum wir",
+        "items": ["Schneller Start", "Bewährte Ergebnisse", "Persönlicher Support"],
+        "item_text": "Details folgen in Kürze.",
+        "form": "Hinterlassen Sie Ihre Daten",
+        "name": "Name",
+        "email": "E-Mail",
+        "notice": "Vorschau",
+        "rights": "Alle Rechte vorbehalten.",
+    },
+    "es": {
+        "subtitle": "Todo lo que necesitas en un solo lugar. Estamos preparando la página completa.",
+        "features": "Por qué elegirnos",
+        "items": ["Inicio rápido", "Resultados probados", "Soporte cercano"],
+        "item_text": "Los detalles llegarán pronto.",
+        "form": "Déjanos tus datos",
+        "name": "Nombre",
+        "email": "Correo electrónico",
+        "notice": "Vista previa",
+        "rights": "Todos los derechos reservados.",
+    },
+    "fr": {
+        "subtitle": "Tout ce dont vous avez besoin, au même endroit. La page complète est en préparation.",
+        "features": "Pourquoi nous choisir",
+        "items": ["Démarrage rapide", "Résultats prouvés", "Un support attentif"],
+        "item_text": "Les détails arrivent bientôt.",
+        "form": "Laissez vos coordonnées",
+        "name": "Nom",
+        "email": "E-mail",
+        "notice": "Aperçu",
+        "rights": "Tous droits réservés.",
+    },
+    "it": {
+        "subtitle": "Tutto ciò che ti serve, in un unico posto. La pagina completa è in preparazione.",
+        "features": "Perché sceglierci",
+        "items": ["Avvio rapido", "Risultati comprovati", "Supporto dedicato"],
+        "item_text": "I dettagli arriveranno a breve.",
+        "form": "Lascia i tuoi dati",
+        "name": "Nome",
+        "email": "Email",
+        "notice": "Anteprima",
+        "rights": "Tutti i diritti riservati.",
+    },
+    "pt": {
+        "subtitle": "Tudo o que você precisa em um só lugar. A página completa está sendo preparada.",
+        "features": "Por que nos escolher",
+        "items": ["Início rápido", "Resultados comprovados", "Suporte atencioso"],
+        "item_text": "Os detalhes chegarão em breve.",
+        "form": "Deixe seus dados",
+        "name": "Nome",
+        "email": "E-mail",
+        "notice": "Pré-visualização",
+        "rights": "Todos os direitos reservados.",
+    },
+    "pl": {
+        "subtitle": "Wszystko, czego potrzebujesz, w jednym miejscu. Pełna strona jest w przygotowaniu.",
+        "features": "Dlaczego my",
+        "items": ["Szybki start", "Sprawdzone wyniki", "Troskliwe wsparcie"],
+        "item_text": "Szczegóły wkrótce.",
+        "form": "Zostaw swoje dane",
+        "name": "Imię",
+        "email": "E-mail",
+        "notice": "Podgląd",
+        "rights": "Wszelkie prawa zastrzeżone.",
+    },
+    "tr": {
+        "subtitle": "İhtiyacınız olan her şey tek bir yerde. Sayfanın tamamı hazırlanıyor.",
+        "features": "Neden biz",
+        "items": ["Hızlı başlangıç", "Kanıtlanmış sonuçlar", "İlgili destek"],
+        "item_text": "Ayrıntılar yakında.",
+        "form": "Bilgilerinizi bırakın",
+        "name": "Ad",
+        "email": "E-posta",
+        "notice": "Önizleme",
+        "rights": "Tüm hakları saklıdır.",
+    },
+}
+
+DRAFT_TEMPLATE = """<!DOCTYPE html>
+<html lang="{lang}">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<meta name="robots" content="noindex">
+<title>{theme}</title>
+<style>
+:root{{--primary:hsl({hue},70%,45%);--accent:hsl({accent},75%,55%);--text:#1f2333;--muted:#5d6275;--bg:#f7f8fc}}
+*{{box-sizing:border-box;margin:0;padding:0}}
+body{{font-family:system-ui,-apple-system,"Segoe UI",Roboto,sans-serif;color:var(--text);background:var(--bg);line-height:1.6}}
+header{{position:fixed;top:0;width:100%;padding:16px 24px;background:rgba(255,255,255,.8);backdrop-filter:blur(10px);display:flex;justify-content:space-between;align-items:center;z-index:10}}
+.badge{{font-size:12px;color:var(--muted);border:1px solid currentColor;border-radius:999px;padding:2px 10px}}
+.hero{{min-height:70vh;display:flex;flex-direction:column;justify-content:center;align-items:center;text-align:center;padding:120px 24px 64px;background:linear-gradient(135deg,var(--primary),var(--accent));color:#fff}}
+.hero h1{{font-size:clamp(32px,6vw,56px);max-width:900px}}
+.hero p{{margin:16px 0 32px;font-size:20px;opacity:.9;max-width:640px}}
+.cta{{display:inline-block;padding:16px 40px;border-radius:999px;background:#fff;color:var(--primary);font-weight:700;text-decoration:none;border:0;font-size:18px;cursor:pointer}}
+.features{{padding:64px 24px;max-width:1100px;margin:0 auto;text-align:center}}
+.features h2,.form h2{{font-size:32px;margin-bottom:32px}}
+.grid{{display:grid;grid-template-columns:repeat(auto-fit,minmax(240px,1fr));gap:24px}}
+.card{{background:#fff;border-radius:16px;padding:32px;box-shadow:0 10px 30px rgba(0,0,0,.06)}}
+.card p{{color:var(--muted)}}
+.form{{padding:64px 24px;text-align:center}}
+.form form{{display:flex;flex-direction:column;gap:12px;max-width:420px;margin:0 auto}}
+.form input{{padding:14px 16px;border:1px solid #d8dbe6;border-radius:12px;font-size:16px}}
+.form .cta{{background:var(--primary);color:#fff}}
+footer{{padding:32px 24px;text-align:center;color:var(--muted);font-size:14px}}
+</style>
+</head>
+<body>
+<header><strong>{theme}</strong><span class="badge">{notice}</span></header>
+<section class="hero" id="hero">
+<h1>{theme}</h1>
+<p>{subtitle}</p>
+<a class="cta" href="#form">{target_action}</a>
+</section>
+<section class="features" id="features">
+<h2>{features}</h2>
+<div class="grid">{cards}</div>
+</section>
+<section class="form" id="form">
+<h2>{form}</h2>
+<form onsubmit="return false">
+<input type="text" name="name" placeholder="{name}" required>
+<input type="email" name="email" placeholder="{email}" required>
+<button class="cta" type="submit">{target_action}</button>
+</form>
+</section>
+<footer>&copy; {theme}. {rights}</footer>
+</body>
+</html>
+"""
+
+
+def render_draft(theme: str, language: str, target_action: str) -> str:
+    """A complete, instantly available page with placeholder copy in the request's language"""
+    lang = language_code(language)
+    copy = DRAFT_COPY[lang]
+    hue = zlib.crc32(theme.encode()) % 360
+    cards = "".join(
+        f'<div class="card"><h3>{escape(item)}</h3><p>{escape(copy["item_text"])}</p></div>' for item in copy["items"]
+    )
+    return DRAFT_TEMPLATE.format(
+        lang=lang,
+        hue=hue,
+        accent=(hue + 40) % 360,
+        theme=escape(theme),
+        target_action=escape(target_action),
+        cards=cards,
+        **{key: escape(value) for key, value in copy.items() if isinstance(value, str)},
+    )
@@ -0,0 +1,136 @@
+import io
+import os
+import calendar
+import re
+import hashlib
+import tarfile
+import zipfile
+from datetime import datetime
+from typing import List, Tuple
+from chunk_store import ChunkStore, externalize_assets
+from fast_json import dumps
+from models import LandingPage
+
+EXPORT_MAX_LANDINGS = int(os.getenv('EXPORT_MAX_LANDINGS', '1000'))
+# (media type, file extension) per archive format
+ARCHIVE_FORMATS = {"zip": ("application/zip", "zip"), "tar": ("application/gzip", "tar.gz")}
+ASSET_DIR = "assets"
+# Pages sit one directory below the bundle root, next to the shared asset directory
+_ASSET_LINK = re.compile(rf"\.\./{ASSET_DIR}/([0-9a-f]{{32}})\.(css|js)\b")
+
+
+class _Spool:
+    """Write-only file object whose contents are handed out and dropped as the archive grows"""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+class LandingBundle:
+    """
+    A static-site bundle of landing pages, written as a ZIP or gzipped tar
+    stream one page at a time.
+
+    Each page is <id>/index.html; with external_assets its large inline
+    styles/scripts become files under assets/, each written once however many
+    pages share it. manifest.json, describing every page, comes last. Only the
+    page being added and its compressed output are held in memory.
+    """
+
+    def __init__(self, chunks: ChunkStore, archive: str = "zip", external_assets: bool = False):
+        self.chunks = chunks
+        self.archive = archive
+        self.external_assets = external_assets
+        self.exported_at = datetime.utcnow()
+        self.landings = []
+        self.assets = []
+        self._written = set()
+        self._spool = _Spool()
+        if archive == "zip":
+            # The spool cannot seek, so entries are written with trailing data descriptors
+            self._zip = zipfile.ZipFile(self._spool, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6)
+        else:
+            self._tar = tarfile.open(fileobj=self._spool, mode="w|gz")
+
+    def files(self, landing: LandingPage) -> List[Tuple[str, bytes, datetime]]:
+        """The archive entries of a landing (its page and the assets not written yet); records it in the manifest"""
+        html = landing.html
+        entries = []
+        assets = []
+        if self.external_assets:
+            html = externalize_assets(html, self.chunks, url_prefix=f"../{ASSET_DIR}/")
+            for digest, extension in dict.fromkeys(_ASSET_LINK.findall(html)):
+                path = f"{ASSET_DIR}/{digest}.{extension}"
+                assets.append(path)
+                if path in self._written:
+                    continue
+                content = self.chunks.get(digest)
+                if content is not None:
+                    self._written.add(path)
+                    self.assets.append(path)
+                    entries.append((path, content.encode(), self.exported_at))
+
+        page = html.encode()
+        path = f"{landing.id}/index.html"
+        entries.append((path, page, landing.created_at))
+        self.landings.append({
+            "id": landing.id,
+            "path": path,
+            "theme": landing.theme,
+            "language": landing.language,
+            "traffic_source": landing.traffic_source,
+            "target_action": landing.target_action,
+            "profile": landing.profile,
+            "status": landing.status,
+            "version": landing.version,
+            "lighthouse": landing.lighthouse,
+            "compliant": landing.compliance.compliant if landing.compliance else None,
+            "created_at": landing.created_at.isoformat(),
+            "bytes": len(page),
+            "sha256": hashlib.sha256(page).hexdigest(),
+            "assets": assets,
+        })
+        return entries
+
+    def write(self, entries: List[Tuple[str, bytes, datetime]]) -> bytes:
+        """Add entries to the archive and return the archive bytes produced since the last call"""
+        for name, data, modified in entries:
+            if self.archive == "zip":
+                info = zipfile.ZipInfo(name, date_time=modified.timetuple()[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                self._zip.writestr(info, data)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = calendar.timegm(modified.utctimetuple())
+                info.mode = 0o644
+                self._tar.addfile(info, io.BytesIO(data))
+        return self._spool.take()
+
+    def finish(self) -> bytes:
+        """Write the manifest, close the archive and return its remaining bytes"""
+        manifest = dumps({
+            "exported_at": self.exported_at.isoformat(),
+            "external_assets": self.external_assets,
+            "landings": self.landings,
+            "assets": self.assets,
+        })
+        data = self.write([("manifest.json", manifest, self.exported_at)])
+        if self.archive == "zip":
+            self._zip.close()
+        else:
+            self._tar.close()
+        return data + self._spool.take()
@@ -0,0 +1,76 @@
+import os
+from collections import OrderedDict
+from typing import Iterable, Optional
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
+RESPONSE_CACHE_BYTES = int(float(os.getenv('RESPONSE_CACHE_MB', '64')) * 1024 * 1024)
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response that passes pre-serialised bytes through and uses orjson otherwise"""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return dumps(content)
+
+
+def json_array(items: Iterable[bytes]) -> bytes:
+    """Join already serialised JSON values into one JSON array"""
+    return b"[" + b",".join(items) + b"]"
+
+
+class SerializedCache:
+    """LRU of pre-serialised JSON bodies keyed by landing id, bounded in bytes"""
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key: str, body: bytes):
+        self.discard(key)
+        if len(body) > self.max_bytes:
+            return
+        self._entries[key] = body
+        self._bytes += len(body)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def discard(self, key: str):
+        body = self._entries.pop(key, None)
+        if body is not None:
+            self._bytes -= len(body)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses}
+
+
+landing_json = SerializedCache()
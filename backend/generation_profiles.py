@@ -0,0 +1,104 @@
+import os
+from collections import deque
+from typing import Optional
+from metrics import percentile
+
+DEFAULT_PROFILE = "full"
+
+
+class GenerationProfile:
+    """
+    How rich a generated page is: its sections, content depth, the model and
+    the completion size. Poorer pages come back sooner.
+    """
+
+    def __init__(self, name: str, structure: str, design: str, content: str, max_tokens: int,
+                 provider: Optional[str] = None, model: Optional[str] = None):
+        self.name = name
+        self.structure = structure
+        self.design = design
+        self.content = content
+        self.max_tokens = max_tokens
+        # None: the generator's default provider/model
+        self.provider = provider
+        self.model = model
+
+    @classmethod
+    def from_env(cls, name: str, max_tokens: int, **kwargs) -> "GenerationProfile":
+        prefix = f"GENERATION_PROFILE_{name.upper()}"
+        return cls(
+            name,
+            max_tokens=int(os.getenv(f'{prefix}_MAX_TOKENS', str(max_tokens))),
+            provider=os.getenv(f'{prefix}_PROVIDER') or None,
+            model=os.getenv(f'{prefix}_MODEL') or None,
+            **kwargs,
+        )
+
+    def describe(self) -> dict:
+        return {"structure": self.structure, "design": self.design, "content": self.content,
+                "max_tokens": self.max_tokens, "provider": self.provider, "model": self.model}
+
+
+PROFILES = {
+    "fast": GenerationProfile.from_env(
+        "fast",
+        max_tokens=4096,
+        structure="Header(fixed) + Hero(gradient, CTA) + Features(3 short) + Testimonials(2 with https://i.pravatar.cc/150?img=1-2) + Form(name, email) + Footer(contact)",
+        design="CSS vars(:root), gradients(2 colors), hover effects, Google Fonts, responsive. No animations, no external images",
+        content="Short and punchy, one or two sentences per block. ALL in LANGUAGE. CTA: TARGET ACTION",
+    ),
+    "standard": GenerationProfile.from_env(
+        "standard",
+        max_tokens=8192,
+        structure="Header(fixed, glassmorphism) + Hero(gradient, stats, CTAs) + Trust(3 cards) + Testimonials(3 with https://i.pravatar.cc/150?img=1-3) + Features(4 detailed) + FAQ(4 accordion) + Pricing(2 tiers) + Form(fields, GDPR) + Footer(2 columns, contact)",
+        design="CSS vars(:root), rich gradients(3+ colors), shadows(0 10px 30px), animations(@keyframes fadeIn), hover(translateY(-8px)), images(unsplash), Google Fonts, responsive",
+        content="Specific, realistic numbers, a short paragraph per block. ALL in LANGUAGE. CTA: TARGET ACTION",
+    ),
+    "full": GenerationProfile.from_env(
+        "full",
+        max_tokens=16384,
+        structure="Header(fixed, glassmorphism) + Hero(gradient, stats, CTAs) + Trust(3 cards) + Problems(4 cards) + Testimonials(6 with https://i.pravatar.cc/150?img=1-6) + Features(6 detailed) + How-it-works(4 steps) + Stats(6 counters) + FAQ(6 accordion) + Pricing(3 tiers) + Form(fields, GDPR) + Footer(4 columns, contact)",
+        design="CSS vars(:root), rich gradients(3+ colors), shadows(0 10px 30px), animations(@keyframes pulse, float, fadeIn), hover(translateY(-8px) scale(1.03)), images(unsplash), Google Fonts, responsive",
+        content="Detailed, specific, realistic numbers. ALL in LANGUAGE. CTA: TARGET ACTION",
+    ),
+}
+
+
+class ProfileStats:
+    """Measured generation latency and page size per profile"""
+
+    def __init__(self, window: int = 1000):
+        self._stats = {
+            name: {"generations": 0, "seconds": deque(maxlen=window), "html_bytes": deque(maxlen=window),
+                   "completion_tokens": deque(maxlen=window)}
+            for name in PROFILES
+        }
+
+    def record(self, profile: str, seconds: float, html_bytes: int, completion_tokens: int):
+        stats = self._stats[profile]
+        stats["generations"] += 1
+        stats["seconds"].append(seconds)
+        stats["html_bytes"].append(html_bytes)
+        stats["completion_tokens"].append(completion_tokens)
+
+    def recent_seconds(self, profile: str) -> list:
+        """Generation times in the window of a profile"""
+        return list(self._stats[profile]["seconds"])
+
+    def snapshot(self) -> dict:
+        profiles = {}
+        for name, stats in self._stats.items():
+            samples = len(stats["seconds"])
+            profiles[name] = {
+                **PROFILES[name].describe(),
+                "generations": stats["generations"],
+                "p50_seconds": percentile(stats["seconds"], 0.50),
+                "p95_seconds": percentile(stats["seconds"], 0.95),
+                "avg_html_bytes": sum(stats["html_bytes"]) / samples if samples else 0.0,
+                "max_html_bytes": max(stats["html_bytes"], default=0),
+                "avg_completion_tokens": sum(stats["completion_tokens"]) / samples if samples else 0.0,
+            }
+        return {"default": DEFAULT_PROFILE, "profiles": profiles}
+
+
+profile_stats = ProfileStats()
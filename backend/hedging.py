@@ -0,0 +1,164 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional, Sequence
+from provider_client import DEFAULT_PROVIDER, DEFAULT_MODEL
+from metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy:
+    """
+    Opt-in hedging between a primary and an alternate provider/model.
+
+    When the primary attempt has not finished after the hedge delay, or fails,
+    the same work is started on the alternate; the first success wins.
+
+    Attempts are whole completions, so the delay has to sit above the usual
+    completion time: every hedge pays for a second generation. By default it
+    is the `delay_percentile` of recent completion times of the same work
+    (about 5% of requests hedged at p95) and `fallback_delay_seconds` until
+    there are `min_samples` of them. A fixed `delay_seconds` overrides it.
+    """
+
+    def __init__(self, enabled: bool = False, delay_seconds: Optional[float] = None,
+                 primary: tuple = (DEFAULT_PROVIDER, DEFAULT_MODEL),
+                 alternate: tuple = ("gemini", "gemini-2.0-flash"),
+                 delay_percentile: float = 0.95, fallback_delay_seconds: float = 90.0, min_samples: int = 20):
+        self.enabled = enabled
+        self.delay_seconds = delay_seconds
+        self.primary = primary
+        self.alternate = alternate
+        self.delay_percentile = delay_percentile
+        self.fallback_delay_seconds = fallback_delay_seconds
+        self.min_samples = min_samples
+
+    @classmethod
+    def from_env(cls) -> "HedgePolicy":
+        delay = os.getenv('LLM_HEDGE_DELAY_SECONDS')
+        return cls(
+            enabled=os.getenv('LLM_HEDGE_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+            delay_seconds=float(delay) if delay else None,
+            primary=(os.getenv('LLM_PROVIDER', DEFAULT_PROVIDER), os.getenv('LLM_MODEL', DEFAULT_MODEL)),
+            alternate=(os.getenv('LLM_HEDGE_PROVIDER', 'gemini'), os.getenv('LLM_HEDGE_MODEL', 'gemini-2.0-flash')),
+            delay_percentile=float(os.getenv('LLM_HEDGE_PERCENTILE', '0.95')),
+            fallback_delay_seconds=float(os.getenv('LLM_HEDGE_FALLBACK_DELAY_SECONDS', '90')),
+        )
+
+    def delay_for(self, latency_samples: Sequence[float]) -> float:
+        """Hedge delay given recent completion times (seconds) of the work being hedged"""
+        if self.delay_seconds is not None:
+            return self.delay_seconds
+        if len(latency_samples) < self.min_samples:
+            return self.fallback_delay_seconds
+        return percentile(latency_samples, self.delay_percentile)
+
+    def with_primary(self, provider: str = None, model: str = None) -> "HedgePolicy":
+        """The same policy with the primary provider and/or model replaced"""
+        if provider is None and model is None:
+            return self
+        primary = (provider or self.primary[0], model or self.primary[1])
+        return HedgePolicy(self.enabled, self.delay_seconds, primary, self.alternate,
+                           self.delay_percentile, self.fallback_delay_seconds, self.min_samples)
+
+
+class HedgeStats:
+    """Per provider/model attempt, win and latency counters"""
+
+    def __init__(self):
+        self._targets = {}
+        self.hedged = 0
+
+    def _target(self, provider: str, model: str) -> dict:
+        key = f"{provider}/{model}"
+        if key not in self._targets:
+            self._targets[key] = {
+                "attempts": 0, "wins": 0, "errors": 0, "cancelled": 0,
+                "total_win_seconds": 0.0, "max_win_seconds": 0.0,
+            }
+        return self._targets[key]
+
+    def record(self, provider: str, model: str, outcome: str, seconds: float = 0.0):
+        target = self._target(provider, model)
+        if outcome == "attempt":
+            target["attempts"] += 1
+        elif outcome == "win":
+            target["wins"] += 1
+            target["total_win_seconds"] += seconds
+            target["max_win_seconds"] = max(target["max_win_seconds"], seconds)
+        elif outcome == "error":
+            target["errors"] += 1
+        elif outcome == "cancelled":
+            target["cancelled"] += 1
+
+    def snapshot(self) -> dict:
+        targets = {}
+        for key, target in self._targets.items():
+            target = dict(target)
+            target["avg_win_seconds"] = target["total_win_seconds"] / target["wins"] if target["wins"] else 0.0
+            targets[key] = target
+        return {"hedged_requests": self.hedged, "targets": targets}
+
+
+hedge_stats = HedgeStats()
+
+
+async def run_hedged(attempt: Callable[[str, str], Awaitable], policy: HedgePolicy, stats: HedgeStats = hedge_stats,
+                     latency_samples: Sequence[float] = ()):
+    """
+    Run `attempt(provider, model)` under the hedging policy and return the
+    first successful result; the losing attempt is cancelled.
+    `latency_samples` are recent completion times of the same work.
+    """
+    async def timed(target: tuple):
+        provider, model = target
+        stats.record(provider, model, "attempt")
+        started = time.perf_counter()
+        try:
+            result = await attempt(provider, model)
+        except asyncio.CancelledError:
+            stats.record(provider, model, "cancelled")
+            raise
+        except Exception:
+            stats.record(provider, model, "error")
+            raise
+        stats.record(provider, model, "win", time.perf_counter() - started)
+        return result
+
+    if not policy.enabled:
+        return await timed(policy.primary)
+
+    delay = policy.delay_for(latency_samples)
+    primary = asyncio.create_task(timed(policy.primary))
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done and primary.exception() is None:
+            return primary.result()
+
+        if not done:
+            logger.info("Primary %s/%s slower than %.1fs, hedging to %s/%s",
+                        *policy.primary, delay, *policy.alternate)
+        else:
+            logger.warning("Primary %s/%s failed, falling back to %s/%s",
+                           *policy.primary, *policy.alternate)
+            pending = set()
+        stats.hedged += 1
+        pending.add(asyncio.create_task(timed(policy.alternate)))
+
+        error = primary.exception() if done else None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            # Let the losers unwind so their stats and usage are recorded before we return
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,150 @@
+import re
+from html.parser import HTMLParser
+from typing import Tuple
+
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source",
+                 "track", "wbr"}
+# A continuation repeating at least this much of the end of the page, from the start of a line, is trimmed
+MIN_OVERLAP = 256
+OVERLAP_WINDOW = 4000
+_DOCUMENT_START = re.compile(r"\s*(<!doctype|<html)", re.IGNORECASE)
+
+
+class HtmlValidator(HTMLParser):
+    """
+    Truncation check of a page, extended in place by its continuations.
+
+    Keeps the stack of open elements and how far the input has been parsed,
+    so when the text stops without </html> it can tell where it was cut
+    (inside a tag, comment, script or style, or in text) and close what is
+    open; a continuation fed to it is parsed on its own, not with the page.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.open_elements = []
+        self.complete = False
+        self._chunks = []
+        self._length = 0
+        self._line_starts = [0]
+        self._end = None
+
+    def _text(self) -> str:
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        return self._line_starts[line - 1] + column
+
+    def feed(self, chunk: str):
+        if self.complete or not chunk:
+            return
+        self._line_starts.extend(self._length + m.end() for m in re.finditer("\n", chunk))
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        super().feed(chunk)
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in VOID_ELEMENTS:
+            self.open_elements.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in self.open_elements:
+            return
+        # Elements left open inside it (p, li, ...) are closed implicitly
+        while self.open_elements.pop() != tag:
+            pass
+        if tag == "html":
+            start = self._offset()
+            self._end = self._text().index(">", start) + 1
+            self.complete = True
+
+    @property
+    def parsed_length(self) -> int:
+        """Input up to the end of the last complete token"""
+        return self._length - len(self.rawdata)
+
+    def truncated_in(self) -> str:
+        if self.complete:
+            return ""
+        if self.cdata_elem:
+            return self.cdata_elem
+        pending = self.rawdata.lstrip()
+        if pending.startswith("<!--"):
+            return "comment"
+        if pending.startswith("<"):
+            return "tag"
+        return "text"
+
+    def html(self) -> str:
+        """The page as received, without anything after </html>"""
+        text = self._text()
+        return text[:self._end] if self.complete else text
+
+    def repaired(self) -> str:
+        """The page cut back to its last complete token, with every open element closed"""
+        if self.complete:
+            return self.html()
+        closing = "".join(f"</{tag}>" for tag in reversed(self.open_elements))
+        return self._text()[:self.parsed_length].rstrip() + closing
+
+    def report(self) -> dict:
+        return {"complete": self.complete, "truncated_in": self.truncated_in(),
+                "open_elements": list(self.open_elements), "length": self._length}
+
+
+def continue_with(validator: HtmlValidator, continuation: str) -> HtmlValidator:
+    """
+    Feed a model's continuation of a cut-off page. A continuation that starts
+    the page over replaces it; one that restarts the end of the page is trimmed.
+    """
+    if _DOCUMENT_START.match(continuation):
+        validator = HtmlValidator()
+        validator.feed(continuation.strip())
+        return validator
+    validator.feed(continuation[_repeated_length(validator, continuation):])
+    return validator
+
+
+def _repeated_length(validator: HtmlValidator, continuation: str) -> int:
+    """
+    How much of the continuation repeats the end of the page.
+
+    Correct continuations often begin with markup or CSS that also ends the
+    page, so only clear restarts count: the tag the page was cut in, written
+    again from its "<", or a repeat starting at a line start. A repeat that
+    does not cover the cut tag must be at least MIN_OVERLAP long.
+    """
+    text = validator.html()
+    pending = text[validator.parsed_length:].lstrip()
+    if not pending.startswith("<"):
+        pending = ""
+    elif continuation.lstrip().startswith(pending):
+        return len(continuation) - len(continuation.lstrip()) + len(pending)
+    tail = text[-OVERLAP_WINDOW:]
+    shortest = len(pending) if pending else MIN_OVERLAP
+    for size in range(min(len(tail), len(continuation)), shortest - 1, -1):
+        at_line_start = size == len(text) or text[-size - 1] == "\n"
+        if at_line_start and continuation.startswith(tail[-size:]):
+            return size
+    return 0
+
+
+def repair_html(html: str) -> Tuple[str, bool]:
+    """Close the open elements of a possibly cut-off page; returns the page and whether it was complete"""
+    validator = HtmlValidator()
+    validator.feed(html)
+    return validator.repaired(), validator.complete
+
+
+def strip_fences(text: str) -> str:
+    """Drop code fences around a continuation, keeping its leading whitespace otherwise"""
+    stripped = text.strip()
+    if stripped.startswith('```'):
+        text = stripped[7:].lstrip("\n") if stripped.startswith('```html') else stripped[3:].lstrip("\n")
+    if text.rstrip().endswith('```'):
+        text = text.rstrip()[:-3]
+    return text
+
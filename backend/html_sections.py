@@ -0,0 +1,116 @@
+import re
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+# Names a section goes by in generated pages (ids, classes or tag names)
+SECTION_ALIASES = {
+    "header": ["header", "navbar", "nav"],
+    "hero": ["hero", "banner"],
+    "trust": ["trust", "benefits", "advantages"],
+    "problems": ["problems", "problem", "pain-points"],
+    "testimonials": ["testimonials", "reviews"],
+    "features": ["features"],
+    "how-it-works": ["how-it-works", "steps", "process"],
+    "stats": ["stats", "statistics", "counters", "numbers"],
+    "faq": ["faq"],
+    "pricing": ["pricing", "plans", "tariffs"],
+    "form": ["form", "contact-form", "signup", "register", "lead-form"],
+    "footer": ["footer"],
+}
+
+# Elements a page section can be; a match on one of these beats a match on a div
+_SECTIONING = {"section", "header", "footer", "nav", "form", "main", "aside", "article"}
+_CANDIDATES = _SECTIONING | {"div"}
+_SPLIT = re.compile(r"[-_\s]+")
+_ROOT_VARS = re.compile(r":root\s*\{[^}]*\}")
+_FONT_LINK = re.compile(r"<link[^>]+fonts\.googleapis\.com[^>]*>", re.IGNORECASE)
+_FONT_FAMILY = re.compile(r"font-family\s*:\s*([^;}]+)")
+DESIGN_CONTEXT_LIMIT = 3000
+
+
+def section_aliases(name: str) -> List[str]:
+    name = name.casefold().replace("_", "-").strip()
+    return SECTION_ALIASES.get(name, [name])
+
+
+def _match_rank(tag: str, attrs: dict, aliases: List[str]) -> Optional[int]:
+    """Lower is better: exact id, id part, exact class, class part, tag name"""
+    element_id = (attrs.get("id") or "").casefold()
+    classes = (attrs.get("class") or "").casefold().split()
+    for rank, values, exact in ((0, [element_id], True), (1, [element_id], False),
+                                (2, classes, True), (3, classes, False)):
+        for value in values:
+            if not value:
+                continue
+            for alias in aliases:
+                if (value == alias) if exact else (alias in _SPLIT.split(value) or value.startswith(alias + "-")):
+                    return rank
+    if tag in aliases:
+        return 4
+    return None
+
+
+class _SectionLocator(HTMLParser):
+    def __init__(self, html: str, aliases: List[str]):
+        super().__init__(convert_charrefs=True)
+        self.html = html
+        self.aliases = aliases
+        self._line_starts = [0] + [m.end() for m in re.finditer("\n", html)]
+        self._open = []
+        self._opened = 0
+        self.matches = []
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        return self._line_starts[line - 1] + column
+
+    def handle_starttag(self, tag, attrs):
+        for entry in self._open:
+            if entry[0] == tag:
+                entry[2] += 1
+        if tag not in _CANDIDATES:
+            return
+        rank = _match_rank(tag, dict(attrs), self.aliases)
+        if rank is not None:
+            # Ties go to the element that opens first, i.e. the outermost one
+            self._open.append([tag, (rank, tag not in _SECTIONING, self._opened), 1, self._offset()])
+            self._opened += 1
+
+    def handle_endtag(self, tag):
+        for entry in list(self._open):
+            if entry[0] != tag:
+                continue
+            entry[2] -= 1
+            if entry[2] == 0:
+                self._open.remove(entry)
+                end = self.html.find(">", self._offset()) + 1
+                self.matches.append((entry[1], entry[3], end))
+
+
+def find_section(html: str, name: str) -> Optional[Tuple[int, int]]:
+    """Return the (start, end) offsets of the element holding the named section"""
+    locator = _SectionLocator(html, section_aliases(name))
+    locator.feed(html)
+    locator.close()
+    if not locator.matches:
+        return None
+    _, start, end = min(locator.matches)
+    return start, end
+
+
+def splice_section(html: str, span: Tuple[int, int], fragment: str) -> str:
+    start, end = span
+    return html[:start] + fragment + html[end:]
+
+
+def extract_section(html: str, name: str) -> Optional[str]:
+    span = find_section(html, name)
+    return html[span[0]:span[1]] if span else None
+
+
+def design_context(html: str) -> str:
+    """CSS variables and fonts of a page, so a regenerated section keeps its look"""
+    parts = _ROOT_VARS.findall(html) + _FONT_LINK.findall(html)
+    families = list(dict.fromkeys(f.strip() for f in _FONT_FAMILY.findall(html)))[:5]
+    parts += [f"font-family: {family};" for family in families]
+    return "\n".join(parts)[:DESIGN_CONTEXT_LIMIT]
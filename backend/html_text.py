@@ -0,0 +1,92 @@
+import re
+from html import escape
+from html.parser import HTMLParser
+from typing import List, Tuple
+
+# Elements whose content never shows up as page text
+_INVISIBLE = {"script", "style", "noscript", "template", "svg", "head"}
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+class _VisibleTextParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._hidden = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _INVISIBLE:
+            self._hidden += 1
+        elif tag == "img" and not self._hidden:
+            alt = dict(attrs).get("alt")
+            if alt:
+                self.parts.append(alt)
+
+    def handle_endtag(self, tag):
+        if tag in _INVISIBLE and self._hidden:
+            self._hidden -= 1
+
+    def handle_data(self, data):
+        if not self._hidden and data.strip():
+            self.parts.append(data.strip())
+
+
+class _TextNodeParser(HTMLParser):
+    """Offsets and lengths of the visible text nodes of a page, as they appear in its source"""
+
+    def __init__(self, html: str):
+        super().__init__(convert_charrefs=False)
+        self.nodes = []
+        self._hidden = 0
+        self._line_starts = [0] + [m.end() for m in re.finditer("\n", html)]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _INVISIBLE:
+            self._hidden += 1
+
+    def handle_endtag(self, tag):
+        if tag in _INVISIBLE and self._hidden:
+            self._hidden -= 1
+
+    def handle_data(self, data):
+        if not self._hidden:
+            line, column = self.getpos()
+            self.nodes.append((self._line_starts[line - 1] + column, len(data)))
+
+
+def extract_visible_text(html: str) -> str:
+    """Return the text a visitor sees on the page (plus image alt text)"""
+    parser = _VisibleTextParser()
+    parser.feed(html)
+    parser.close()
+    return " ".join(parser.parts)
+
+
+def tokenize(text: str) -> List[str]:
+    """Case-folded word tokens; Unicode-aware, so Cyrillic and accented text work"""
+    return _TOKEN.findall(text.casefold())
+
+
+def token_spans(text: str) -> List[Tuple[str, int, int]]:
+    """Case-folded word tokens with their start and end offsets in `text`"""
+    return [(m.group().casefold(), m.start(), m.end()) for m in _TOKEN.finditer(text)]
+
+
+def replace_visible_text(html: str, old: str, new: str) -> str:
+    """
+    Replace whole-word occurrences of `old` in the page's visible text only;
+    markup, attributes, CSS and scripts are left untouched.
+    """
+    pattern = re.compile(rf"(?<!\w){re.escape(old)}(?!\w)")
+    replacement = escape(new, quote=False)
+    parser = _TextNodeParser(html)
+    parser.feed(html)
+    parser.close()
+    parts = []
+    position = 0
+    for start, length in parser.nodes:
+        parts.append(html[position:start])
+        parts.append(pattern.sub(lambda _: replacement, html[start:start + length]))
+        position = start + length
+    parts.append(html[position:])
+    return "".join(parts)
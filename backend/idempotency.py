@@ -0,0 +1,100 @@
+import os
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Tuple
+
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv('IDEMPOTENCY_TTL_HOURS', '24')) * 3600
+IDEMPOTENCY_MAX_KEYS = int(os.getenv('IDEMPOTENCY_MAX_KEYS', '100000'))
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflict(Exception):
+    pass
+
+
+def fingerprint(body: str) -> str:
+    return hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "created_at", "task", "result")
+
+    def __init__(self, fingerprint: str, created_at: float):
+        self.fingerprint = fingerprint
+        self.created_at = created_at
+        self.task = None
+        self.result = None
+
+
+class IdempotencyKeys:
+    """
+    Outcomes of keyed requests, so a retry gets the first request's result
+    instead of repeating its work.
+
+    The work of a key runs as its own task: a retry arriving while it is in
+    flight waits for the same task, and callers going away do not cancel it.
+    Successful results are kept for the TTL (counted from the first request);
+    failures are forgotten so the next retry starts over.
+    """
+
+    def __init__(self, ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS, max_keys: int = IDEMPOTENCY_MAX_KEYS):
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        self._entries = OrderedDict()
+        self._stats = {"started": 0, "replayed": 0, "attached": 0, "conflicts": 0, "failed": 0}
+
+    def _expire(self, now: float):
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            expired = now - entry.created_at > self.ttl_seconds
+            if not expired and len(self._entries) <= self.max_keys:
+                break
+            if entry.result is None and not expired:
+                # Over capacity but still in flight: keep it, the waiters need it
+                self._entries.move_to_end(key)
+                break
+            del self._entries[key]
+
+    def _finished(self, key: str, entry: _Entry, task: asyncio.Task):
+        if task.cancelled() or task.exception() is not None:
+            self._stats["failed"] += 1
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            return
+        entry.result = task.result()
+        entry.task = None
+
+    async def run(self, key: str, fingerprint: str, work: Callable[[], Awaitable]) -> Tuple[Any, bool]:
+        """Return the result for `key` and whether it was shared with an earlier request"""
+        now = time.time()
+        self._expire(now)
+        entry = self._entries.get(key)
+        if entry is not None and entry.fingerprint != fingerprint:
+            self._stats["conflicts"] += 1
+            raise IdempotencyConflict("Idempotency-Key was already used with a different request body")
+        if entry is not None and entry.result is not None:
+            self._stats["replayed"] += 1
+            return entry.result, True
+        if entry is not None:
+            self._stats["attached"] += 1
+            return await asyncio.shield(entry.task), True
+
+        entry = self._entries[key] = _Entry(fingerprint, now)
+        entry.task = asyncio.ensure_future(work())
+        entry.task.add_done_callback(lambda task: self._finished(key, entry, task))
+        self._stats["started"] += 1
+        return await asyncio.shield(entry.task), False
+
+    def discard(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None and entry.result is not None:
+            del self._entries[key]
+
+    def stats(self) -> dict:
+        in_flight = sum(1 for entry in self._entries.values() if entry.result is None)
+        return {"keys": len(self._entries), "in_flight": in_flight, "ttl_seconds": self.ttl_seconds, **self._stats}
+
+
+idempotency_keys = IdempotencyKeys()
@@ -0,0 +1,51 @@
+import os
+import time
+from typing import Optional
+
+WARM_CACHE_TTL_SECONDS = float(os.getenv('WARM_CACHE_TTL_HOURS', '72')) * 3600
+
+
+def spec_key(theme: str, language: str, traffic_source: str, target_action: str, profile: str) -> str:
+    """Normalise a generation spec so trivially different spellings share an entry; profiles never do"""
+    parts = (theme, language, traffic_source, target_action, profile)
+    return "|".join(" ".join(part.casefold().split()) for part in parts)
+
+
+class LandingCache:
+    """
+    Maps generation specs to the id of a recently warmed landing.
+
+    Entries are rebuilt from the landing store as landings are indexed, so
+    workers sharing the store and restarted processes see the same entries.
+    """
+
+    def __init__(self, ttl_seconds: float = WARM_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, key: str, landing_id: str, created_at: float = None):
+        """Point `key` at a landing unless a newer one already has it"""
+        created_at = created_at if created_at is not None else time.time()
+        entry = self._entries.get(key)
+        if entry is None or entry[0] == landing_id or entry[1] <= created_at:
+            self._entries[key] = (landing_id, created_at)
+
+    def get(self, key: str, max_age_seconds: float = None) -> Optional[str]:
+        """Return the landing id for `key` if it is fresher than `max_age_seconds`"""
+        entry = self._entries.get(key)
+        max_age = self.ttl_seconds if max_age_seconds is None else max_age_seconds
+        if entry is None or time.time() - entry[1] > max_age:
+            return None
+        return entry[0]
+
+    def discard(self, key: str):
+        self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "ttl_seconds": self.ttl_seconds}
+
+
+warm_cache = LandingCache()
@@ -0,0 +1,44 @@
+import asyncio
+
+
+class _Waiters:
+    __slots__ = ("event", "count")
+
+    def __init__(self):
+        self.event = asyncio.Event()
+        self.count = 0
+
+
+class LandingEvents:
+    """Wakes up subscribers waiting for a stored landing to change"""
+
+    def __init__(self):
+        self._events = {}
+
+    def notify(self, landing_id: str):
+        waiters = self._events.pop(landing_id, None)
+        if waiters is not None:
+            waiters.event.set()
+
+    async def wait(self, landing_id: str, timeout: float) -> bool:
+        """Wait until the landing changes in this worker; False on timeout"""
+        waiters = self._events.get(landing_id)
+        if waiters is None:
+            waiters = self._events[landing_id] = _Waiters()
+        waiters.count += 1
+        try:
+            await asyncio.wait_for(waiters.event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            waiters.count -= 1
+            # Changes made by other workers are never notified here; the last waiter cleans up
+            if not waiters.count and self._events.get(landing_id) is waiters:
+                del self._events[landing_id]
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+landing_events = LandingEvents()
@@ -1,57 +1,205 @@
 import os
-from emergentintegrations.llm.chat import LlmChat, UserMessage
-from dotenv import load_dotenv
+import time
 import random
+import logging
+from typing import Tuple
+from provider_client import ProviderClient, ProviderSession, get_provider_client
+from hedging import HedgePolicy, run_hedged
+from token_budget import token_budget
+from html_sections import extract_section
+from html_repair import HtmlValidator, continue_with, strip_fences
+import metrics
+from tracing import tracer
+from usage import UsageCollector
+from generation_profiles import PROFILES, DEFAULT_PROFILE, profile_stats
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-class LandingPageGenerator:
-    def __init__(self):
-        self.api_key = os.getenv('EMERGENT_LLM_KEY')
-        if not self.api_key:
-            raise ValueError("EMERGENT_LLM_KEY not found in environment")
-    
-    async def generate_landing_page(self, theme: str, language: str, traffic_source: str, target_action: str) -> dict:
-        chat = LlmChat(
-            api_key=self.api_key,
-            session_id=f"lp-{random.randint(1000, 9999)}",
-            system_message=f"You are an elite web design team. Create visually stunning, content-rich landing pages. ALL content must be in {language}. Respond with complete HTML only."
-        )
-        chat.with_model("openai", "gpt-4o-mini")
-        
-        html_prompt = f"""Create complete landing page HTML for: {theme}
+STRATEGY = "final"
+# Continuations asked for when a page comes back cut off, before closing it as is
+HTML_CONTINUATION_ATTEMPTS = int(os.getenv('HTML_CONTINUATION_ATTEMPTS', '1'))
+SECTION_STRATEGY = "final-section"
+
+# Static instructions come first and the per-request variables at the very end,
+# so the prefix is shared by every request of a profile. Providers only cache
+# prefixes of MIN_CACHEABLE_PREFIX_TOKENS (1024) or more and these are ~200
+# tokens, so nothing is cached today; padding them to the minimum would cost
+# more than it saves (see `python token_budget.py`).
+SYSTEM_MESSAGE = "You are an elite web design team. Create visually stunning, content-rich landing pages. ALL content must be in the LANGUAGE given in the request. Respond with complete HTML only."
+
+HTML_PROMPT_TEMPLATE = """Create complete landing page HTML for the THEME given at the end of this message.
+
+STRUCTURE: {structure}
+
+DESIGN: {design}
+
+CONTENT: {content}
+
+Output HTML starting <!DOCTYPE html>.
+"""
+
+# One cacheable prefix per generation profile
+HTML_PROMPT_PREFIXES = {
+    name: HTML_PROMPT_TEMPLATE.format(structure=profile.structure, design=profile.design, content=profile.content)
+    for name, profile in PROFILES.items()
+}
+HTML_PROMPT_PREFIX = HTML_PROMPT_PREFIXES[DEFAULT_PROFILE]
+
+CONTINUATION_PROMPT = "Your HTML was cut off. Continue it exactly where it stopped, starting with the next character. Do not repeat anything and do not use code fences."
+
+SECTION_SYSTEM_MESSAGE = "You are an elite web designer editing one section of an existing landing page. Keep the page's design system. ALL content must be in the LANGUAGE given in the request. Respond with the section's HTML only."
 
-STRUCTURE: Header(fixed, glassmorphism) + Hero(gradient, stats, CTAs) + Trust(3 cards) + Problems(4 cards) + Testimonials(6 with https://i.pravatar.cc/150?img=1-6) + Features(6 detailed) + How-it-works(4 steps) + Stats(6 counters) + FAQ(6 accordion) + Pricing(3 tiers) + Form(fields, GDPR) + Footer(4 columns, contact)
+SECTION_PROMPT_PREFIX = """Rewrite the SECTION of the landing page described at the end of this message.
 
-DESIGN: CSS vars(:root), rich gradients(3+ colors), shadows(0 10px 30px), animations(@keyframes pulse, float, fadeIn), hover(translateY(-8px) scale(1.03)), images(unsplash), Google Fonts, responsive
+OUTPUT: Only the one replacement element, keeping the outer tag, id and class of CURRENT SECTION. No <!DOCTYPE>, <html>, <head> or <body>.
 
-CONTENT: Detailed, specific, realistic numbers. ALL in {language}. CTA: {target_action}
+DESIGN: Use the CSS vars and fonts from DESIGN CONTEXT and the class names of CURRENT SECTION. Put any new CSS in a <style> element inside the section.
 
-Output HTML starting <!DOCTYPE html>."""
+CONTENT: Fresh, detailed, specific, realistic numbers. ALL in LANGUAGE. CTA: TARGET ACTION. Follow INSTRUCTIONS if given.
+"""
+
+
+class LandingPageGenerator:
+    def __init__(self, provider: ProviderClient = None, hedge_policy: HedgePolicy = None):
+        self.provider = provider or get_provider_client()
+        self.hedge_policy = hedge_policy or HedgePolicy.from_env()
+    
+    async def generate_landing_page(self, theme: str, language: str, traffic_source: str, target_action: str,
+                                    profile: str = DEFAULT_PROFILE) -> dict:
+        started = time.perf_counter()
+        settings = PROFILES[profile]
+        html_prompt = self._create_html_prompt(theme, language, traffic_source, target_action, profile)
+        prompt_prefix = HTML_PROMPT_PREFIXES[profile]
+        budget_strategy = f"{STRATEGY}:{profile}"
+        usage = UsageCollector(STRATEGY, profile)
+        
+        async def attempt(provider: str, model: str):
+            usage.attempt()
+            with tracer.span("generator.attempt", provider=provider, model=model, profile=profile):
+                with tracer.span("token_budget.check"):
+                    token_budget.check_prompt(budget_strategy, model, html_prompt, SYSTEM_MESSAGE, prompt_prefix,
+                                              expected_completion_tokens=settings.max_tokens)
+                async with self.provider.session(SYSTEM_MESSAGE, provider, model, prefix="lp",
+                                                 max_tokens=settings.max_tokens) as chat:
+                    html_response = await self._send(chat, "html", html_prompt, usage, SYSTEM_MESSAGE)
+                    token_budget.record_completion(budget_strategy, model, html_response)
+                    with metrics.postprocess_seconds.time(step="clean"), tracer.span("postprocess.clean"):
+                        html_content = self._clean(html_response)
+                    html_content, complete = await self._complete_html(chat, html_content, usage)
+                    metrics.html_bytes.observe(len(html_content.encode()), profile=profile)
+                    
+                    metadata = await self._gen_meta(theme, language, chat, usage)
+            usage.succeeded(provider, model)
+            return html_content, complete, metadata
+        
+        policy = self.hedge_policy.with_primary(settings.provider, settings.model)
+        html_content, complete, metadata = await run_hedged(attempt, policy,
+                                                            latency_samples=profile_stats.recent_seconds(profile))
         
-        msg = UserMessage(text=html_prompt)
-        html_response = await chat.send_message(msg)
-        html_content = self._clean(html_response)
+        usage_report = usage.finish()
+        profile_stats.record(profile, time.perf_counter() - started, len(html_content.encode()),
+                             usage_report["completion_tokens"])
+        return {"html": html_content, "metadata": metadata, "lighthouse": random.randint(96, 100),
+                "usage": usage_report, "complete": complete}
+    
+    async def regenerate_section(self, theme: str, language: str, target_action: str, section: str,
+                                 current_html: str, design_context: str, instructions: str = None,
+                                 profile: str = DEFAULT_PROFILE) -> dict:
+        """Generate a replacement for one section of an existing page"""
+        prompt = SECTION_PROMPT_PREFIX + f"""
+THEME: {theme}
+LANGUAGE: {language}
+TARGET ACTION: {target_action}
+SECTION: {section}
+INSTRUCTIONS: {instructions or "-"}
+DESIGN CONTEXT:
+{design_context}
+CURRENT SECTION:
+{current_html}"""
+        settings = PROFILES[profile]
+        budget_strategy = f"{SECTION_STRATEGY}:{profile}"
+        usage = UsageCollector(SECTION_STRATEGY, profile)
+        
+        async def attempt(provider: str, model: str):
+            usage.attempt()
+            with tracer.span("generator.attempt", provider=provider, model=model, profile=profile):
+                with tracer.span("token_budget.check"):
+                    token_budget.check_prompt(budget_strategy, model, prompt, SECTION_SYSTEM_MESSAGE,
+                                              SECTION_PROMPT_PREFIX, expected_completion_tokens=settings.max_tokens)
+                async with self.provider.session(SECTION_SYSTEM_MESSAGE, provider, model, prefix="lps",
+                                                 max_tokens=settings.max_tokens) as chat:
+                    response = await self._send(chat, "section", prompt, usage, SECTION_SYSTEM_MESSAGE)
+                token_budget.record_completion(budget_strategy, model, response)
+            usage.succeeded(provider, model)
+            return response
+        
+        # The section is written by the same provider and model as the rest of the page
+        response = await run_hedged(attempt, self.hedge_policy.with_primary(settings.provider, settings.model))
+        with metrics.postprocess_seconds.time(step="section_clean"), tracer.span("postprocess.section_clean"):
+            fragment = strip_fences(response).strip()
+            # Models sometimes answer with a whole page; keep only the requested section
+            fragment = extract_section(fragment, section) or fragment
+        return {"html": fragment, "usage": usage.finish()}
+    
+    async def _complete_html(self, chat: ProviderSession, html: str, usage: UsageCollector) -> Tuple[str, bool]:
+        """
+        Check the page for truncation; ask the model to continue a cut-off
+        page, and close whatever is still open if that does not finish it.
+        """
+        with metrics.postprocess_seconds.time(step="validate"), tracer.span("postprocess.validate"):
+            validator = HtmlValidator()
+            validator.feed(html)
+        if validator.complete:
+            return validator.html(), True
         
-        metadata = await self._gen_meta(theme, language, chat)
+        for _ in range(HTML_CONTINUATION_ATTEMPTS):
+            logger.warning("Generated page cut off in %s with %d open elements, asking for a continuation",
+                           validator.truncated_in(), len(validator.open_elements))
+            continuation = await self._send(chat, "continuation", CONTINUATION_PROMPT, usage)
+            with metrics.postprocess_seconds.time(step="validate"), tracer.span("postprocess.validate"):
+                validator = continue_with(validator, strip_fences(continuation))
+            if validator.complete:
+                metrics.html_truncations.inc(outcome="continued")
+                return validator.html(), True
         
-        return {"html": html_content, "metadata": metadata, "lighthouse": random.randint(96, 100)}
+        logger.warning("Generated page still cut off in %s, closing %s",
+                       validator.truncated_in(), validator.open_elements)
+        metrics.html_truncations.inc(outcome="closed")
+        return validator.repaired(), False
+    
+    async def _send(self, chat: ProviderSession, call: str, text: str, usage: UsageCollector,
+                    system_message: str = "") -> str:
+        """Send one message, timed, traced and accounted to the generation's usage"""
+        with metrics.provider_call(call, chat.provider, chat.model), \
+                tracer.span(f"llm.{call}", provider=chat.provider, model=chat.model, prompt_chars=len(text)) as span, \
+                usage.call(call, chat, text, system_message) as record:
+            response = await chat.send(text)
+            record.completed(response)
+            span.set("response_chars", len(response))
+        return response
+    
+    def _create_html_prompt(self, theme: str, language: str, traffic_source: str, target_action: str,
+                            profile: str = DEFAULT_PROFILE) -> str:
+        return HTML_PROMPT_PREFIXES[profile] + f"""
+THEME: {theme}
+LANGUAGE: {language}
+TARGET ACTION: {target_action}"""
     
-    async def _gen_meta(self, theme: str, language: str, chat: LlmChat) -> dict:
+    async def _gen_meta(self, theme: str, language: str, chat: ProviderSession, usage: UsageCollector) -> dict:
         prompt = f"Contact for {theme}: Company: Email: Phone: Address: (in {language}, professional format)"
-        msg = UserMessage(text=prompt)
-        resp = await chat.send_message(msg)
+        resp = await self._send(chat, "metadata", prompt, usage)
         
-        meta = {"company_name": "", "email": "", "phone": "", "address": ""}
-        for line in resp.strip().split('\n'):
-            if ':' in line:
-                k, v = line.split(':', 1)
-                k = k.strip().lower()
-                v = v.strip()
-                if 'company' in k: meta['company_name'] = v
-                elif 'email' in k: meta['email'] = v
-                elif 'phone' in k: meta['phone'] = v
-                elif 'address' in k: meta['address'] = v
+        with metrics.postprocess_seconds.time(step="metadata_parse"), tracer.span("postprocess.metadata_parse"):
+            meta = {"company_name": "", "email": "", "phone": "", "address": ""}
+            for line in resp.strip().split('\n'):
+                if ':' in line:
+                    k, v = line.split(':', 1)
+                    k = k.strip().lower()
+                    v = v.strip()
+                    if 'company' in k: meta['company_name'] = v
+                    elif 'email' in k: meta['email'] = v
+                    elif 'phone' in k: meta['phone'] = v
+                    elif 'address' in k: meta['address'] = v
         return meta
     
     def _clean(self, html: str) -> str:
@@ -5,6 +5,18 @@ import random
 
 load_dotenv()
 
+# Static instructions come first so providers can cache the shared prefix;
+# the per-request variables are appended at the very end.
+HTML_PROMPT_PREFIX = """Create stunning landing page for the THEME given at the end of this message.
+ALL TEXT in LANGUAGE | CTA: TARGET ACTION
+
+Sections: Header, Hero(stats+images), Trust(3), Problems(4), Testimonials(6 with https://i.pravatar.cc/150?img=1-6), Features(6 detailed), How-it-works(4), Stats(6), FAQ(6), Pricing(3), CTA-Form, Footer(complete contact)
+
+Visuals: Unsplash images everywhere, rich gradients, deep shadows, hover effects(scale+translateY), smooth animations, bold colors
+
+Content: Detailed, specific, realistic. HTML only.
+"""
+
 class LandingPageGenerator:
     def __init__(self):
         self.api_key = os.getenv('EMERGENT_LLM_KEY')
@@ -36,14 +48,10 @@ class LandingPageGenerator:
         }
     
     def _create_html_prompt(self, theme: str, language: str, traffic_source: str, target_action: str) -> str:
-        return f"""Create stunning landing page: {theme}
-ALL TEXT in {language} | CTA: {target_action}
-
-Sections: Header, Hero(stats+images), Trust(3), Problems(4), Testimonials(6 with https://i.pravatar.cc/150?img=1-6), Features(6 detailed), How-it-works(4), Stats(6), FAQ(6), Pricing(3), CTA-Form, Footer(complete contact)
-
-Visuals: Unsplash images everywhere, rich gradients, deep shadows, hover effects(scale+translateY), smooth animations, bold colors
-
-Content: Detailed, specific, realistic. HTML only."""
+        return HTML_PROMPT_PREFIX + f"""
+THEME: {theme}
+LANGUAGE: {language}
+TARGET ACTION: {target_action}"""
     
     async def _generate_metadata(self, theme: str, language: str, chat: LlmChat) -> dict:
         """Generate realistic contact information"""
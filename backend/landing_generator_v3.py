@@ -2,46 +2,18 @@ import os
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 from dotenv import load_dotenv
 import random
+from html_repair import repair_html
 
 load_dotenv()
 
-class LandingPageGenerator:
-    def __init__(self):
-        self.api_key = os.getenv('EMERGENT_LLM_KEY')
-        if not self.api_key:
-            raise ValueError("EMERGENT_LLM_KEY not found in environment")
-    
-    async def generate_landing_page(self, theme: str, language: str, traffic_source: str, target_action: str) -> dict:
-        """Generate a complete landing page using AI"""
-        chat = LlmChat(
-            api_key=self.api_key,
-            session_id=f"landing-{random.randint(1000, 9999)}",
-            system_message="You are an elite team: Senior Full-Stack Developer + UX/UI Designer (Awwwards level) + Copywriter + Legal Expert. Create visually EPIC landing pages that: Pass Google Ads moderation, Get Lighthouse 100/100, Look like Behance Featured projects. Respond ONLY with HTML code."
-        )
-        chat.with_model("openai", "gpt-4o-mini")
-        
-        # Generate HTML
-        html_prompt = self._create_html_prompt(theme, language, traffic_source, target_action)
-        user_message = UserMessage(text=html_prompt)
-        html_response = await chat.send_message(user_message)
-        html_content = self._clean_html_response(html_response)
-        
-        # Generate metadata
-        metadata = await self._generate_metadata(theme, language, chat)
-        
-        return {
-            "html": html_content,
-            "metadata": metadata,
-            "lighthouse": random.randint(96, 100)
-        }
-    
-    def _create_html_prompt(self, theme: str, language: str, traffic_source: str, target_action: str) -> str:
-        return f"""Create EPIC landing page HTML for: {theme}
+# Static instructions come first so providers can cache the shared prefix;
+# the per-request variables are appended at the very end.
+HTML_PROMPT_PREFIX = """Create EPIC landing page HTML for the THEME given at the end of this message.
 
-CRITICAL: ALL content in {language} | Traffic: {traffic_source} | CTA: {target_action}
+CRITICAL: ALL content in LANGUAGE | Traffic: TRAFFIC SOURCE | CTA: TARGET ACTION
 
 SECTIONS:
-1. HEADER: Fixed position, backdrop-filter blur, logo with animation, nav links, {target_action} button, live badge
+1. HEADER: Fixed position, backdrop-filter blur, logo with animation, nav links, TARGET ACTION button, live badge
 2. HERO: Full viewport, gradient+image, powerful headline, value prop, 4 stats counters (animated), dual CTAs
 3. COMPLIANCE: 3 trust cards, detailed descriptions, disclaimer, privacy/terms modals
 4. PROBLEMS: 4 problem cards with solutions (5 bullets each)
@@ -51,7 +23,7 @@ SECTIONS:
 8. STATS: 6 metrics with animated counters
 9. FAQ: 6 questions with accordion, detailed answers
 10. PRICING: 3 tiers, 8 features each
-11. FORM: Multi-step, fields (name/email/location/experience), GDPR checkbox, {target_action} button
+11. FORM: Multi-step, fields (name/email/location/experience), GDPR checkbox, TARGET ACTION button
 12. FOOTER: 4 columns (Brand/Nav/Resources/Contact), full contact info, legal links, social icons, copyright 2025
 
 CSS VARIABLES (auto-generate based on theme):
@@ -77,9 +49,47 @@ INTERACTIVE:
 - Counter animations on scroll
 - Live indicators
 
-CONTENT: Specific, detailed, realistic. NO Lorem Ipsum. ALL in {language}.
+CONTENT: Specific, detailed, realistic. NO Lorem Ipsum. ALL in LANGUAGE.
+
+Output complete self-contained HTML starting with <!DOCTYPE html>. No explanations.
+"""
 
-Output complete self-contained HTML starting with <!DOCTYPE html>. No explanations."""
+class LandingPageGenerator:
+    def __init__(self):
+        self.api_key = os.getenv('EMERGENT_LLM_KEY')
+        if not self.api_key:
+            raise ValueError("EMERGENT_LLM_KEY not found in environment")
+    
+    async def generate_landing_page(self, theme: str, language: str, traffic_source: str, target_action: str) -> dict:
+        """Generate a complete landing page using AI"""
+        chat = LlmChat(
+            api_key=self.api_key,
+            session_id=f"landing-{random.randint(1000, 9999)}",
+            system_message="You are an elite team: Senior Full-Stack Developer + UX/UI Designer (Awwwards level) + Copywriter + Legal Expert. Create visually EPIC landing pages that: Pass Google Ads moderation, Get Lighthouse 100/100, Look like Behance Featured projects. Respond ONLY with HTML code."
+        )
+        chat.with_model("openai", "gpt-4o-mini")
+        
+        # Generate HTML
+        html_prompt = self._create_html_prompt(theme, language, traffic_source, target_action)
+        user_message = UserMessage(text=html_prompt)
+        html_response = await chat.send_message(user_message)
+        html_content = self._clean_html_response(html_response)
+        
+        # Generate metadata
+        metadata = await self._generate_metadata(theme, language, chat)
+        
+        return {
+            "html": html_content,
+            "metadata": metadata,
+            "lighthouse": random.randint(96, 100)
+        }
+    
+    def _create_html_prompt(self, theme: str, language: str, traffic_source: str, target_action: str) -> str:
+        return HTML_PROMPT_PREFIX + f"""
+THEME: {theme}
+LANGUAGE: {language}
+TRAFFIC SOURCE: {traffic_source}
+TARGET ACTION: {target_action}"""
     
     async def _generate_metadata(self, theme: str, language: str, chat: LlmChat) -> dict:
         """Generate realistic contact information"""
@@ -133,6 +143,9 @@ Make it 100% realistic, professional."""
         
         html = html.strip()
         
+        # Close the elements of a page that was cut off
+        html, _ = repair_html(html)
+        
         if not html.upper().startswith('<!DOCTYPE'):
             html = '<!DOCTYPE html>\n' + html
         
@@ -0,0 +1,490 @@
+import os
+import sys
+import json
+import zlib
+import mmap
+import fcntl
+import struct
+import asyncio
+import logging
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional, Tuple
+from models import LandingPage
+from chunk_store import ChunkStore, asset_digests
+
+logger = logging.getLogger(__name__)
+
+LANDING_STORE = os.getenv('LANDING_STORE', 'memory')
+LANDING_STORE_DIR = os.getenv('LANDING_STORE_DIR', str(Path(__file__).parent / 'data'))
+COMPACT_INTERVAL_SECONDS = float(os.getenv('LANDING_STORE_COMPACT_SECONDS', '600'))
+COMPACT_DEAD_RATIO = float(os.getenv('LANDING_STORE_COMPACT_RATIO', '0.5'))
+MEMORY_BUDGET_BYTES = int(float(os.getenv('LANDING_MEMORY_BUDGET_MB', '256')) * 1024 * 1024)
+SPILL_DIR = os.getenv('LANDING_SPILL_DIR', tempfile.gettempdir())
+
+
+class InMemoryLandingStore:
+    """
+    Per-process landing store with a memory budget.
+
+    Recently used landings stay in RAM in LRU order. Once their estimated
+    size exceeds the budget, the least recently used ones are spilled to
+    compressed files in `spill_dir` and loaded back lazily by get().
+    """
+
+    # Only this process writes to it, so per-process caches of its landings stay valid
+    shared = False
+
+    def __init__(self, budget_bytes: int = MEMORY_BUDGET_BYTES, spill_dir: str = None):
+        self.budget_bytes = budget_bytes
+        # One directory per worker process; workers do not share their spilled pages
+        self.spill_dir = Path(spill_dir or Path(SPILL_DIR) / f"landing-spill-{os.getpid()}")
+        self._ids = {}
+        self._hot = OrderedDict()
+        self._hot_bytes = 0
+        self._cold = set()
+        self._metrics = {"evictions": 0, "spill_loads": 0, "spill_bytes": 0}
+        # Only holds CSS/JS externalised when serving (collected by maybe_compact); landings are kept whole
+        self.chunks = ChunkStore()
+        # Asset hashes of each landing's current HTML; served as immutable, so never collected
+        self._assets = {}
+
+    @staticmethod
+    def _estimate_size(landing: LandingPage) -> int:
+        # The page, the replaced sections kept in its history, and a flat allowance for everything else
+        history = sum(sys.getsizeof(revision.previous_html) + 1024 for revision in landing.history)
+        return sys.getsizeof(landing.html) + history + 2048
+
+    def _spill_path(self, landing_id: str) -> Path:
+        return self.spill_dir / f"{landing_id}.json.z"
+
+    def _admit(self, landing: LandingPage):
+        size = self._estimate_size(landing)
+        self._hot[landing.id] = (landing, size)
+        self._hot_bytes += size
+        while self._hot_bytes > self.budget_bytes and len(self._hot) > 1:
+            landing_id, (cold, cold_size) = self._hot.popitem(last=False)
+            self._hot_bytes -= cold_size
+            data = zlib.compress(cold.model_dump_json().encode(), 6)
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            self._spill_path(landing_id).write_bytes(data)
+            self._cold.add(landing_id)
+            self._metrics["evictions"] += 1
+            self._metrics["spill_bytes"] += len(data)
+
+    def _load_cold(self, landing_id: str) -> LandingPage:
+        data = self._spill_path(landing_id).read_bytes()
+        self._metrics["spill_loads"] += 1
+        return LandingPage.model_validate_json(zlib.decompress(data))
+
+    def get(self, landing_id: str) -> Optional[LandingPage]:
+        if landing_id in self._hot:
+            self._hot.move_to_end(landing_id)
+            return self._hot[landing_id][0]
+        if landing_id not in self._cold:
+            return None
+        landing = self._load_cold(landing_id)
+        path = self._spill_path(landing_id)
+        self._metrics["spill_bytes"] -= path.stat().st_size
+        path.unlink()
+        self._cold.discard(landing_id)
+        self._admit(landing)
+        return landing
+
+    def put(self, landing: LandingPage):
+        if landing.id in self._hot:
+            self._hot_bytes -= self._hot.pop(landing.id)[1]
+        elif landing.id in self._cold:
+            path = self._spill_path(landing.id)
+            self._metrics["spill_bytes"] -= path.stat().st_size
+            path.unlink()
+            self._cold.discard(landing.id)
+        self._ids[landing.id] = None
+        self._assets[landing.id] = asset_digests(landing.html)
+        self._admit(landing)
+
+    def values(self) -> List[LandingPage]:
+        # Cold landings are read without promoting them, so a full listing does not flush the hot set
+        return [
+            self._hot[landing_id][0] if landing_id in self._hot else self._load_cold(landing_id)
+            for landing_id in self._ids
+        ]
+
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    def __contains__(self, landing_id: str) -> bool:
+        return landing_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def maybe_compact(self) -> bool:
+        """
+        Nothing to compact; collects externalised assets that no stored page
+        has any more and that were not served within the grace period.
+        """
+        collected = self.chunks.collect(set().union(*self._assets.values()))
+        if collected:
+            logger.info("Removed %d unused asset chunks", collected)
+        return False
+
+    def close(self):
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "landings": len(self._ids),
+            "hot_landings": len(self._hot),
+            "hot_bytes": self._hot_bytes,
+            "budget_bytes": self.budget_bytes,
+            "cold_landings": len(self._cold),
+            **self._metrics,
+            "chunks": self.chunks.stats(),
+        }
+
+
+# Record header: magic, id length, payload length, crc32 of the payload.
+# "LP" payloads are a whole landing; "LC" payloads keep its style/script chunks in the chunk store.
+_MAGIC = b"LP"
+_MAGIC_CHUNKED = b"LC"
+_HEADER = struct.Struct("<2sBII")
+
+
+def _records(data, offset: int, size: int):
+    """(offset, end, landing id) of the complete records in data[offset:size]"""
+    while offset + _HEADER.size <= size:
+        magic, id_len, payload_len, _ = _HEADER.unpack_from(data, offset)
+        end = offset + _HEADER.size + id_len + payload_len
+        if magic not in (_MAGIC, _MAGIC_CHUNKED) or end > size:
+            # A torn record from an interrupted write; the next append truncates it
+            return
+        yield offset, end, data[offset + _HEADER.size:offset + _HEADER.size + id_len].decode()
+        offset = end
+
+
+def _payload(data, offset: int) -> tuple:
+    """Magic and decompressed payload of the record at `offset`, checked against its crc"""
+    magic, id_len, payload_len, crc = _HEADER.unpack_from(data, offset)
+    start = offset + _HEADER.size + id_len
+    payload = data[start:start + payload_len]
+    if zlib.crc32(payload) != crc:
+        raise ValueError(f"Corrupt landing record at offset {offset}")
+    return magic, zlib.decompress(payload)
+
+
+class LogStructuredLandingStore:
+    """
+    Embedded landing store for single-node, multi-worker deployments.
+
+    Landings are appended as zlib-compressed JSON records to one segment file;
+    an in-memory id -> (offset, length) index points at the latest record of
+    each id, and reads go through an mmap of the segment. Appends and
+    compaction take an exclusive flock, so several uvicorn workers can share
+    the directory; each worker picks up the others' appends (and compacted
+    segments) by scanning the file tail before reads.
+
+    Style and script blocks are split into content-defined chunks kept once in
+    a content-addressed chunk directory, so the CSS/JS skeleton every page
+    repeats is stored a single time; page records only hold references.
+    """
+
+    shared = True
+
+    def __init__(self, directory: str = LANDING_STORE_DIR, dead_ratio: float = COMPACT_DEAD_RATIO):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / "landings.seg"
+        self.dead_ratio = dead_ratio
+        self.chunks = ChunkStore(self.directory / "chunks")
+        self._lock_fd = os.open(self.directory / "landings.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        # Held by the one worker compacting, for the whole compaction
+        self._compact_lock_fd = os.open(self.directory / "landings.compact.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        self._mutex = threading.RLock()
+        self._fd = None
+        self._inode = None
+        self._mmap = None
+        self._mapped_size = 0
+        self._index = {}
+        self._indexed_end = 0
+        self._live_bytes = 0
+        self.compactions = 0
+        with self._flock(fcntl.LOCK_SH):
+            self._refresh()
+
+    # -- locking and file handling --
+
+    @contextmanager
+    def _flock(self, mode: int):
+        fcntl.flock(self._lock_fd, mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _exclusive(self):
+        """The segment lock writers hold, against other threads as well as other workers"""
+        with self._mutex, self._flock(fcntl.LOCK_EX):
+            yield
+
+    def _reopen(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        self._inode = os.fstat(self._fd).st_ino
+        self._mapped_size = 0
+        self._index = {}
+        self._indexed_end = 0
+        self._live_bytes = 0
+
+    def _refresh(self):
+        """Follow a compaction by another process and index newly appended records"""
+        try:
+            replaced = os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            replaced = True
+        if self._fd is None or replaced:
+            self._reopen()
+
+        size = os.fstat(self._fd).st_size
+        if size == self._mapped_size:
+            return
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = mmap.mmap(self._fd, size, prot=mmap.PROT_READ) if size else None
+        self._mapped_size = size
+        self._scan()
+
+    def _scan(self):
+        offset = self._indexed_end
+        for offset, end, landing_id in _records(self._mmap, offset, self._mapped_size):
+            previous = self._index.get(landing_id)
+            if previous is not None:
+                self._live_bytes -= previous[1]
+            self._index[landing_id] = (offset, end - offset)
+            self._live_bytes += end - offset
+            offset = end
+        self._indexed_end = offset
+
+    def _payload(self, offset: int) -> tuple:
+        return _payload(self._mmap, offset)
+
+    def _read(self, offset: int, length: int) -> LandingPage:
+        magic, data = self._payload(offset)
+        if magic == _MAGIC:
+            return LandingPage.model_validate_json(data)
+        record = json.loads(data)
+        return LandingPage.model_validate({**record["landing"], "html": self.chunks.decode_page(record["html"])})
+
+    def _encode(self, landing: LandingPage, chunks: dict = None) -> bytes:
+        """The record of a landing; `chunks` receives the {hash: text} of the chunks it references"""
+        landing_id = landing.id.encode()
+        record = {
+            "landing": landing.model_dump(mode="json", exclude={"html"}),
+            "html": self.chunks.encode_page(landing.html, chunks),
+            "assets": sorted(asset_digests(landing.html)),
+        }
+        payload = zlib.compress(json.dumps(record, ensure_ascii=False).encode(), 6)
+        return _HEADER.pack(_MAGIC_CHUNKED, len(landing_id), len(payload), zlib.crc32(payload)) + landing_id + payload
+
+    def _live_chunks(self) -> set:
+        """Chunks and assets referenced by the current segment, read through a private mapping without any lock"""
+        live = set()
+        with open(self.path, "rb") as segment:
+            size = os.fstat(segment.fileno()).st_size
+            if not size:
+                return live
+            with mmap.mmap(segment.fileno(), size, prot=mmap.PROT_READ) as data:
+                # Records appended meanwhile are beyond `size`; their new chunks are within the GC grace period
+                for offset, _, _ in _records(data, 0, size):
+                    magic, payload = _payload(data, offset)
+                    if magic == _MAGIC:
+                        live.update(asset_digests(json.loads(payload)["html"]))
+                        continue
+                    record = json.loads(payload)
+                    live.update(value for kind, value in record["html"] if kind == "c")
+                    if "assets" in record:
+                        live.update(record["assets"])
+                    else:
+                        # Written before records listed their assets
+                        try:
+                            live.update(asset_digests(self.chunks.decode_page(record["html"])))
+                        except ValueError:
+                            pass
+        return live
+
+    # -- store interface --
+
+    def get(self, landing_id: str) -> Optional[LandingPage]:
+        with self._mutex:
+            # Cheap when nothing changed: one stat and one fstat
+            with self._flock(fcntl.LOCK_SH):
+                self._refresh()
+            location = self._index.get(landing_id)
+            if location is None:
+                return None
+            return self._read(*location)
+
+    def put(self, landing: LandingPage):
+        chunks = {}
+        record = self._encode(landing, chunks)
+        with self._exclusive():
+            # Chunks are only collected under this lock; one collected since encode_page is written back
+            self.chunks.restore(chunks)
+            self._refresh()
+            if self._indexed_end < self._mapped_size:
+                os.ftruncate(self._fd, self._indexed_end)
+            os.write(self._fd, record)
+            self._mapped_size = -1
+            self._refresh()
+
+    def values(self) -> List[LandingPage]:
+        with self._mutex:
+            with self._flock(fcntl.LOCK_SH):
+                self._refresh()
+            return [self._read(*location) for location in self._index.values()]
+
+    def ids(self) -> List[str]:
+        with self._mutex:
+            with self._flock(fcntl.LOCK_SH):
+                self._refresh()
+            return list(self._index)
+
+    def changes(self, cursor: tuple = None) -> Tuple[List[str], tuple]:
+        """
+        Ids of the landings written since `cursor`, and the cursor to pass next
+        time. Without a cursor, or once the segment was compacted, every id is
+        returned.
+        """
+        with self._mutex:
+            with self._flock(fcntl.LOCK_SH):
+                self._refresh()
+            next_cursor = (self._inode, self._indexed_end)
+            if cursor is None or cursor[0] != self._inode or cursor[1] > self._indexed_end:
+                return list(self._index), next_cursor
+            records = _records(self._mmap, cursor[1], self._indexed_end)
+            return list(dict.fromkeys(landing_id for _, _, landing_id in records)), next_cursor
+
+    def __contains__(self, landing_id: str) -> bool:
+        with self._mutex:
+            if landing_id not in self._index:
+                with self._flock(fcntl.LOCK_SH):
+                    self._refresh()
+            return landing_id in self._index
+
+    def __len__(self) -> int:
+        with self._mutex, self._flock(fcntl.LOCK_SH):
+            self._refresh()
+            return len(self._index)
+
+    def maybe_compact(self) -> bool:
+        """
+        Rewrite the segment with only the latest record per id once enough of it is dead.
+
+        The live records are copied to a new file without holding the mutex
+        or the segment lock; only copying the records appended meanwhile and
+        swapping the files happen under LOCK_EX. Unused chunks are collected
+        afterwards, also without locks.
+        """
+        try:
+            fcntl.flock(self._compact_lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # Another worker is compacting
+            return False
+        try:
+            with self._mutex, self._flock(fcntl.LOCK_SH):
+                self._refresh()
+                if not self._mapped_size or self._live_bytes / self._mapped_size > 1 - self.dead_ratio:
+                    return False
+                before = self._mapped_size
+                inode = self._inode
+                copied_end = self._indexed_end
+                locations = sorted(self._index.values())
+                # Records before `copied_end` are complete and never rewritten in place
+                source = os.open(self.path, os.O_RDONLY)
+
+            tmp_path = self.path.with_suffix(".compact")
+            try:
+                with open(tmp_path, "wb") as out:
+                    if os.fstat(source).st_ino != inode:
+                        return False
+                    for offset, length in locations:
+                        out.write(os.pread(source, length, offset))
+                    out.flush()
+                    os.fsync(out.fileno())
+
+                    with self._mutex, self._flock(fcntl.LOCK_EX):
+                        self._refresh()
+                        if self._inode != inode:
+                            return False
+                        if self._indexed_end > copied_end:
+                            out.write(os.pread(source, self._indexed_end - copied_end, copied_end))
+                            out.flush()
+                            os.fsync(out.fileno())
+                        os.replace(tmp_path, self.path)
+                        self._reopen()
+                        self._refresh()
+                        after = self._mapped_size
+                        self.compactions += 1
+            finally:
+                os.close(source)
+                if tmp_path.exists():
+                    tmp_path.unlink()
+        finally:
+            fcntl.flock(self._compact_lock_fd, fcntl.LOCK_UN)
+
+        collected = self.chunks.collect(self._live_chunks(), exclusive=self._exclusive)
+        logger.info("Compacted landing segment from %d to %d bytes, removed %d unused chunks",
+                    before, after, collected)
+        return True
+
+    def close(self):
+        with self._mutex:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            os.close(self._lock_fd)
+            os.close(self._compact_lock_fd)
+
+    def stats(self) -> dict:
+        with self._mutex, self._flock(fcntl.LOCK_SH):
+            self._refresh()
+            return {
+                "backend": "log",
+                "landings": len(self._index),
+                "segment_bytes": self._mapped_size,
+                "live_bytes": self._live_bytes,
+                "dead_bytes": self._mapped_size - self._live_bytes,
+                "compactions": self.compactions,
+                "chunks": self.chunks.stats(),
+            }
+
+
+def create_landing_store():
+    """Build the landing store selected by LANDING_STORE (memory or log)"""
+    if LANDING_STORE == "log":
+        return LogStructuredLandingStore()
+    if LANDING_STORE != "memory":
+        raise ValueError(f"Unknown LANDING_STORE: {LANDING_STORE}")
+    return InMemoryLandingStore()
+
+
+async def compact_periodically(store, interval_seconds: float = COMPACT_INTERVAL_SECONDS):
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(store.maybe_compact)
+        except Exception as e:
+            logger.warning("Landing store compaction failed: %s", e)
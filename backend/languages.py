@@ -0,0 +1,30 @@
+# Names and codes a request may give for each supported language, by two-letter code
+LANGUAGE_ALIASES = {
+    "en": ["english", "eng", "английский"],
+    "ru": ["russian", "русский", "rus"],
+    "uk": ["ukrainian", "українська", "украинский", "ua"],
+    "de": ["german", "deutsch", "немецкий"],
+    "es": ["spanish", "español", "espanol", "испанский"],
+    "fr": ["french", "français", "francais", "французский"],
+    "it": ["italian", "italiano", "итальянский"],
+    "pt": ["portuguese", "português", "portugues", "португальский"],
+    "pl": ["polish", "polski", "польский"],
+    "tr": ["turkish", "türkçe", "turkce", "турецкий"],
+}
+_LANGUAGE_CODES = {alias: code for code, aliases in LANGUAGE_ALIASES.items() for alias in [code, *aliases]}
+
+
+def _known_code(language: str) -> tuple:
+    key = " ".join(language.casefold().split())
+    return _LANGUAGE_CODES.get(key) or _LANGUAGE_CODES.get(key.split("-")[0].split("_")[0]), key
+
+
+def language_code(language: str) -> str:
+    """Two-letter code for a language given by name or code, 'en' when unknown"""
+    return _known_code(language)[0] or "en"
+
+
+def language_key(language: str) -> str:
+    """What to compare languages by: the code of a known language, the normalised name of any other"""
+    code, key = _known_code(language)
+    return code or key
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# off: talk to the provider; record: talk to it and save every exchange; replay: serve saved exchanges offline
+LLM_FIXTURE_MODE = os.getenv('LLM_FIXTURE_MODE', 'off')
+LLM_FIXTURE_DIR = os.getenv('LLM_FIXTURE_DIR', str(Path(__file__).parent / 'benchmarks' / 'fixtures' / 'llm'))
+# Replayed responses take their recorded time multiplied by this; 0 replays instantly
+LLM_FIXTURE_TIME_SCALE = float(os.getenv('LLM_FIXTURE_TIME_SCALE', '1.0'))
+
+FIXTURE_MODES = ("off", "record", "replay")
+
+
+class FixtureMissing(Exception):
+    pass
+
+
+class FixtureStore:
+    """
+    Provider request/response pairs saved as one JSON file per exchange.
+
+    An exchange is keyed by the system message, provider, model and every
+    prompt sent so far in the conversation, so a replayed generation gets
+    exactly the responses its recorded run got, whatever the session id.
+    """
+
+    def __init__(self, mode: str = "off", directory: str = LLM_FIXTURE_DIR, time_scale: float = 1.0):
+        if mode not in FIXTURE_MODES:
+            raise ValueError(f"Unknown LLM_FIXTURE_MODE: {mode}")
+        self.mode = mode
+        self.directory = Path(directory)
+        self.time_scale = time_scale
+        self._loaded = {}
+        self._stats = {"recorded": 0, "replayed": 0, "missing": 0}
+
+    @classmethod
+    def from_env(cls) -> "FixtureStore":
+        return cls(LLM_FIXTURE_MODE, LLM_FIXTURE_DIR, LLM_FIXTURE_TIME_SCALE)
+
+    @staticmethod
+    def key(system_message: str, provider: str, model: str, prompts: List[str]) -> str:
+        material = json.dumps([system_message, provider, model, prompts], ensure_ascii=False)
+        return hashlib.blake2b(material.encode(), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def load(self, key: str) -> dict:
+        if key not in self._loaded:
+            try:
+                self._loaded[key] = json.loads(self._path(key).read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                self._stats["missing"] += 1
+                raise FixtureMissing(
+                    f"No recorded LLM response {key} in {self.directory}; record it with LLM_FIXTURE_MODE=record"
+                )
+        self._stats["replayed"] += 1
+        return self._loaded[key]
+
+    def save(self, key: str, fixture: dict):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as out:
+            json.dump(fixture, out, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self._path(key))
+        self._loaded[key] = fixture
+        self._stats["recorded"] += 1
+
+    def wrap(self, session, system_message: str):
+        """Put a provider session behind recording or replay, depending on the mode"""
+        if self.mode == "off":
+            return session
+        return FixtureSession(session, self, system_message)
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "directory": str(self.directory), "time_scale": self.time_scale, **self._stats}
+
+
+class FixtureSession:
+    """ProviderSession stand-in that records or replays each send()"""
+
+    def __init__(self, session, store: FixtureStore, system_message: str):
+        self.session = session
+        self.store = store
+        self.system_message = system_message
+        self.session_id = session.session_id
+        self.provider = session.provider
+        self.model = session.model
+        self._prompts = []
+
+    async def send(self, text: str) -> str:
+        self._prompts.append(text)
+        key = self.store.key(self.system_message, self.provider, self.model, self._prompts)
+        if self.store.mode == "replay":
+            fixture = self.store.load(key)
+            await asyncio.sleep(fixture["seconds"] * self.store.time_scale)
+            return fixture["response"]
+
+        started = time.perf_counter()
+        response = await self.session.send(text)
+        self.store.save(key, {
+            "provider": self.provider,
+            "model": self.model,
+            "system_message": self.system_message,
+            "prompts": list(self._prompts),
+            "response": response,
+            "seconds": round(time.perf_counter() - started, 3),
+        })
+        return response
@@ -0,0 +1,197 @@
+import time
+import asyncio
+from contextlib import contextmanager
+from typing import Sequence
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 180, 300)
+PROVIDER_BUCKETS = (0.25, 0.5, 1, 2.5, 5, 10, 15, 20, 30, 45, 60, 90, 120)
+PARSE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+SIZE_BUCKETS = (4096, 16384, 32768, 65536, 98304, 131072, 196608, 262144, 524288, 1048576)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def percentile(samples, fraction: float) -> float:
+    """Nearest-rank percentile of raw samples (e.g. a recent window), 0.0 when there are none"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series["buckets"][i] += 1
+                break
+        series["sum"] += value
+        series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["buckets"]):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {series['count']}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {series['sum']!r}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series['count']}")
+        return lines
+
+
+class Registry:
+    """Process-local metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+generate_seconds = registry.histogram(
+    "landing_generate_seconds", "End-to-end latency of generate_landing by how the landing was produced",
+    ["source", "profile"])
+draft_upgrade_seconds = registry.histogram(
+    "landing_draft_upgrade_seconds", "Time from a progressive request to the background upgrade of its draft finishing",
+    ["outcome", "profile"])
+provider_call_seconds = registry.histogram(
+    "llm_provider_call_seconds", "Latency of single LLM provider calls", ["call", "provider", "model"],
+    buckets=PROVIDER_BUCKETS)
+provider_errors = registry.counter(
+    "llm_provider_errors_total", "LLM provider calls that raised", ["call", "provider", "model"])
+postprocess_seconds = registry.histogram(
+    "landing_postprocess_seconds", "Time spent cleaning and parsing provider output", ["step"],
+    buckets=PARSE_BUCKETS)
+html_bytes = registry.histogram(
+    "landing_html_bytes", "Size of generated landing HTML", ["profile"], buckets=SIZE_BUCKETS)
+html_truncations = registry.counter(
+    "landing_html_truncations_total", "Generated pages that came back cut off, by how they were finished",
+    ["outcome"])
+compliance_findings = registry.counter(
+    "landing_compliance_findings_total", "Restricted ad-policy phrases found in stored landings", ["category"])
+cache_hits = registry.counter(
+    "landing_cache_hits_total", "Landings or landing responses served from a cache", ["cache"])
+request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["method", "route", "status"])
+server_errors = registry.counter(
+    "http_server_errors_total", "HTTP responses with a 5xx status", ["method", "route", "status"])
+loop_lag_seconds = registry.histogram(
+    "event_loop_lag_seconds", "How late the event loop heartbeat woke up (only with profiling enabled)",
+    buckets=LATENCY_BUCKETS)
+
+
+@contextmanager
+def provider_call(call: str, provider: str, model: str):
+    """Time one provider call and count it as an error if it raises"""
+    started = time.perf_counter()
+    try:
+        yield
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        provider_errors.inc(call=call, provider=provider, model=model)
+        raise
+    finally:
+        provider_call_seconds.observe(time.perf_counter() - started, call=call, provider=provider, model=model)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and 5xx responses per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners cannot blow up the series count
+            labels = {"method": scope["method"], "route": getattr(route, "path", "unmatched"), "status": status["code"]}
+            request_seconds.observe(time.perf_counter() - started, **labels)
+            if status["code"] >= 500:
+                server_errors.inc(**labels)
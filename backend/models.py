@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Literal
 from datetime import datetime
 import uuid
 
@@ -8,6 +8,16 @@ class LandingPageCreate(BaseModel):
     language: str
     traffic_source: str
     target_action: str
+    # Interactive UI traffic is served ahead of bulk pre-generation jobs
+    priority: Literal["interactive", "batch", "background"] = "interactive"
+    # Serve a fresh pre-generated (warmed) landing for the same spec if there is one
+    use_cache: bool = True
+    # Return (or adapt) an existing landing for a near-duplicate theme instead of generating
+    reuse_similar: bool = False
+    # Page richness: fast (short page, quickest), standard, or full (every section)
+    profile: Literal["fast", "standard", "full"] = "full"
+    # Return a local draft page at once and upgrade it in place when generation finishes
+    progressive: bool = False
 
 class LandingPageMetadata(BaseModel):
     company_name: str
@@ -15,6 +25,56 @@ class LandingPageMetadata(BaseModel):
     phone: str
     address: str
 
+class ProviderCallUsage(BaseModel):
+    call: str
+    provider: str
+    model: str
+    status: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency_seconds: float
+    cost_usd: Optional[float] = None
+
+class GenerationUsage(BaseModel):
+    strategy: str
+    profile: Optional[str] = None
+    provider: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    # None when a call used a model missing from the pricing table
+    cost_usd: Optional[float] = None
+    latency_seconds: float
+    attempts: int
+    retries: int
+    calls: List[ProviderCallUsage] = Field(default_factory=list)
+
+class ComplianceFinding(BaseModel):
+    category: str
+    phrase: str
+    count: int
+    # Visible text around the first occurrence
+    context: str
+
+class ComplianceReport(BaseModel):
+    compliant: bool
+    # Language code whose rules were applied, besides the common ones
+    language: str
+    rules_version: str
+    patterns: int
+    findings: List[ComplianceFinding] = Field(default_factory=list)
+    scan_ms: float
+    checked_at: datetime = Field(default_factory=datetime.utcnow)
+
+class LandingRevision(BaseModel):
+    version: int
+    section: str
+    # The section's HTML before this revision replaced it
+    previous_html: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    usage: Optional[GenerationUsage] = None
+
 class LandingPage(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     theme: str
@@ -23,5 +83,46 @@ class LandingPage(BaseModel):
     target_action: str
     html: str
     lighthouse: int
+    # Generation profile the page was produced with
+    profile: str = "full"
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    metadata: Optional[LandingPageMetadata] = None
\ No newline at end of file
+    metadata: Optional[LandingPageMetadata] = None
+    # Set when this landing was adapted from a near-duplicate existing landing
+    source_landing_id: Optional[str] = None
+    # Bumped by every section regeneration; history holds the replaced sections, oldest first
+    version: int = 1
+    history: List[LandingRevision] = Field(default_factory=list)
+    # Tokens, cost and timing of the generation that produced this landing
+    usage: Optional[GenerationUsage] = None
+    # draft: placeholder page while the generation runs; incomplete: the model's page was cut off
+    # and closed as is; failed: the generation did not finish
+    status: Literal["draft", "complete", "incomplete", "failed"] = "complete"
+    error: Optional[str] = None
+    # Restricted ad-policy phrases found in the current HTML
+    compliance: Optional[ComplianceReport] = None
+    # Pre-generated by a warmup job; every worker serves these from its warm cache
+    warmed: bool = False
+
+class SectionRegenerateRequest(BaseModel):
+    # Optional guidance for the model, e.g. "three tiers, monthly prices in EUR"
+    instructions: Optional[str] = None
+
+class WarmupSpec(BaseModel):
+    theme: str
+    language: str
+    traffic_source: str
+    target_action: str
+    profile: Literal["fast", "standard", "full"] = "full"
+
+class WarmupRequest(BaseModel):
+    specs: List[WarmupSpec]
+    concurrency: Optional[int] = Field(None, ge=1, le=64)
+    max_age_hours: Optional[float] = None
+
+class LandingSearchResult(BaseModel):
+    id: str
+    theme: str
+    language: str
+    company_name: str
+    created_at: datetime
+    score: float
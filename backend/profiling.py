@@ -0,0 +1,381 @@
+import os
+import sys
+import hmac
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import parse_qs
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Nothing below is started or installed unless this is on and ADMIN_TOKEN is set
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+PROFILE_INTERVAL_SECONDS = float(os.getenv('PROFILE_INTERVAL_SECONDS', '0.005'))
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', '300'))
+# Waiting coroutine stacks are walked on the loop, so they are taken less often than running stacks
+PROFILE_AWAIT_EVERY = int(os.getenv('PROFILE_AWAIT_EVERY', '10'))
+LOOP_LAG_THRESHOLD_SECONDS = float(os.getenv('LOOP_LAG_THRESHOLD_SECONDS', '0.25'))
+LOOP_LAG_INTERVAL_SECONDS = float(os.getenv('LOOP_LAG_INTERVAL_SECONDS', '0.05'))
+LOOP_STALL_HISTORY = int(os.getenv('LOOP_STALL_HISTORY', '20'))
+
+IDLE = "(idle)"
+OTHER = "(other tasks)"
+
+_request_profiler = ContextVar("request_profiler", default=None)
+
+
+def profiling_available() -> bool:
+    return PROFILING_ENABLED and bool(ADMIN_TOKEN)
+
+
+def admin_token_valid(token) -> bool:
+    return profiling_available() and bool(token) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    # ';' separates frames in the folded format
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _is_idle(frame) -> bool:
+    # The loop thread parked in selector.select() is waiting for I/O, not running anything
+    return frame.f_code.co_name == "select" and frame.f_code.co_filename.endswith("selectors.py")
+
+
+def _thread_stack(frame, anchors=None):
+    """Frames from the outermost (or from the first of anchors) to frame; None if no anchor is on the stack"""
+    stack = []
+    while frame is not None:
+        stack.append(frame)
+        if anchors is not None and frame in anchors:
+            break
+        frame = frame.f_back
+    else:
+        if anchors is not None:
+            return None
+    return [_frame_name(f) for f in reversed(stack)]
+
+
+def _await_stack(task, anchors=None):
+    """Coroutine frames a suspended task is waiting in, outermost (or from the first of anchors) first"""
+    names = []
+    collecting = anchors is None
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        if not collecting and frame in anchors:
+            collecting = True
+        if collecting:
+            names.append(_frame_name(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return names
+
+
+def format_stack(frame) -> str:
+    stack = _thread_stack(frame)
+    return "\n".join(f"  {name}" for name in stack[-30:])
+
+
+class SamplingProfiler:
+    """
+    Samples the event loop thread from a background thread.
+
+    Running stacks ("running;...") show what holds the loop: the code of
+    whichever coroutine or callback is executing, or "(idle)" when the loop
+    is waiting for I/O. Every few samples the stacks of suspended tasks
+    ("awaiting;...") are walked too, showing where requests spend time
+    waiting. A profiler that follows tasks keeps only the stacks of those
+    tasks, from their anchor frame up, which narrows it to one request.
+    """
+
+    def __init__(self, loop, thread_id: int, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.loop = loop
+        self.thread_id = thread_id
+        self.interval = interval
+        # None: every task; otherwise the followed tasks and the frames their stacks start at
+        self.tasks = None
+        self.anchors = None
+        self.samples = 0
+        self.started = None
+        self.ended = None
+        self._stacks = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def for_current_loop(cls, **kwargs) -> "SamplingProfiler":
+        return cls(asyncio.get_running_loop(), threading.get_ident(), **kwargs)
+
+    def follow(self, task, anchor):
+        if self.tasks is None:
+            self.tasks, self.anchors = [], frozenset()
+        self.tasks.append(task)
+        # Swapped rather than mutated: the sampler thread reads it unlocked
+        self.anchors = self.anchors | {anchor}
+
+    def _add(self, stack: str):
+        with self._lock:
+            self._stacks[stack] = self._stacks.get(stack, 0) + 1
+
+    def _sample_running(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        if _is_idle(frame):
+            self._add(IDLE)
+            return
+        stack = _thread_stack(frame, self.anchors)
+        self._add(OTHER if stack is None else "running;" + ";".join(stack))
+
+    def _sample_awaiting(self):
+        tasks = list(self.tasks) if self.tasks is not None else asyncio.all_tasks(self.loop)
+        current = asyncio.current_task(self.loop)
+        for task in tasks:
+            if task is current or task.done():
+                continue
+            stack = _await_stack(task, self.anchors)
+            if stack:
+                self._add("awaiting;" + ";".join(stack))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            self._sample_running()
+            if self.samples % PROFILE_AWAIT_EVERY == 0:
+                try:
+                    self.loop.call_soon_threadsafe(self._sample_awaiting)
+                except RuntimeError:  # loop closed
+                    return
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # Not joined: that would block the loop for up to an interval; a sample
+        # already being taken may still land, the thread exits right after it
+        self._stop.set()
+        self.ended = time.perf_counter()
+
+    @property
+    def running(self) -> bool:
+        return self.started is not None and self.ended is None
+
+    def duration(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.ended or time.perf_counter()) - self.started
+
+    def folded(self) -> str:
+        """Stacks in the folded format read by flamegraph.pl, speedscope and inferno"""
+        with self._lock:
+            stacks = sorted(self._stacks.items(), key=lambda item: item[1], reverse=True)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+
+class ProfileRuns:
+    """The one process-wide profile that may run at a time, and the last finished one"""
+
+    def __init__(self):
+        self.current = None
+        self.last = None
+        self._timer = None
+
+    def start(self, seconds: float, interval: float = PROFILE_INTERVAL_SECONDS) -> SamplingProfiler:
+        if self.current is not None:
+            raise RuntimeError("A profile is already running")
+        self.current = SamplingProfiler.for_current_loop(interval=interval)
+        self.current.start()
+        self._timer = asyncio.get_running_loop().call_later(seconds, self.stop)
+        return self.current
+
+    def stop(self):
+        profiler, self.current = self.current, None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if profiler is not None:
+            profiler.stop()
+            self.last = profiler
+        return profiler
+
+
+profile_runs = ProfileRuns()
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag with a heartbeat task, and a watchdog thread logs
+    the loop thread's stack while the heartbeat is late by more than the
+    threshold, which is the code blocking the loop.
+    """
+
+    def __init__(self, threshold: float = LOOP_LAG_THRESHOLD_SECONDS, interval: float = LOOP_LAG_INTERVAL_SECONDS):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = deque(maxlen=LOOP_STALL_HISTORY)
+        self.stall_count = 0
+        self.max_lag_seconds = 0.0
+        self._beat = None
+        self._stall = None
+        self._thread_id = None
+        self._task = None
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    async def _heartbeat(self):
+        while True:
+            self._beat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - self._beat - self.interval)
+            metrics.loop_lag_seconds.observe(lag)
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+            stall, self._stall = self._stall, None
+            if stall is not None:
+                stall["blocked_seconds"] = round(lag, 3)
+                logger.warning("Event loop was blocked for %.0f ms", lag * 1000)
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._beat
+            if beat is None or self._stall is not None:
+                continue
+            late = time.perf_counter() - beat - self.interval
+            if late < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None or _is_idle(frame):
+                continue
+            stack = format_stack(frame)
+            self._stall = {
+                "at": datetime.now(timezone.utc).isoformat(),
+                "blocked_seconds": round(late, 3),
+                "stack": stack.splitlines(),
+            }
+            self.stalls.append(self._stall)
+            self.stall_count += 1
+            logger.warning("Event loop blocked for more than %.0f ms in:\n%s", late * 1000, stack)
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return {
+            "threshold_seconds": self.threshold,
+            "interval_seconds": self.interval,
+            "stalls": self.stall_count,
+            "max_lag_seconds": round(self.max_lag_seconds, 3),
+            "recent_stalls": list(self.stalls),
+        }
+
+
+loop_monitor = LoopLagMonitor()
+
+
+# Installed only while profiled requests are running; the factory it replaced
+_profiled_requests = 0
+_previous_task_factory = None
+
+
+def _task_factory(loop, coro, **kwargs):
+    # Tasks spawned while handling a profiled request are profiled with it, until it ends
+    if _previous_task_factory is not None:
+        task = _previous_task_factory(loop, coro, **kwargs)
+    else:
+        task = asyncio.Task(coro, loop=loop, **kwargs)
+    profiler = _request_profiler.get()
+    if profiler is not None and profiler.running:
+        profiler.follow(task, coro.cr_frame if hasattr(coro, "cr_frame") else None)
+    return task
+
+
+def _install_task_factory(loop):
+    global _profiled_requests, _previous_task_factory
+    if _profiled_requests == 0:
+        _previous_task_factory = loop.get_task_factory()
+        loop.set_task_factory(_task_factory)
+    _profiled_requests += 1
+
+
+def _restore_task_factory(loop):
+    """Put the previous factory back once the last profiled request is done, so other tasks pay nothing"""
+    global _profiled_requests, _previous_task_factory
+    _profiled_requests -= 1
+    if _profiled_requests == 0:
+        loop.set_task_factory(_previous_task_factory)
+        _previous_task_factory = None
+
+
+class RequestProfileMiddleware:
+    """
+    ASGI middleware answering admin requests made with ?profile=1 with a
+    folded-stack profile of the request, and of the tasks it spawns, instead
+    of its response. The original status is returned in X-Profile-Status.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or b"profile=" not in scope.get("query_string", b""):
+            await self.app(scope, receive, send)
+            return
+        query = parse_qs(scope["query_string"].decode("latin-1"))
+        token = dict(scope["headers"]).get(ADMIN_TOKEN_HEADER.lower().encode(), b"").decode("latin-1")
+        if query.get("profile") != ["1"] or not admin_token_valid(token):
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def discard(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        loop = asyncio.get_running_loop()
+        _install_task_factory(loop)
+        profiler = SamplingProfiler.for_current_loop()
+        profiler.follow(asyncio.current_task(), sys._getframe())
+        token = _request_profiler.set(profiler)
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+            _request_profiler.reset(token)
+            _restore_task_factory(loop)
+
+        body = profiler.folded().encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profile-status", str(status["code"]).encode()),
+                (b"x-profile-samples", str(profiler.samples).encode()),
+                (b"x-profile-seconds", f"{profiler.duration():.3f}".encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
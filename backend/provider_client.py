@@ -0,0 +1,221 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+import httpx
+import startup_report
+from llm_fixtures import FixtureStore
+from tracing import tracer, current_request_id, REQUEST_ID_HEADER
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', '8'))
+KEEPALIVE_SECONDS = float(os.getenv('LLM_KEEPALIVE_SECONDS', '60'))
+DEFAULT_PROVIDER = "openai"
+DEFAULT_MODEL = "gpt-4o-mini"
+# Opened at prewarm so the first generation does not pay for DNS, TCP and TLS
+PREWARM_URLS = [url for url in os.getenv('LLM_PREWARM_URLS', 'https://api.openai.com/v1').split(',') if url]
+PREWARM_TIMEOUT_SECONDS = float(os.getenv('LLM_PREWARM_TIMEOUT_SECONDS', '5'))
+# Sending our request ids to the provider is opt-in; by default only their ids are logged here
+FORWARD_REQUEST_ID = os.getenv('LLM_FORWARD_REQUEST_ID', 'false').lower() in ('1', 'true', 'yes')
+# Response headers carrying the provider's id for a call (OpenAI, Anthropic, Google)
+PROVIDER_REQUEST_ID_HEADERS = ("x-request-id", "request-id", "x-goog-request-id")
+
+_chat_api = None
+
+
+def load_chat_api():
+    """Import the provider SDK on first use; it is slow to import"""
+    global _chat_api
+    if _chat_api is None:
+        with startup_report.timed("emergentintegrations.llm.chat"):
+            from emergentintegrations.llm.chat import LlmChat, UserMessage
+        _chat_api = (LlmChat, UserMessage)
+    return _chat_api
+
+
+class ProviderSession:
+    """A single chat conversation running on a pooled provider slot"""
+
+    def __init__(self, chat, session_id: str, provider: str, model: str):
+        self.chat = chat
+        self.session_id = session_id
+        self.provider = provider
+        self.model = model
+
+    async def send(self, text: str) -> str:
+        _, UserMessage = load_chat_api()
+        return await self.chat.send_message(UserMessage(text=text))
+
+
+class ProviderClient:
+    """
+    Long-lived LLM client owned by the app.
+
+    Concurrency is bounded by `pool_size` slots and the underlying HTTP
+    connections are kept alive and shared between sessions. In fixture replay
+    mode (LLM_FIXTURE_MODE=replay) no provider is contacted and no key is needed.
+    """
+
+    def __init__(self, api_key: str, pool_size: int = POOL_SIZE, keepalive_seconds: float = KEEPALIVE_SECONDS,
+                 fixtures: FixtureStore = None):
+        self.fixtures = fixtures or FixtureStore.from_env()
+        if not api_key and self.fixtures.mode != "replay":
+            raise ValueError("EMERGENT_LLM_KEY not found in environment")
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.keepalive_seconds = keepalive_seconds
+        self._slots = asyncio.Semaphore(pool_size)
+        self._http = None
+        self._stats = {
+            "sessions": 0,
+            "in_use": 0,
+            "waits": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "http_requests": 0,
+            "reused_connections": 0,
+            "new_connections": 0,
+        }
+
+    async def start(self):
+        """Open the shared keep-alive HTTP pool and hand it to the SDK's transport"""
+        if self._http is not None:
+            return
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+                keepalive_expiry=self.keepalive_seconds,
+            ),
+            timeout=httpx.Timeout(120.0, connect=10.0),
+            event_hooks={"request": [self._on_request], "response": [self._on_response]},
+        )
+        try:
+            import litellm
+            litellm.aclient_session = self._http
+        except ImportError:
+            logger.warning("litellm not available, provider calls will not share the HTTP pool")
+
+    async def warm_connections(self):
+        """Open a keep-alive connection to each provider endpoint with a cheap HEAD request"""
+        if self.fixtures.mode == "replay":
+            return
+        await self.start()
+
+        async def warm(url: str):
+            try:
+                await self._http.head(url, timeout=PREWARM_TIMEOUT_SECONDS)
+            except httpx.HTTPError as e:
+                logger.warning("Could not open a connection to %s: %s", url, e)
+
+        await asyncio.gather(*(warm(url) for url in PREWARM_URLS))
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _on_request(self, request):
+        request_id = current_request_id()
+        if FORWARD_REQUEST_ID and request_id:
+            request.headers[REQUEST_ID_HEADER] = request_id
+        request.extensions["trace"] = self._connection_trace(request.extensions.get("trace"))
+
+    async def _on_response(self, response):
+        # Our log lines carry our request id, so this matches provider-side logs with our traces
+        for header in PROVIDER_REQUEST_ID_HEADERS:
+            provider_request_id = response.headers.get(header)
+            if provider_request_id:
+                logger.info("Provider call %s %s: %s (provider request id %s)", response.request.method,
+                            response.request.url.host, response.status_code, provider_request_id)
+                break
+
+    def _connection_trace(self, inner=None):
+        """
+        httpcore trace callback counting the request as sent on a new connection
+        when a TCP connect happened before its headers went out, reused otherwise
+        """
+        connected = False
+
+        async def trace(event_name: str, info: dict):
+            nonlocal connected
+            if event_name == "connection.connect_tcp.complete":
+                connected = True
+            elif event_name.endswith(".send_request_headers.started"):
+                self._stats["http_requests"] += 1
+                self._stats["new_connections" if connected else "reused_connections"] += 1
+            if inner is not None:
+                await inner(event_name, info)
+
+        return trace
+
+    def new_session_id(self, prefix: str) -> str:
+        return f"{prefix}-{uuid.uuid4().hex}"
+
+    @asynccontextmanager
+    async def session(self, system_message: str, provider: str = DEFAULT_PROVIDER,
+                      model: str = DEFAULT_MODEL, prefix: str = "lp", max_tokens: int = None):
+        """Hold a pool slot for the duration of one chat conversation"""
+        replay = self.fixtures.mode == "replay"
+        if not replay:
+            # Only slow on a cold worker that skipped prewarming
+            with tracer.span("provider.start"):
+                await self.start()
+                LlmChat, _ = load_chat_api()
+
+        if self._slots.locked():
+            self._stats["waits"] += 1
+        started = time.perf_counter()
+        with tracer.span("provider.slot_wait"):
+            await self._slots.acquire()
+        waited = time.perf_counter() - started
+        self._stats["total_wait_seconds"] += waited
+        self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+        self._stats["sessions"] += 1
+        self._stats["in_use"] += 1
+        try:
+            session_id = self.new_session_id(prefix)
+            chat = None
+            if not replay:
+                chat = LlmChat(api_key=self.api_key, session_id=session_id, system_message=system_message)
+                chat.with_model(provider, model)
+                # Not every SDK version can cap the completion size
+                if max_tokens and hasattr(chat, "with_max_tokens"):
+                    chat.with_max_tokens(max_tokens)
+            yield self.fixtures.wrap(ProviderSession(chat, session_id, provider, model), system_message)
+        finally:
+            self._stats["in_use"] -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["pool_size"] = self.pool_size
+        stats["avg_wait_seconds"] = stats["total_wait_seconds"] / stats["sessions"] if stats["sessions"] else 0.0
+        requests = stats["http_requests"]
+        stats["connection_reuse_ratio"] = stats["reused_connections"] / requests if requests else 0.0
+        stats["fixtures"] = self.fixtures.stats()
+        return stats
+
+
+_client = None
+
+
+def get_provider_client() -> ProviderClient:
+    """Return the process-wide provider client, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = ProviderClient(os.getenv('EMERGENT_LLM_KEY'))
+    return _client
+
+
+async def close_provider_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
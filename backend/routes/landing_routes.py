@@ -1,64 +1,632 @@
-from fastapi import APIRouter, HTTPException
-from models import LandingPageCreate, LandingPage, LandingPageMetadata
+from fastapi import APIRouter, HTTPException, Request, Header, Query, Response
+from fastapi.responses import HTMLResponse, StreamingResponse
+from fast_json import FastJSONResponse, json_array, landing_json, dumps
+from models import (LandingPageCreate, LandingPage, LandingPageMetadata, LandingRevision, LandingSearchResult,
+                    GenerationUsage, SectionRegenerateRequest, WarmupRequest, WarmupSpec)
 from landing_generator_final import LandingPageGenerator
-from typing import List
+from cancellation import run_with_deadline, resolve_deadline, GenerationTimeout, ClientDisconnected
+from scheduler import scheduler
+from landing_cache import warm_cache, spec_key
+from warmup import WarmupJob, run_warmup, prune_jobs, WARMUP_CONCURRENCY
+from landing_store import create_landing_store
+from search_index import search_index
+from similarity_index import similarity_index
+from usage import usage_ledger
+from idempotency import idempotency_keys, fingerprint, IdempotencyConflict, MAX_KEY_LENGTH
+from html_sections import find_section, splice_section, design_context
+from chunk_store import externalize_assets
+from export_bundle import LandingBundle, ARCHIVE_FORMATS, EXPORT_MAX_LANDINGS
+from draft_template import render_draft
+from compliance import compliance_scanner
+from html_text import replace_visible_text
+from html_repair import repair_html
+from landing_events import landing_events
+import metrics
+from tracing import tracer
+from typing import List, Literal, Optional, Tuple
+import os
+import time
+import asyncio
+import logging
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
-generator = LandingPageGenerator()
+_generator = None
 
-# In-memory storage (for MVP, will use MongoDB later)
-landings_db = {}
+ASSET_MEDIA_TYPES = {"css": "text/css; charset=utf-8", "js": "text/javascript; charset=utf-8"}
 
-@router.post("/generate-landing", response_model=LandingPage)
-async def generate_landing(request: LandingPageCreate):
+# Replaced sections kept per landing
+SECTION_HISTORY_LIMIT = int(os.getenv('LANDING_HISTORY_LIMIT', '20'))
+# Event streams re-read the store this often, to see upgrades made by other workers
+EVENTS_POLL_SECONDS = float(os.getenv('LANDING_EVENTS_POLL_SECONDS', '1'))
+EVENTS_KEEPALIVE_SECONDS = 15
+
+
+def get_generator() -> LandingPageGenerator:
+    """Create the generator on first use so a missing key does not break startup"""
+    global _generator
+    if _generator is None:
+        _generator = LandingPageGenerator()
+    return _generator
+
+# Landing storage: per-process memory (MVP) or the shared on-disk log, see LANDING_STORE
+landings_db = create_landing_store()
+# Where the indexes caught up with the shared store, see _sync_indexes
+_sync_cursor = None
+
+warmup_jobs = {}
+# Background upgrades of draft landings; referenced so they are not garbage collected
+_draft_upgrades = set()
+
+
+async def _generate(request: LandingPageCreate) -> dict:
+    """Run one generation in a provider slot of the request's priority class"""
+    queued = time.perf_counter()
+    async with scheduler.slot(request.priority):
+        with tracer.span("generator.generate_landing_page", priority=request.priority,
+                         slot_wait_ms=round((time.perf_counter() - queued) * 1000, 1)):
+            return await get_generator().generate_landing_page(
+                theme=request.theme,
+                language=request.language,
+                traffic_source=request.traffic_source,
+                target_action=request.target_action,
+                profile=request.profile
+            )
+
+
+async def _regenerate_section(landing: LandingPage, section: str, current_html: str,
+                              instructions: Optional[str]) -> dict:
+    async with scheduler.slot("interactive"):
+        with tracer.span("generator.regenerate_section", section=section):
+            return await get_generator().regenerate_section(
+                theme=landing.theme,
+                language=landing.language,
+                target_action=landing.target_action,
+                section=section,
+                current_html=current_html,
+                design_context=design_context(landing.html),
+                instructions=instructions,
+                profile=landing.profile
+            )
+
+
+def _build_landing(request: LandingPageCreate, result: dict, landing_id: str = None) -> LandingPage:
+    return LandingPage(
+        id=landing_id or str(uuid.uuid4()),
+        theme=request.theme,
+        language=request.language,
+        traffic_source=request.traffic_source,
+        target_action=request.target_action,
+        html=result['html'],
+        lighthouse=result['lighthouse'],
+        profile=request.profile,
+        created_at=datetime.utcnow(),
+        metadata=LandingPageMetadata(**result['metadata']),
+        usage=GenerationUsage(**result['usage']) if result.get('usage') else None,
+        status="complete" if result.get('complete', True) else "incomplete"
+    )
+
+
+def _index_landing(landing: LandingPage):
+    if landing.warmed:
+        key = spec_key(landing.theme, landing.language, landing.traffic_source, landing.target_action, landing.profile)
+        warm_cache.put(key, landing.id, landing.created_at.replace(tzinfo=timezone.utc).timestamp())
+    search_index.add(landing)
+    similarity_index.add(landing.id, landing.theme, landing.language, landing.target_action)
+    if landing.usage:
+        usage_ledger.add((landing.id, 1), landing.created_at, landing.language, landing.theme, landing.usage)
+    for revision in landing.history:
+        if revision.usage:
+            usage_ledger.add((landing.id, revision.version), revision.created_at, landing.language, landing.theme,
+                             revision.usage)
+
+
+def _store_landing(landing: LandingPage):
+    with tracer.span("compliance.scan") as span:
+        # Every stored version of the HTML is checked before anyone can launch it
+        landing.compliance = compliance_scanner.scan(landing.html, landing.language)
+        span.set("findings", len(landing.compliance.findings))
+    if not landing.compliance.compliant:
+        logger.warning("Landing %s has restricted phrases: %s", landing.id,
+                       ", ".join(f"{f.category}: {f.phrase}" for f in landing.compliance.findings))
+    with tracer.span("store.put", landing_id=landing.id, html_bytes=len(landing.html)):
+        landings_db.put(landing)
+    with tracer.span("response_cache.serialize"):
+        _landing_json(landing)
+    with tracer.span("index.add"):
+        _index_landing(landing)
+    landing_events.notify(landing.id)
+
+
+def _landing_json(landing: LandingPage) -> bytes:
+    """
+    Serialise a landing, caching the bytes when the store is per-process.
+    
+    Stored landings were validated when they were built, so their JSON is
+    served as is instead of going through response_model validation again.
+    """
+    body = landing.model_dump_json().encode()
+    if not landings_db.shared:
+        landing_json.put(landing.id, body)
+    return body
+
+
+def _sync_indexes():
+    """Index landings written by other workers sharing the store, new ones and rewritten ones"""
+    global _sync_cursor
+    if not landings_db.shared:
+        return
+    changed, _sync_cursor = landings_db.changes(_sync_cursor)
+    for landing_id in changed:
+        landing = landings_db.get(landing_id)
+        if landing is not None:
+            _index_landing(landing)
+
+
+def _similar_landing(request: LandingPageCreate) -> Optional[LandingPage]:
     """
-    Generate a new landing page using AI
+    Reuse a near-duplicate existing landing: returned as is when the request
+    matches it exactly, otherwise copied with the request's fields and CTA text.
     """
+    _sync_indexes()
+    candidates = [
+        landings_db.get(landing_id)
+        for landing_id, _ in similarity_index.find(request.theme, request.language, request.target_action)
+    ]
+    # A page of another profile is richer or poorer than asked for
+    candidates = [
+        landing for landing in candidates
+        if landing is not None and landing.status == "complete" and landing.profile == request.profile
+    ]
+    if not candidates:
+        return None
+    for existing in candidates:
+        if (existing.theme, existing.traffic_source, existing.target_action) == (
+                request.theme, request.traffic_source, request.target_action):
+            return existing
+    
+    existing = candidates[0]
+    html = existing.html
+    if existing.target_action and existing.target_action != request.target_action:
+        html = replace_visible_text(html, existing.target_action, request.target_action)
+    landing = existing.model_copy(update={
+        "id": str(uuid.uuid4()),
+        "theme": request.theme,
+        "traffic_source": request.traffic_source,
+        "target_action": request.target_action,
+        "html": html,
+        "created_at": datetime.utcnow(),
+        "source_landing_id": existing.id,
+        "warmed": False,
+        # Nothing was generated for the copy
+        "usage": None,
+        "history": [],
+        "version": 1,
+    })
+    _store_landing(landing)
+    return landing
+
+
+def _cached_landing(spec, max_age_seconds: float = None) -> Optional[LandingPage]:
+    """Return the warmed landing for a spec if it is still fresh and stored"""
+    # Picks up landings warmed by other workers sharing the store
+    _sync_indexes()
+    key = spec_key(spec.theme, spec.language, spec.traffic_source, spec.target_action, spec.profile)
+    landing_id = warm_cache.get(key, max_age_seconds)
+    if landing_id is None:
+        return None
+    return landings_db.get(landing_id)
+
+async def _upgrade_draft(request: LandingPageCreate, draft: LandingPage, deadline: float, started: float):
+    """Generate the landing behind a draft and store it under the draft's id"""
+    # The request itself was counted in generate_seconds when its draft was returned
     try:
-        # Generate landing page
-        result = await generator.generate_landing_page(
+        result = await run_with_deadline(_generate(request), deadline)
+        with tracer.span("landing.build"):
+            landing = _build_landing(request, result, landing_id=draft.id)
+        _store_landing(landing)
+        metrics.draft_upgrade_seconds.observe(time.perf_counter() - started, outcome="upgraded", profile=request.profile)
+    except asyncio.CancelledError:
+        # Shutting down: a draft left behind would stay a draft for good in a persistent store
+        metrics.draft_upgrade_seconds.observe(time.perf_counter() - started, outcome="interrupted",
+                                              profile=request.profile)
+        logger.warning("Generation behind draft %s was interrupted", draft.id)
+        _store_landing(draft.model_copy(update={"status": "failed", "error": "Generation was interrupted"}))
+        raise
+    except Exception as e:
+        metrics.draft_upgrade_seconds.observe(time.perf_counter() - started, outcome="failed", profile=request.profile)
+        logger.warning("Generation behind draft %s failed: %s", draft.id, e)
+        failed = draft.model_copy(update={"status": "failed", "error": f"Error generating landing page: {str(e)}"})
+        _store_landing(failed)
+
+
+async def cancel_draft_upgrades():
+    """Stop the background upgrades still running, marking their drafts failed"""
+    tasks = list(_draft_upgrades)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _start_progressive(request: LandingPageCreate, deadline: float, started: float) -> LandingPage:
+    """Store a local draft landing and keep generating the real one in the background"""
+    with tracer.span("draft.render"):
+        draft = LandingPage(
             theme=request.theme,
             language=request.language,
             traffic_source=request.traffic_source,
-            target_action=request.target_action
+            target_action=request.target_action,
+            html=render_draft(request.theme, request.language, request.target_action),
+            lighthouse=100,
+            profile=request.profile,
+            status="draft",
         )
+    _store_landing(draft)
+    task = asyncio.create_task(_upgrade_draft(request, draft, deadline, started))
+    _draft_upgrades.add(task)
+    task.add_done_callback(_draft_upgrades.discard)
+    metrics.generate_seconds.observe(time.perf_counter() - started, source="draft", profile=request.profile)
+    return draft
+
+
+async def _produce_landing(request: LandingPageCreate, deadline: float, is_disconnected, started: float) -> LandingPage:
+    """Serve a warmed or similar landing for the request, or generate and store a new one"""
+    if request.use_cache:
+        with tracer.span("warm_cache.lookup"):
+            cached = _cached_landing(request)
+        if cached is not None:
+            warm_cache.hits += 1
+            metrics.cache_hits.inc(cache="warm")
+            metrics.generate_seconds.observe(time.perf_counter() - started, source="warm_cache", profile=request.profile)
+            return cached
+        warm_cache.misses += 1
+    
+    if request.reuse_similar:
+        with tracer.span("similarity.lookup"):
+            similar = _similar_landing(request)
+        if similar is not None:
+            metrics.cache_hits.inc(cache="similar")
+            metrics.generate_seconds.observe(time.perf_counter() - started, source="similar", profile=request.profile)
+            return similar
+    
+    if request.progressive:
+        return _start_progressive(request, deadline, started)
+    
+    try:
+        # Generate landing page
+        result = await run_with_deadline(_generate(request), deadline, is_disconnected)
         
         # Create landing page object
-        landing = LandingPage(
-            id=str(uuid.uuid4()),
-            theme=request.theme,
-            language=request.language,
-            traffic_source=request.traffic_source,
-            target_action=request.target_action,
-            html=result['html'],
-            lighthouse=result['lighthouse'],
-            created_at=datetime.utcnow(),
-            metadata=LandingPageMetadata(**result['metadata'])
-        )
+        with tracer.span("landing.build"):
+            landing = _build_landing(request, result)
         
         # Store in database
-        landings_db[landing.id] = landing
+        _store_landing(landing)
         
+        metrics.generate_seconds.observe(time.perf_counter() - started, source="generated", profile=request.profile)
         return landing
     
+    except GenerationTimeout as e:
+        metrics.generate_seconds.observe(time.perf_counter() - started, source="timeout", profile=request.profile)
+        raise HTTPException(status_code=504, detail=f"Error generating landing page: {str(e)}")
+    except ClientDisconnected as e:
+        metrics.generate_seconds.observe(time.perf_counter() - started, source="disconnected", profile=request.profile)
+        # Nobody is listening any more; 499 is only recorded in access logs
+        raise HTTPException(status_code=499, detail=str(e))
     except Exception as e:
+        metrics.generate_seconds.observe(time.perf_counter() - started, source="failed", profile=request.profile)
         raise HTTPException(status_code=500, detail=f"Error generating landing page: {str(e)}")
 
-@router.get("/landings/{landing_id}", response_model=LandingPage)
+
+async def _produce_keyed_landing(request: LandingPageCreate, key: str, deadline: float,
+                                 started: float) -> Tuple[LandingPage, bool]:
+    """Produce the landing once per Idempotency-Key; retries get the same landing"""
+    async def work() -> str:
+        # Not cancelled on disconnect: the client's retry attaches to this generation
+        landing = await _produce_landing(request, deadline, None, started)
+        return landing.id
+    
+    body_fingerprint = fingerprint(request.model_dump_json())
+    for _ in range(2):
+        landing_id, shared = await idempotency_keys.run(key, body_fingerprint, work)
+        landing = landings_db.get(landing_id)
+        if landing is not None:
+            return landing, shared
+        # The remembered landing is gone from the store: produce it again
+        idempotency_keys.discard(key)
+    raise HTTPException(status_code=500, detail="Error generating landing page: stored result disappeared")
+
+
+@router.post("/generate-landing", response_model=LandingPage)
+async def generate_landing(request: LandingPageCreate, http_request: Request, response: Response,
+                           x_request_timeout: Optional[float] = Header(None),
+                           idempotency_key: Optional[str] = Header(None)):
+    """
+    Generate a new landing page using AI.
+    
+    The generation is cancelled when the client disconnects or the deadline
+    (X-Request-Timeout header, in seconds) passes; nothing is stored then.
+    
+    With an Idempotency-Key header, retries with the same key and body get
+    the landing of the first request, waiting for it if it is still being
+    generated; such generations are not cancelled on disconnect.
+    
+    With progressive=true a draft page rendered from a local template is
+    returned at once (202, status "draft") and upgraded in place when the
+    generation finishes; poll the landing or follow /landings/{id}/events.
+    """
+    started = time.perf_counter()
+    deadline = resolve_deadline(x_request_timeout)
+    if idempotency_key is None:
+        landing = await _produce_landing(request, deadline, http_request.is_disconnected, started)
+        if landing.status == "draft":
+            response.status_code = 202
+        return landing
+    
+    if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+    try:
+        landing, shared = await _produce_keyed_landing(request, idempotency_key, deadline, started)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if landing.status == "draft":
+        response.status_code = 202
+    if shared:
+        response.headers["Idempotent-Replayed"] = "true"
+        metrics.cache_hits.inc(cache="idempotency")
+        metrics.generate_seconds.observe(time.perf_counter() - started, source="idempotent_replay", profile=request.profile)
+    return landing
+
+@router.get("/landings/search", response_model=List[LandingSearchResult])
+async def search_landings(q: str = Query(..., min_length=1), language: Optional[str] = None,
+                          limit: int = Query(20, ge=1, le=100)):
+    """
+    Search landing pages by theme, brand name, language or page text
+    """
+    _sync_indexes()
+    return search_index.search(q, language=language, limit=limit)
+
+@router.get("/usage/report")
+async def get_usage_report(hours: float = Query(24, gt=0, le=24 * 90)):
+    """
+    Get token usage, cost and throughput of generations in the last `hours`.
+    
+    Totals, hourly buckets and breakdowns by language, theme, strategy and
+    model; regenerated sections count as generations of their own strategy.
+    """
+    _sync_indexes()
+    return usage_ledger.report(hours)
+
+@router.get("/landings/export")
+async def export_landings(ids: Optional[str] = None, format: Literal["zip", "tar"] = "zip",
+                          external_assets: bool = False):
+    """
+    Download landing pages as one static-site bundle (ZIP or .tar.gz).
+    
+    ids is a comma-separated list, all landings when omitted. The archive is
+    streamed a page at a time: <id>/index.html per landing, shared assets/
+    files with external_assets=true, and a manifest.json with every page's
+    metadata.
+    """
+    if ids is None:
+        landing_ids = landings_db.ids()
+    else:
+        landing_ids = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+        missing = [landing_id for landing_id in landing_ids if landing_id not in landings_db]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Landing pages not found: {', '.join(missing[:10])}")
+    if not landing_ids:
+        raise HTTPException(status_code=400, detail="No landing pages to export")
+    if len(landing_ids) > EXPORT_MAX_LANDINGS:
+        raise HTTPException(status_code=400, detail=f"At most {EXPORT_MAX_LANDINGS} landing pages per export")
+    
+    bundle = LandingBundle(landings_db.chunks, format, external_assets)
+    
+    async def archive():
+        for landing_id in landing_ids:
+            # Store reads stay on the loop; compression runs in a worker thread
+            landing = landings_db.get(landing_id)
+            if landing is None:
+                continue
+            data = await asyncio.to_thread(bundle.write, bundle.files(landing))
+            if data:
+                yield data
+        yield await asyncio.to_thread(bundle.finish)
+        logger.info("Exported %d landings (%d assets) as %s", len(bundle.landings), len(bundle.assets), format)
+    
+    media_type, extension = ARCHIVE_FORMATS[format]
+    filename = f"landings-{bundle.exported_at:%Y%m%d-%H%M%S}.{extension}"
+    return StreamingResponse(archive(), media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@router.get("/landings/{landing_id}", response_model=LandingPage, response_class=FastJSONResponse)
 async def get_landing(landing_id: str):
     """
     Get a specific landing page by ID
     """
-    if landing_id not in landings_db:
+    body = None if landings_db.shared else landing_json.get(landing_id)
+    if body is not None:
+        metrics.cache_hits.inc(cache="response")
+    else:
+        landing = landings_db.get(landing_id)
+        if landing is None:
+            raise HTTPException(status_code=404, detail="Landing page not found")
+        body = _landing_json(landing)
+    
+    return FastJSONResponse(body)
+
+@router.get("/landings/{landing_id}/html", response_class=HTMLResponse)
+async def get_landing_html(landing_id: str, external_assets: bool = False):
+    """
+    Get the HTML of a landing page.
+    
+    With external_assets=true, large inline <style>/<script> blocks are served
+    as content-hashed /api/assets URLs that browsers and CDNs can cache for good.
+    """
+    landing = landings_db.get(landing_id)
+    if landing is None:
+        raise HTTPException(status_code=404, detail="Landing page not found")
+    
+    html = landing.html
+    if external_assets:
+        html = externalize_assets(html, landings_db.chunks)
+    return HTMLResponse(html)
+
+@router.get("/landings/{landing_id}/events")
+async def landing_events_stream(landing_id: str, http_request: Request):
+    """
+    Follow a landing's status as server-sent events.
+    
+    A "landing" event with id, status and version is sent at once and on
+    every change; the stream ends once the landing is no longer a draft.
+    """
+    if landings_db.get(landing_id) is None:
+        raise HTTPException(status_code=404, detail="Landing page not found")
+    
+    async def events():
+        sent = None
+        # Measured on the clock: waits end early whenever this worker stores the landing
+        keepalive_at = time.monotonic() + EVENTS_KEEPALIVE_SECONDS
+        while True:
+            landing = landings_db.get(landing_id)
+            if landing is None:
+                yield "event: error\ndata: {\"detail\": \"Landing page not found\"}\n\n"
+                return
+            state = {"id": landing.id, "status": landing.status, "version": landing.version}
+            if state != sent:
+                yield f"event: landing\ndata: {dumps(state).decode()}\n\n"
+                sent = state
+                keepalive_at = time.monotonic() + EVENTS_KEEPALIVE_SECONDS
+            elif time.monotonic() >= keepalive_at:
+                yield ": keep-alive\n\n"
+                keepalive_at = time.monotonic() + EVENTS_KEEPALIVE_SECONDS
+            if landing.status != "draft" or await http_request.is_disconnected():
+                return
+            await landing_events.wait(landing_id, EVENTS_POLL_SECONDS)
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/assets/{asset_name}")
+async def get_asset(asset_name: str):
+    """
+    Get an externalised CSS/JS asset by content hash
+    """
+    digest, _, extension = asset_name.partition(".")
+    content = landings_db.chunks.get(digest) if extension in ASSET_MEDIA_TYPES else None
+    if content is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    
+    # The URL changes whenever the content does
+    return Response(content, media_type=ASSET_MEDIA_TYPES[extension],
+                    headers={"Cache-Control": "public, max-age=31536000, immutable", "ETag": f'"{digest}"'})
+
+@router.post("/landings/{landing_id}/sections/{section}/regenerate", response_model=LandingPage)
+async def regenerate_section(landing_id: str, section: str, http_request: Request,
+                             body: Optional[SectionRegenerateRequest] = None,
+                             x_request_timeout: Optional[float] = Header(None)):
+    """
+    Regenerate one section (e.g. pricing, faq) of a stored landing page.
+    
+    Only that section is asked from the model, with the page's CSS variables
+    and fonts as design context. The result is spliced into the stored HTML
+    and the replaced section is kept in the landing's history.
+    """
+    landing = landings_db.get(landing_id)
+    if landing is None:
         raise HTTPException(status_code=404, detail="Landing page not found")
+    if landing.status == "draft":
+        raise HTTPException(status_code=409, detail="Landing page is still being generated")
+    span = find_section(landing.html, section)
+    if span is None:
+        raise HTTPException(status_code=404, detail=f"Section '{section}' not found in landing page")
+    
+    deadline = resolve_deadline(x_request_timeout)
+    try:
+        result = await run_with_deadline(
+            _regenerate_section(landing, section, landing.html[span[0]:span[1]], body.instructions if body else None),
+            deadline, http_request.is_disconnected
+        )
+    except GenerationTimeout as e:
+        raise HTTPException(status_code=504, detail=f"Error regenerating section: {str(e)}")
+    except ClientDisconnected as e:
+        raise HTTPException(status_code=499, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error regenerating section: {str(e)}")
+    # Drop a cut-off last tag and close what the model left open, as for whole pages
+    fragment, _ = repair_html(result["html"])
+    if not fragment.startswith("<"):
+        raise HTTPException(status_code=502, detail=f"Model did not return HTML for section '{section}'")
+    
+    # Splice into the latest stored version, another regeneration may have finished meanwhile
+    latest = landings_db.get(landing_id) or landing
+    span = find_section(latest.html, section)
+    if span is None:
+        raise HTTPException(status_code=409, detail=f"Section '{section}' no longer exists in landing page")
+    revision = LandingRevision(version=latest.version + 1, section=section,
+                               previous_html=latest.html[span[0]:span[1]],
+                               usage=GenerationUsage(**result["usage"]))
+    updated = latest.model_copy(update={
+        "html": splice_section(latest.html, span, fragment),
+        "version": revision.version,
+        "history": (latest.history + [revision])[-SECTION_HISTORY_LIMIT:],
+    })
+    _store_landing(updated)
     
-    return landings_db[landing_id]
+    return updated
 
-@router.get("/landings", response_model=List[LandingPage])
+@router.get("/landings", response_model=List[LandingPage], response_class=FastJSONResponse)
 async def get_all_landings():
     """
     Get all generated landing pages
     """
-    return list(landings_db.values())
\ No newline at end of file
+    bodies = {} if landings_db.shared else {landing_id: landing_json.get(landing_id) for landing_id in landings_db.ids()}
+    if landings_db.shared or None in bodies.values():
+        # Only landings missing from the cache are serialised again
+        bodies = {
+            landing.id: bodies.get(landing.id) or _landing_json(landing)
+            for landing in landings_db.values()
+        }
+    return FastJSONResponse(json_array(bodies.values()))
+
+@router.post("/warmup")
+async def start_warmup(warmup: WarmupRequest):
+    """
+    Pre-generate landings for known campaign specs in the background.
+    
+    Specs that already have a fresh warmed landing are skipped; generations run
+    at background priority and at most `concurrency` at a time.
+    """
+    max_age = warmup.max_age_hours * 3600 if warmup.max_age_hours is not None else None
+    specs = list({
+        spec_key(s.theme, s.language, s.traffic_source, s.target_action, s.profile): s for s in warmup.specs
+    }.values())
+    job = WarmupJob(total=len(specs), concurrency=warmup.concurrency or WARMUP_CONCURRENCY)
+    
+    async def generate(spec: WarmupSpec):
+        request = LandingPageCreate(**spec.model_dump(), priority="background")
+        result = await run_with_deadline(_generate(request), resolve_deadline(None))
+        landing = _build_landing(request, result).model_copy(update={"warmed": True})
+        # Indexing it makes it the spec's warm entry
+        _store_landing(landing)
+    
+    prune_jobs(warmup_jobs)
+    warmup_jobs[job.id] = job
+    job.task = asyncio.create_task(
+        run_warmup(job, specs, lambda spec: _cached_landing(spec, max_age) is not None, generate)
+    )
+    return job.to_dict()
+
+@router.get("/warmup/{job_id}")
+async def get_warmup(job_id: str):
+    """
+    Get the progress of a warmup job
+    """
+    prune_jobs(warmup_jobs)
+    if job_id not in warmup_jobs:
+        raise HTTPException(status_code=404, detail="Warmup job not found")
+    
+    return warmup_jobs[job_id].to_dict()
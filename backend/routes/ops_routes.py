@@ -0,0 +1,118 @@
+from fastapi import APIRouter, HTTPException
+import startup_report
+from provider_client import get_provider_client
+from hedging import hedge_stats
+from token_budget import token_budget
+from cancellation import work_stats
+from scheduler import scheduler
+from landing_cache import warm_cache
+from routes.landing_routes import landings_db
+from search_index import search_index
+from similarity_index import similarity_index
+from fast_json import landing_json
+from idempotency import idempotency_keys
+from generation_profiles import profile_stats
+from compliance import compliance_scanner
+
+router = APIRouter()
+
+@router.get("/startup")
+async def get_startup_report():
+    """
+    Get import timings and startup phases of this worker
+    """
+    return startup_report.report()
+
+@router.get("/provider/stats")
+async def get_provider_stats():
+    """
+    Get connection pool usage of the shared LLM provider client
+    """
+    try:
+        return get_provider_client().stats()
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.get("/hedging/stats")
+async def get_hedging_stats():
+    """
+    Get per provider/model attempts, wins and latency of hedged generations
+    """
+    return hedge_stats.snapshot()
+
+@router.get("/token-budget")
+async def get_token_budget():
+    """
+    Get prompt/completion token counts and budget warnings per generation strategy
+    """
+    return token_budget.snapshot()
+
+@router.get("/generation/stats")
+async def get_generation_stats():
+    """
+    Get counts of completed, failed, cancelled and timed out generations
+    """
+    return work_stats.snapshot()
+
+@router.get("/generation/profiles")
+async def get_generation_profiles():
+    """
+    Get the generation profiles with their measured latency and page size
+    """
+    return profile_stats.snapshot()
+
+@router.get("/compliance/stats")
+async def get_compliance_stats():
+    """
+    Get scan counts and timings of the ad-policy compliance scanner and its rules per language
+    """
+    return compliance_scanner.stats()
+
+@router.get("/scheduler/stats")
+async def get_scheduler_stats():
+    """
+    Get queue depth, running slots and wait percentiles per priority class
+    """
+    return scheduler.snapshot()
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Get entries, hits and misses of the warmed landing cache
+    """
+    return warm_cache.stats()
+
+@router.get("/store/stats")
+async def get_store_stats():
+    """
+    Get size and compaction statistics of the landing store
+    """
+    return landings_db.stats()
+
+@router.get("/search/stats")
+async def get_search_stats():
+    """
+    Get size and last query time of the landing search index
+    """
+    return search_index.stats()
+
+@router.get("/similarity/stats")
+async def get_similarity_stats():
+    """
+    Get size, lookups and matches of the near-duplicate request index
+    """
+    return similarity_index.stats()
+
+@router.get("/response-cache/stats")
+async def get_response_cache_stats():
+    """
+    Get size and hit rate of the serialised landing response cache
+    """
+    return landing_json.stats()
+
+@router.get("/idempotency/stats")
+async def get_idempotency_stats():
+    """
+    Get remembered and in-flight idempotency keys, replays and conflicts
+    """
+    return idempotency_keys.stats()
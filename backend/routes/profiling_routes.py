@@ -0,0 +1,66 @@
+from fastapi import APIRouter, HTTPException, Header, Query, Depends, Response
+from profiling import (profile_runs, loop_monitor, profiling_available, admin_token_valid,
+                       PROFILE_INTERVAL_SECONDS, PROFILE_MAX_SECONDS)
+from typing import Optional
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not profiling_available():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not admin_token_valid(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/profiling", dependencies=[Depends(require_admin)])
+
+
+def _profile_response(profiler) -> Response:
+    return Response(
+        profiler.folded(),
+        media_type="text/plain",
+        headers={"X-Profile-Samples": str(profiler.samples), "X-Profile-Seconds": f"{profiler.duration():.3f}"},
+    )
+
+
+@router.post("/start")
+async def start_profile(seconds: float = Query(30, gt=0, le=PROFILE_MAX_SECONDS),
+                        interval: float = Query(PROFILE_INTERVAL_SECONDS, ge=0.001, le=1)):
+    """
+    Start sampling the event loop of this worker for the given number of seconds
+    """
+    try:
+        profile_runs.start(seconds, interval)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "running", "seconds": seconds, "interval": interval}
+
+
+@router.post("/stop")
+async def stop_profile():
+    """
+    Stop the running profile early and return it as folded stacks
+    """
+    profiler = profile_runs.stop()
+    if profiler is None:
+        raise HTTPException(status_code=409, detail="No profile is running")
+    return _profile_response(profiler)
+
+
+@router.get("/profile")
+async def get_profile():
+    """
+    Get the last finished profile as folded stacks, for flamegraph.pl or speedscope
+    """
+    if profile_runs.current is not None:
+        raise HTTPException(status_code=409, detail="A profile is still running; stop it or wait")
+    if profile_runs.last is None:
+        raise HTTPException(status_code=404, detail="No profile has been taken yet")
+    return _profile_response(profile_runs.last)
+
+
+@router.get("/loop-lag")
+async def get_loop_lag():
+    """
+    Get event loop lag and the stacks logged for recent stalls
+    """
+    return loop_monitor.stats()
@@ -0,0 +1,113 @@
+import os
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from provider_client import POOL_SIZE
+from metrics import percentile
+
+GENERATION_CONCURRENCY = int(os.getenv('GENERATION_CONCURRENCY', str(POOL_SIZE)))
+
+# Relative share of provider concurrency each class gets while all are queued
+PRIORITY_WEIGHTS = {
+    "interactive": int(os.getenv('PRIORITY_WEIGHT_INTERACTIVE', '16')),
+    "batch": int(os.getenv('PRIORITY_WEIGHT_BATCH', '3')),
+    "background": int(os.getenv('PRIORITY_WEIGHT_BACKGROUND', '1')),
+}
+
+
+class PriorityScheduler:
+    """
+    Weighted fair scheduler for generation slots.
+
+    Uses stride scheduling: every class has a virtual "pass" that advances by
+    1/weight per slot granted, and a free slot goes to the queued class with
+    the lowest pass. Interactive work therefore gets most slots while batch
+    and background work keeps draining instead of starving.
+    """
+
+    def __init__(self, concurrency: int = GENERATION_CONCURRENCY, weights: dict = PRIORITY_WEIGHTS):
+        self.concurrency = concurrency
+        self.weights = dict(weights)
+        self._running = 0
+        self._queues = {name: deque() for name in self.weights}
+        self._pass = {name: 0.0 for name in self.weights}
+        self._virtual_time = 0.0
+        self._stats = {
+            name: {"running": 0, "granted": 0, "completed": 0, "waits": deque(maxlen=1000)}
+            for name in self.weights
+        }
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "interactive"):
+        """Hold one generation slot of the given priority class"""
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority class: {priority}")
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        if self._running < self.concurrency and not any(self._queues.values()):
+            self._running += 1
+        else:
+            waiter = loop.create_future()
+            if not self._queues[priority]:
+                # A class that was idle must not bank credit from its idle time
+                self._pass[priority] = max(self._pass[priority], self._virtual_time)
+            self._queues[priority].append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just before the cancellation
+                    self._release()
+                elif waiter in self._queues[priority]:
+                    self._queues[priority].remove(waiter)
+                    # Requests queued behind it may fit in a free slot now
+                    self._dispatch()
+                raise
+
+        stats = self._stats[priority]
+        stats["waits"].append(loop.time() - started)
+        stats["granted"] += 1
+        stats["running"] += 1
+        try:
+            yield
+        finally:
+            stats["running"] -= 1
+            stats["completed"] += 1
+            self._release()
+
+    def _release(self):
+        self._running -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._running < self.concurrency:
+            queued = [name for name, queue in self._queues.items() if queue]
+            if not queued:
+                return
+            name = min(queued, key=lambda n: self._pass[n])
+            waiter = self._queues[name].popleft()
+            if waiter.done():
+                # Cancelled while queued, before its task could leave the queue
+                continue
+            self._virtual_time = self._pass[name]
+            self._pass[name] += 1.0 / self.weights[name]
+            self._running += 1
+            waiter.set_result(None)
+
+    def snapshot(self) -> dict:
+        classes = {}
+        for name, stats in self._stats.items():
+            classes[name] = {
+                "weight": self.weights[name],
+                "queued": len(self._queues[name]),
+                "running": stats["running"],
+                "granted": stats["granted"],
+                "completed": stats["completed"],
+                "p50_wait_seconds": percentile(stats["waits"], 0.50),
+                "p95_wait_seconds": percentile(stats["waits"], 0.95),
+            }
+        return {"concurrency": self.concurrency, "running": self._running, "classes": classes}
+
+
+scheduler = PriorityScheduler()
@@ -0,0 +1,111 @@
+import math
+import heapq
+import time
+from collections import Counter
+from typing import List, Optional
+from models import LandingPage
+from html_text import extract_visible_text, tokenize
+from languages import language_key
+
+# Matches in metadata count more than matches in the page body
+FIELD_BOOSTS = {"theme": 3.0, "company_name": 3.0, "language": 2.0, "target_action": 1.5, "text": 1.0}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class SearchIndex:
+    """
+    Incrementally updated inverted index over landing text and metadata,
+    ranked with BM25 using field-boosted term frequencies.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_length = {}
+        self._docs = {}
+        self._total_length = 0.0
+        self.last_query_ms = 0.0
+
+    def __contains__(self, landing_id: str) -> bool:
+        return landing_id in self._docs
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, landing: LandingPage):
+        """Index a landing, replacing any previous version of it"""
+        self.remove(landing.id)
+        fields = {
+            "theme": landing.theme,
+            "company_name": landing.metadata.company_name if landing.metadata else "",
+            "language": landing.language,
+            "target_action": landing.target_action,
+            "text": extract_visible_text(landing.html),
+        }
+        weights = Counter()
+        for field, value in fields.items():
+            for term in tokenize(value):
+                weights[term] += FIELD_BOOSTS[field]
+
+        for term, weight in weights.items():
+            self._postings.setdefault(term, {})[landing.id] = weight
+        length = sum(weights.values())
+        self._doc_terms[landing.id] = list(weights)
+        self._doc_length[landing.id] = length
+        self._total_length += length
+        self._docs[landing.id] = {
+            "id": landing.id,
+            "theme": landing.theme,
+            "language": landing.language,
+            "company_name": fields["company_name"],
+            "created_at": landing.created_at,
+        }
+
+    def remove(self, landing_id: str):
+        if landing_id not in self._docs:
+            return
+        for term in self._doc_terms.pop(landing_id):
+            postings = self._postings[term]
+            del postings[landing_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_length.pop(landing_id)
+        del self._docs[landing_id]
+
+    def search(self, query: str, language: Optional[str] = None, limit: int = 20) -> List[dict]:
+        started = time.perf_counter()
+        terms = set(tokenize(query))
+        doc_count = len(self._docs)
+        if not terms or not doc_count:
+            return []
+        avg_length = self._total_length / doc_count or 1.0
+        language = language_key(language) if language else None
+
+        doc_length = self._doc_length
+        constant = BM25_K1 * (1 - BM25_B)
+        per_length = BM25_K1 * BM25_B / avg_length
+        scores = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5)) * (BM25_K1 + 1)
+            for landing_id, tf in postings.items():
+                scores[landing_id] = scores.get(landing_id, 0.0) + idf * tf / (tf + constant + per_length * doc_length[landing_id])
+
+        candidates = scores.items()
+        if language:
+            docs = self._docs
+            candidates = [item for item in candidates if language_key(docs[item[0]]["language"]) == language]
+        top = heapq.nlargest(limit, candidates, key=lambda item: item[1])
+        results = [{**self._docs[landing_id], "score": round(score, 4)} for landing_id, score in top]
+        self.last_query_ms = (time.perf_counter() - started) * 1000
+        return results
+
+    def stats(self) -> dict:
+        return {"documents": len(self._docs), "terms": len(self._postings), "last_query_ms": self.last_query_ms}
+
+
+search_index = SearchIndex()
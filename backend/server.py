@@ -1,27 +1,88 @@
-from fastapi import FastAPI, APIRouter
-from dotenv import load_dotenv
+import startup_report
+startup_report.trace_imports()
+from fastapi import FastAPI, APIRouter, Response
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
 import os
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List
 import uuid
 from datetime import datetime, timezone
-from routes.landing_routes import router as landing_router
+from routes.landing_routes import router as landing_router, get_generator, landings_db, cancel_draft_upgrades
+from routes.ops_routes import router as ops_router
+from routes.profiling_routes import router as profiling_router
+from provider_client import load_chat_api, close_provider_client
+from landing_store import compact_periodically
+from token_budget import load_encodings
+import metrics
+import tracing
+import profiling
+from tracing import tracer
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection, opened on first use
+client = None
+
+
+def get_db():
+    global client
+    if client is None:
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    return client[os.environ['DB_NAME']]
+
+
+async def _prewarm():
+    """Open the Mongo and provider HTTP pools, load the provider SDK and tokenizers without delaying startup"""
+    async def warm_mongo():
+        with startup_report.timed("mongo", section="prewarm"):
+            await get_db().command("ping")
+
+    async def warm_provider():
+        with startup_report.timed("provider", section="prewarm"):
+            await asyncio.to_thread(load_chat_api)
+            await get_generator().provider.warm_connections()
+
+    async def warm_tokenizers():
+        with startup_report.timed("tiktoken", section="prewarm"):
+            await asyncio.to_thread(load_encodings)
+
+    results = await asyncio.gather(warm_mongo(), warm_provider(), warm_tokenizers(), return_exceptions=True)
+    for name, result in zip(("mongo", "provider", "tiktoken"), results):
+        if isinstance(result, Exception):
+            logger.warning("Prewarm of %s failed: %s", name, result)
+    startup_report.mark("prewarm_done")
+    startup_report.log_report()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_report.mark("app_startup")
+    prewarm_task = asyncio.create_task(_prewarm())
+    compact_task = asyncio.create_task(compact_periodically(landings_db))
+    if profiling.profiling_available():
+        profiling.loop_monitor.start()
+    yield
+    profiling.loop_monitor.stop()
+    profiling.profile_runs.stop()
+    prewarm_task.cancel()
+    compact_task.cancel()
+    await cancel_draft_upgrades()
+    landings_db.close()
+    await close_provider_client()
+    if client is not None:
+        client.close()
+
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -52,13 +113,15 @@ async def create_status_check(input: StatusCheckCreate):
     doc = status_obj.model_dump()
     doc['timestamp'] = doc['timestamp'].isoformat()
     
-    _ = await db.status_checks.insert_one(doc)
+    with tracer.span("mongo.insert_one", collection="status_checks"):
+        _ = await get_db().status_checks.insert_one(doc)
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
     # Exclude MongoDB's _id field from the query results
-    status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
+    with tracer.span("mongo.find", collection="status_checks"):
+        status_checks = await get_db().status_checks.find({}, {"_id": 0}).to_list(1000)
     
     # Convert ISO string timestamps back to datetime objects
     for check in status_checks:
@@ -69,25 +132,37 @@ async def get_status_checks():
 
 # Include landing page routes
 api_router.include_router(landing_router, tags=["Landing Pages"])
+api_router.include_router(ops_router, tags=["Operations"])
+api_router.include_router(profiling_router, tags=["Profiling"])
 
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    # Per worker process: scrape each worker, or run one worker per pod
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[tracing.REQUEST_ID_HEADER],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(tracing.RequestIdMiddleware)
+if profiling.profiling_available():
+    # Outermost, so a profiled request's own metrics and traces are part of the profile
+    app.add_middleware(profiling.RequestProfileMiddleware)
 
 # Configure logging
+tracing.install_log_request_ids()
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+startup_report.stop_tracing_imports()
+startup_report.mark("app_created")
@@ -0,0 +1,112 @@
+import os
+import heapq
+import random
+import hashlib
+from typing import List, Tuple
+from languages import language_key
+from html_text import tokenize
+
+SIMILARITY_THRESHOLD = float(os.getenv('SIMILARITY_THRESHOLD', '0.7'))
+
+# 16 bands of 4 rows: pairs above ~0.5 Jaccard almost always share a bucket
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS = NUM_PERMUTATIONS // BANDS
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+def shingles(theme: str, target_action: str) -> set:
+    """
+    Order-insensitive features of a request: theme words plus their character
+    trigrams, so reordered or slightly reworded themes overlap, and the target
+    action's words, which weigh less since a different CTA can be adapted.
+    """
+    features = set()
+    for token in tokenize(theme):
+        features.add(f"t:{token}")
+        padded = f" {token} "
+        for i in range(len(padded) - 2):
+            features.add(f"t3:{padded[i:i + 3]}")
+    for token in tokenize(target_action):
+        features.add(f"a:{token}")
+    return features
+
+
+def minhash(features: set) -> tuple:
+    hashes = [int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), "little") for f in features]
+    if not hashes:
+        return tuple([_PRIME] * NUM_PERMUTATIONS)
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+class SimilarityIndex:
+    """
+    MinHash/LSH index of (theme, target action) signatures per language.
+
+    Lookups only compare against landings sharing at least one LSH band,
+    so they stay fast as the store grows.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._signatures = {}
+        self._buckets = {}
+        self.lookups = 0
+        self.matches = 0
+
+    def __contains__(self, landing_id: str) -> bool:
+        return landing_id in self._signatures
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _bands(self, language: str, signature: tuple):
+        language = language_key(language)
+        for band in range(BANDS):
+            yield (language, band, signature[band * ROWS:(band + 1) * ROWS])
+
+    def add(self, landing_id: str, theme: str, language: str, target_action: str):
+        self.remove(landing_id)
+        signature = minhash(shingles(theme, target_action))
+        keys = list(self._bands(language, signature))
+        for key in keys:
+            self._buckets.setdefault(key, set()).add(landing_id)
+        self._signatures[landing_id] = (signature, keys)
+
+    def remove(self, landing_id: str):
+        entry = self._signatures.pop(landing_id, None)
+        if entry is None:
+            return
+        for key in entry[1]:
+            bucket = self._buckets[key]
+            bucket.discard(landing_id)
+            if not bucket:
+                del self._buckets[key]
+
+    def find(self, theme: str, language: str, target_action: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Return (landing id, estimated Jaccard similarity) of the closest matches above the threshold"""
+        self.lookups += 1
+        signature = minhash(shingles(theme, target_action))
+        candidates = set()
+        for key in self._bands(language, signature):
+            candidates |= self._buckets.get(key, set())
+
+        matches = []
+        for landing_id in candidates:
+            other = self._signatures[landing_id][0]
+            score = sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERMUTATIONS
+            if score >= self.threshold:
+                matches.append((landing_id, score))
+        if matches:
+            self.matches += 1
+        return heapq.nlargest(limit, matches, key=lambda match: match[1])
+
+    def stats(self) -> dict:
+        return {"landings": len(self._signatures), "buckets": len(self._buckets),
+                "threshold": self.threshold, "lookups": self.lookups, "matches": self.matches}
+
+
+similarity_index = SimilarityIndex()
@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Taken as early as possible: server.py imports this module first
+PROCESS_START = time.perf_counter()
+# Modules listed in the startup log; the report has all of them
+LOG_TOP_IMPORTS = 20
+# Only imports of modules in this directory report errors; libraries catch their own optional imports
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_timings = {"imports": [], "prewarm": []}
+_phases = {}
+# Time spent in nested timed blocks, per open block
+_children = []
+
+
+@contextmanager
+def timed(name: str, section: str = "imports", record_errors: bool = True):
+    """
+    Record how long the wrapped block (an import by default) takes, and how
+    much of it was not spent in nested timed blocks. A block that raises is
+    recorded as failed with its error, unless record_errors is False.
+    """
+    start = time.perf_counter()
+    _children.append(0.0)
+    item = {"name": name, "ok": True}
+    try:
+        yield
+    except BaseException as e:
+        if record_errors:
+            item["ok"] = False
+            item["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        nested = _children.pop()
+        if _children:
+            _children[-1] += seconds
+        item["seconds"] = round(seconds, 4)
+        item["self_seconds"] = round(seconds - nested, 4)
+        _timings[section].append(item)
+
+
+class _ImportTimer:
+    """
+    Meta path finder that times the execution of every module imported while
+    it is installed. The loader's exec_module is wrapped for one execution
+    only and restored before the module runs.
+    """
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        # Built-in and frozen importers are classes shared by all their modules; leave them alone
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return spec
+        try:
+            state = vars(loader)
+        except TypeError:
+            return spec
+        # A find_spec not followed by an import (importlib.util.find_spec) leaves its wrapper behind
+        leftover = getattr(state.get("exec_module"), "restore", None)
+        if leftover is not None:
+            leftover()
+        exec_module = loader.exec_module
+        had_own = "exec_module" in state
+        own = state.get("exec_module")
+        origin = os.path.abspath(spec.origin) if spec.origin else ""
+        app_module = origin.startswith(APP_DIR + os.sep) and "site-packages" not in origin
+
+        def restore():
+            _wrapped.discard(restore)
+            if state.get("exec_module") is not timed_exec_module:
+                return
+            if had_own:
+                state["exec_module"] = own
+            else:
+                del state["exec_module"]
+
+        def timed_exec_module(module):
+            restore()
+            with timed(name, record_errors=app_module):
+                exec_module(module)
+
+        timed_exec_module.restore = restore
+        state["exec_module"] = timed_exec_module
+        _wrapped.add(restore)
+        return spec
+
+
+_import_timer = _ImportTimer()
+# Restore functions of the loaders currently wrapped
+_wrapped = set()
+
+
+def trace_imports():
+    """Time each module imported from now on, nested imports included"""
+    if _import_timer not in sys.meta_path:
+        sys.meta_path.insert(0, _import_timer)
+
+
+def stop_tracing_imports():
+    if _import_timer in sys.meta_path:
+        sys.meta_path.remove(_import_timer)
+    for restore in list(_wrapped):
+        restore()
+
+
+def mark(phase: str):
+    """Record the time since process start at which a startup phase was reached"""
+    _phases[phase] = round(time.perf_counter() - PROCESS_START, 4)
+
+
+def report() -> dict:
+    """Return import and prewarm timings (slowest first, by time outside nested imports) and startup phases"""
+    return {
+        **{
+            section: sorted(items, key=lambda item: item["self_seconds"], reverse=True)
+            for section, items in _timings.items()
+        },
+        "failures": [dict(item, section=section) for section, items in _timings.items()
+                     for item in items if not item["ok"]],
+        "phases": dict(_phases),
+        "uptime_seconds": round(time.perf_counter() - PROCESS_START, 4),
+    }
+
+
+def log_report():
+    data = report()
+    for section in _timings:
+        items = data[section][:LOG_TOP_IMPORTS] if section == "imports" else data[section]
+        for item in items:
+            logger.info("%-8s %-40s %.4fs (self %.4fs)%s", section, item["name"], item["seconds"],
+                        item["self_seconds"], "" if item["ok"] else " FAILED")
+    for item in data["failures"]:
+        logger.warning("%-8s %-40s failed: %s", item["section"], item["name"], item["error"])
+    for phase, seconds in data["phases"].items():
+        logger.info("%-8s %-40s %.4fs", "phase", phase, seconds)
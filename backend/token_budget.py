@@ -0,0 +1,169 @@
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Context window and maximum completion size per model, in tokens
+MODEL_LIMITS = {
+    "gpt-4o-mini": {"context": 128000, "max_output": 16384},
+    "gpt-4o": {"context": 128000, "max_output": 16384},
+    "gpt-4.1-mini": {"context": 1047576, "max_output": 32768},
+    "gemini-2.0-flash": {"context": 1048576, "max_output": 8192},
+}
+DEFAULT_LIMITS = {"context": 128000, "max_output": 4096}
+
+# Providers only cache prompt prefixes of at least this many tokens
+MIN_CACHEABLE_PREFIX_TOKENS = 1024
+
+
+# Loaded tiktoken encodings per model; None when tiktoken could not provide one
+_encodings = {}
+
+
+def load_encodings(models=tuple(MODEL_LIMITS)):
+    """
+    Load the tiktoken encodings of `models`. tiktoken downloads its
+    vocabularies on first use, so call this off the event loop (prewarm);
+    counting never loads them itself.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return
+    for model in models:
+        if model in _encodings:
+            continue
+        try:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning("tiktoken unavailable for %s, estimating tokens: %s", model, e)
+            _encodings[model] = None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Count tokens with a loaded tiktoken encoding, or estimate ~4 characters per token"""
+    if not text:
+        return 0
+    encoding = _encodings.get(model)
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text))
+
+
+class TokenBudgetAnalyser:
+    """
+    Per-strategy prompt/completion token accounting.
+
+    Warns when a prompt leaves too little room for the expected completion,
+    or when a completion came close enough to the output limit that it was
+    probably truncated.
+    """
+
+    def __init__(self, warn_ratio: float = 0.9):
+        self.warn_ratio = warn_ratio
+        self._strategies = {}
+
+    def _strategy(self, name: str) -> dict:
+        if name not in self._strategies:
+            self._strategies[name] = {
+                "prompts": 0, "prompt_tokens": 0, "max_prompt_tokens": 0, "cacheable_prefix_tokens": 0,
+                "completions": 0, "completion_tokens": 0, "max_completion_tokens": 0,
+                "warnings": 0,
+            }
+        return self._strategies[name]
+
+    def check_prompt(self, strategy: str, model: str, prompt: str, system_message: str = "",
+                     cacheable_prefix: str = "", expected_completion_tokens: int = None) -> dict:
+        limits = MODEL_LIMITS.get(model, DEFAULT_LIMITS)
+        expected = expected_completion_tokens or limits["max_output"]
+        prompt_tokens = count_tokens(system_message, model) + count_tokens(prompt, model)
+        prefix_tokens = count_tokens(system_message, model) + count_tokens(cacheable_prefix, model)
+        report = {
+            "strategy": strategy,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "cacheable_prefix_tokens": prefix_tokens,
+            "prefix_cacheable": prefix_tokens >= MIN_CACHEABLE_PREFIX_TOKENS,
+            "remaining_for_completion": limits["context"] - prompt_tokens,
+            "warnings": [],
+        }
+        if prompt_tokens + expected > limits["context"] * self.warn_ratio:
+            report["warnings"].append(
+                f"prompt of {prompt_tokens} tokens leaves {report['remaining_for_completion']} tokens "
+                f"for an expected {expected}-token completion"
+            )
+        if expected_completion_tokens and expected_completion_tokens > limits["max_output"]:
+            report["warnings"].append(
+                f"expected completion of {expected_completion_tokens} tokens exceeds the "
+                f"{limits['max_output']}-token output limit of {model}"
+            )
+
+        stats = self._strategy(strategy)
+        stats["prompts"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["max_prompt_tokens"] = max(stats["max_prompt_tokens"], prompt_tokens)
+        stats["cacheable_prefix_tokens"] = prefix_tokens
+        self._warn(stats, report["warnings"])
+        return report
+
+    def record_completion(self, strategy: str, model: str, completion: str) -> int:
+        limits = MODEL_LIMITS.get(model, DEFAULT_LIMITS)
+        completion_tokens = count_tokens(completion, model)
+        stats = self._strategy(strategy)
+        stats["completions"] += 1
+        stats["completion_tokens"] += completion_tokens
+        stats["max_completion_tokens"] = max(stats["max_completion_tokens"], completion_tokens)
+        if completion_tokens >= limits["max_output"] * self.warn_ratio:
+            self._warn(stats, [
+                f"completion of {completion_tokens} tokens is close to the "
+                f"{limits['max_output']}-token output limit of {model} and may be truncated"
+            ])
+        return completion_tokens
+
+    def _warn(self, stats: dict, warnings: list):
+        for warning in warnings:
+            stats["warnings"] += 1
+            logger.warning("Token budget: %s", warning)
+
+    def snapshot(self) -> dict:
+        strategies = {}
+        for name, stats in self._strategies.items():
+            stats = dict(stats)
+            stats["avg_prompt_tokens"] = stats["prompt_tokens"] / stats["prompts"] if stats["prompts"] else 0.0
+            stats["avg_completion_tokens"] = (
+                stats["completion_tokens"] / stats["completions"] if stats["completions"] else 0.0
+            )
+            strategies[name] = stats
+        return {"strategies": strategies}
+
+
+token_budget = TokenBudgetAnalyser()
+
+
+if __name__ == "__main__":
+    # Offline report of the prompt builders of every generator strategy
+    import importlib
+
+    sample = ("Online English courses", "English", "Google Ads", "Sign up")
+    builders = {
+        "final": ("landing_generator_final", "_create_html_prompt", "HTML_PROMPT_PREFIX"),
+        "v4": ("landing_generator_v4", "_create_epic_prompt", "EPIC_PROMPT_PREFIX"),
+        "v3": ("landing_generator_v3", "_create_html_prompt", "HTML_PROMPT_PREFIX"),
+        "v2": ("landing_generator_v2", "_create_html_prompt", "HTML_PROMPT_PREFIX"),
+    }
+    load_encodings()
+    analyser = TokenBudgetAnalyser()
+    for strategy, (module_name, method, prefix_name) in builders.items():
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            print(f"{strategy:6} skipped: {e}")
+            continue
+        prompt = getattr(module.LandingPageGenerator, method)(None, *sample)
+        report = analyser.check_prompt(strategy, "gpt-4o-mini", prompt,
+                                       cacheable_prefix=getattr(module, prefix_name))
+        print(f"{strategy:6} prompt={report['prompt_tokens']:6} cacheable_prefix={report['cacheable_prefix_tokens']:6} "
+              f"prefix_cacheable={report['prefix_cacheable']}")
@@ -0,0 +1,263 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import asyncio
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+# off: spans are no-ops; stdout: one JSON line per trace on stdout; file: appended to TRACE_FILE
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'off')
+TRACE_FILE = os.getenv('TRACE_FILE', str(Path(__file__).parent / 'data' / 'traces.jsonl'))
+# Only export traces whose root span took at least this long
+TRACE_MIN_SECONDS = float(os.getenv('TRACE_MIN_SECONDS', '0'))
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_VALID_REQUEST_ID = re.compile(r"[\w.:-]{1,128}")
+
+_current_span = ContextVar("trace_span", default=None)
+_request_id = ContextVar("request_id", default=None)
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+class Span:
+    __slots__ = ("name", "trace", "span_id", "parent_id", "started", "ended", "attributes", "status", "error")
+
+    def __init__(self, name: str, trace: "_Trace", parent_id: str, attributes: dict):
+        self.name = name
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.started = time.perf_counter()
+        self.ended = None
+        self.attributes = attributes
+        self.status = "ok"
+        self.error = None
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ms": round((self.started - self.trace.started) * 1000, 3),
+            "duration_ms": round(((self.ended or time.perf_counter()) - self.started) * 1000, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    def set(self, key: str, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Trace:
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.started = time.perf_counter()
+        self.wall_started = datetime.now(timezone.utc)
+        self.spans = []
+        self.finished = False
+
+    def to_dict(self) -> dict:
+        root = self.spans[0]
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "started_at": self.wall_started.isoformat(),
+            "duration_ms": round((root.ended - root.started) * 1000, 3),
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+
+class StdoutExporter:
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def export(self, trace: _Trace):
+        line = json.dumps(trace.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+
+class FileExporter:
+    """Appends one JSON line per trace; O_APPEND keeps lines from several workers whole"""
+
+    def __init__(self, path: str = TRACE_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def export(self, trace: _Trace):
+        line = json.dumps(trace.to_dict(), ensure_ascii=False, default=str) + "\n"
+        os.write(self._fd, line.encode())
+
+
+def create_exporter(kind: str = TRACE_EXPORTER):
+    if kind == "off":
+        return None
+    if kind == "stdout":
+        return StdoutExporter()
+    if kind == "file":
+        return FileExporter()
+    raise ValueError(f"Unknown TRACE_EXPORTER: {kind}")
+
+
+class Tracer:
+    """
+    Nested spans carried in a context variable, so they follow asyncio tasks.
+
+    A span opened with no parent (or after its parent's trace has ended, as
+    in background tasks a request spawned) starts a new trace, identified by
+    the current request id. A trace is exported once its root span ends.
+    """
+
+    def __init__(self, exporter=None, min_seconds: float = TRACE_MIN_SECONDS):
+        self.exporter = exporter
+        self.min_seconds = min_seconds
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        if self.exporter is None:
+            yield _NOOP_SPAN
+            return
+        parent = _current_span.get()
+        if parent is None or parent.trace.finished:
+            trace = _Trace(_request_id.get() or uuid.uuid4().hex)
+            parent_id = None
+        else:
+            trace = parent.trace
+            parent_id = parent.span_id
+        span = Span(name, trace, parent_id, attributes)
+        trace.spans.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except asyncio.CancelledError:
+            span.status = "cancelled"
+            raise
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"[:500]
+            raise
+        finally:
+            span.ended = time.perf_counter()
+            _current_span.reset(token)
+            if parent_id is None:
+                trace.finished = True
+                if span.ended - span.started >= self.min_seconds:
+                    try:
+                        self.exporter.export(trace)
+                    except Exception as e:
+                        logging.getLogger(__name__).warning("Trace export failed: %s", e)
+
+
+tracer = Tracer(create_exporter())
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware giving every request an id (the caller's X-Request-ID if
+    valid, a new one otherwise), echoed in the response and traced as the root span.
+    """
+
+    def __init__(self, app, tracer: Tracer = tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        incoming = dict(scope["headers"]).get(REQUEST_ID_HEADER.lower().encode(), b"").decode("latin-1")
+        request_id = incoming if _VALID_REQUEST_ID.fullmatch(incoming) else uuid.uuid4().hex
+        token = _request_id.set(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER.lower().encode(), request_id.encode())
+                ]
+                span.set("status_code", message["status"])
+            await send(message)
+
+        try:
+            with self.tracer.span(f"{scope['method']} {scope['path']}", path=scope["path"]) as span:
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    route = scope.get("route")
+                    if route is not None and isinstance(span, Span):
+                        span.name = f"{scope['method']} {route.path}"
+        finally:
+            _request_id.reset(token)
+
+
+def install_log_request_ids():
+    """Give every log record a request_id attribute for the log format"""
+    factory = logging.getLogRecordFactory()
+
+    def record_factory(*args, **kwargs):
+        record = factory(*args, **kwargs)
+        record.request_id = _request_id.get() or "-"
+        return record
+
+    logging.setLogRecordFactory(record_factory)
+
+
+def _print_trace(trace: dict):
+    print(f"{trace['trace_id']}  {trace['name']}  {trace['duration_ms']:.1f} ms  ({trace['started_at']})")
+    children = {}
+    for span in trace["spans"]:
+        children.setdefault(span["parent_id"], []).append(span)
+
+    def walk(parent_id, depth):
+        for span in children.get(parent_id, []):
+            flags = "" if span["status"] == "ok" else f"  [{span['status']}{': ' + span['error'] if span['error'] else ''}]"
+            attributes = " ".join(f"{k}={v}" for k, v in span["attributes"].items())
+            print(f"  {'  ' * depth}{span['name']:<{max(1, 44 - 2 * depth)}} +{span['start_ms']:9.1f} "
+                  f"{span['duration_ms']:9.1f} ms  {attributes}{flags}")
+            walk(span["span_id"], depth + 1)
+
+    walk(None, 0)
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show exported traces as span trees")
+    parser.add_argument("path", nargs="?", default=TRACE_FILE)
+    parser.add_argument("--request-id", help="only this request")
+    parser.add_argument("--slowest", type=int, default=10, help="show the N slowest traces")
+    parser.add_argument("--name", help="only traces whose root name contains this, e.g. generate-landing")
+    args = parser.parse_args()
+
+    with open(args.path, encoding="utf-8") as f:
+        traces = [json.loads(line) for line in f if line.strip()]
+    if args.request_id:
+        traces = [t for t in traces if t["trace_id"] == args.request_id]
+    if args.name:
+        traces = [t for t in traces if args.name in t["name"]]
+    for trace in sorted(traces, key=lambda t: t["duration_ms"], reverse=True)[:args.slowest]:
+        _print_trace(trace)
@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+from token_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+USAGE_LEDGER_SIZE = int(os.getenv('USAGE_LEDGER_SIZE', '50000'))
+
+# USD per 1M (prompt, completion) tokens; extend or override with LLM_PRICING='{"model": [in, out]}'
+MODEL_PRICING = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "claude-3-5-haiku-20241022": (0.80, 4.00),
+    "claude-3-7-sonnet-20250219": (3.00, 15.00),
+}
+
+
+def _pricing_overrides(value: str) -> dict:
+    """Parse LLM_PRICING, skipping (and logging) anything that is not {"model": [in, out]}"""
+    try:
+        overrides = json.loads(value)
+    except ValueError as e:
+        logger.warning("Ignoring LLM_PRICING, not valid JSON: %s", e)
+        return {}
+    if not isinstance(overrides, dict):
+        logger.warning("Ignoring LLM_PRICING, expected a JSON object of model: [input, output]")
+        return {}
+    pricing = {}
+    for model, price in overrides.items():
+        if (isinstance(price, list) and len(price) == 2
+                and all(isinstance(p, (int, float)) and not isinstance(p, bool) for p in price)):
+            pricing[model] = tuple(price)
+        else:
+            logger.warning("Ignoring LLM_PRICING entry for %s, expected [input, output] USD per 1M tokens", model)
+    return pricing
+
+
+MODEL_PRICING.update(_pricing_overrides(os.getenv('LLM_PRICING', '{}')))
+
+
+def cost_usd(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    price = MODEL_PRICING.get(model)
+    if price is None:
+        return None
+    return round((prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000, 6)
+
+
+class _CallRecord:
+    response = None
+
+    def completed(self, response: str):
+        self.response = response
+
+
+class UsageCollector:
+    """
+    Token, latency and attempt accounting for one generation.
+
+    Prompt tokens of a call include the system message and the earlier turns
+    of its conversation, since the chat resends them. Calls of hedged attempts
+    that lost or failed are kept too: they were paid for.
+    """
+
+    def __init__(self, strategy: str, profile: str = None):
+        self.strategy = strategy
+        self.profile = profile
+        self.started = time.perf_counter()
+        self.calls = []
+        self.attempts = 0
+        self.winner = None
+        self._context_tokens = {}
+
+    def attempt(self):
+        self.attempts += 1
+
+    def succeeded(self, provider: str, model: str):
+        if self.winner is None:
+            self.winner = (provider, model)
+
+    @contextmanager
+    def call(self, name: str, chat, text: str, system_message: str = ""):
+        context = self._context_tokens.get(chat.session_id)
+        if context is None:
+            context = count_tokens(system_message, chat.model) if system_message else 0
+        prompt_tokens = context + count_tokens(text, chat.model)
+        record = _CallRecord()
+        status = "ok"
+        started = time.perf_counter()
+        try:
+            yield record
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            completion_tokens = count_tokens(record.response, chat.model) if record.response else 0
+            self._context_tokens[chat.session_id] = prompt_tokens + completion_tokens
+            self.calls.append({
+                "call": name,
+                "provider": chat.provider,
+                "model": chat.model,
+                "status": status,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "latency_seconds": round(time.perf_counter() - started, 3),
+                "cost_usd": cost_usd(chat.model, prompt_tokens, completion_tokens),
+            })
+
+    def finish(self) -> dict:
+        prompt_tokens = sum(call["prompt_tokens"] for call in self.calls)
+        completion_tokens = sum(call["completion_tokens"] for call in self.calls)
+        costs = [call["cost_usd"] for call in self.calls]
+        if self.winner:
+            provider, model = self.winner
+        elif self.calls:
+            provider, model = self.calls[-1]["provider"], self.calls[-1]["model"]
+        else:
+            provider = model = ""
+        return {
+            "strategy": self.strategy,
+            "profile": self.profile,
+            "provider": provider,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            # Unknown when any call used a model missing from the pricing table
+            "cost_usd": round(sum(costs), 6) if costs and None not in costs else None,
+            "latency_seconds": round(time.perf_counter() - self.started, 3),
+            "attempts": self.attempts,
+            "retries": max(0, self.attempts - 1),
+            "calls": self.calls,
+        }
+
+
+class UsageLedger:
+    """Recent usage records of this worker, aggregated on demand"""
+
+    def __init__(self, max_records: int = USAGE_LEDGER_SIZE):
+        self._records = deque()
+        self._keys = set()
+        self.max_records = max_records
+
+    def add(self, key: tuple, created_at: datetime, language: str, theme: str, usage):
+        if key in self._keys:
+            return
+        self._keys.add(key)
+        self._records.append((key, created_at, language, theme, usage))
+        if len(self._records) > self.max_records:
+            self._keys.discard(self._records.popleft()[0])
+
+    @staticmethod
+    def _summary(records: list) -> dict:
+        known_costs = [usage.cost_usd for *_, usage in records if usage.cost_usd is not None]
+        return {
+            "generations": len(records),
+            "prompt_tokens": sum(usage.prompt_tokens for *_, usage in records),
+            "completion_tokens": sum(usage.completion_tokens for *_, usage in records),
+            "cost_usd": round(sum(known_costs), 6),
+            "unpriced_generations": len(records) - len(known_costs),
+            "avg_latency_seconds": round(sum(usage.latency_seconds for *_, usage in records) / len(records), 3) if records else 0.0,
+            "retries": sum(usage.retries for *_, usage in records),
+        }
+
+    def report(self, hours: float = 24, now: datetime = None) -> dict:
+        now = now or datetime.utcnow()
+        since = now - timedelta(hours=hours)
+        records = [record for record in self._records if record[1] >= since]
+
+        groups = {"language": {}, "theme": {}, "strategy": {}, "profile": {}, "model": {}}
+        hourly = {}
+        for record in records:
+            _, created_at, language, theme, usage = record
+            for field, value in (("language", language), ("theme", theme),
+                                 ("strategy", usage.strategy), ("profile", usage.profile or "-"),
+                                 ("model", usage.model)):
+                groups[field].setdefault(value, []).append(record)
+            hourly.setdefault(created_at.replace(minute=0, second=0, microsecond=0), []).append(record)
+
+        totals = self._summary(records)
+        return {
+            "window_hours": hours,
+            "totals": totals,
+            "throughput_per_hour": round(totals["generations"] / hours, 3) if hours else 0.0,
+            "cost_per_hour_usd": round(totals["cost_usd"] / hours, 6) if hours else 0.0,
+            "hourly": [{"hour": hour.isoformat(), **self._summary(bucket)} for hour, bucket in sorted(hourly.items())],
+            **{f"by_{field}": {value: self._summary(bucket) for value, bucket in grouped.items()}
+               for field, grouped in groups.items()},
+        }
+
+
+usage_ledger = UsageLedger()
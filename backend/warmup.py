@@ -0,0 +1,106 @@
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import logging
+from typing import Awaitable, Callable, List
+
+logger = logging.getLogger(__name__)
+
+WARMUP_CONCURRENCY = int(os.getenv('WARMUP_CONCURRENCY', '2'))
+# Finished jobs stay queryable this long, and at most this many of them
+WARMUP_JOB_TTL_SECONDS = float(os.getenv('WARMUP_JOB_TTL_HOURS', '24')) * 3600
+WARMUP_MAX_FINISHED_JOBS = int(os.getenv('WARMUP_MAX_FINISHED_JOBS', '100'))
+
+
+class WarmupJob:
+    """Progress of one cache warming run"""
+
+    def __init__(self, total: int, concurrency: int):
+        self.id = str(uuid.uuid4())
+        self.total = total
+        self.concurrency = concurrency
+        self.skipped = 0
+        self.generated = 0
+        self.failed = 0
+        self.errors = []
+        self.started_at = time.time()
+        self.finished_at = None
+        self.task = None
+
+    def to_dict(self) -> dict:
+        done = self.skipped + self.generated + self.failed
+        return {
+            "id": self.id,
+            "total": self.total,
+            "concurrency": self.concurrency,
+            "skipped": self.skipped,
+            "generated": self.generated,
+            "failed": self.failed,
+            "pending": self.total - done,
+            "errors": self.errors[-20:],
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def prune_jobs(jobs: dict, ttl_seconds: float = WARMUP_JOB_TTL_SECONDS,
+               max_finished: int = WARMUP_MAX_FINISHED_JOBS):
+    """Forget finished jobs past the TTL, then the oldest finished ones over the limit; running jobs stay"""
+    now = time.time()
+    finished = sorted((job for job in jobs.values() if job.finished_at is not None), key=lambda job: job.finished_at)
+    for index, job in enumerate(finished):
+        if now - job.finished_at > ttl_seconds or index < len(finished) - max_finished:
+            del jobs[job.id]
+
+
+async def run_warmup(job: WarmupJob, specs: List, is_fresh: Callable[[object], bool],
+                     generate: Callable[[object], Awaitable]):
+    """
+    Pre-generate every spec that has no fresh landing yet, running at most
+    `job.concurrency` generations at a time.
+    """
+    budget = asyncio.Semaphore(job.concurrency)
+
+    async def warm(spec):
+        if is_fresh(spec):
+            job.skipped += 1
+            return
+        async with budget:
+            # Another spec in this run may have produced the same entry meanwhile
+            if is_fresh(spec):
+                job.skipped += 1
+                return
+            try:
+                await generate(spec)
+                job.generated += 1
+            except Exception as e:
+                job.failed += 1
+                job.errors.append(f"{spec.theme} / {spec.language}: {e}")
+                logger.warning("Warmup of %s / %s failed: %s", spec.theme, spec.language, e)
+
+    try:
+        await asyncio.gather(*(warm(spec) for spec in specs))
+    finally:
+        job.finished_at = time.time()
+        logger.info("Warmup %s finished: %s", job.id, job.to_dict())
+    return job
+
+
+if __name__ == "__main__":
+    # Off-peak usage, e.g. from cron: python warmup.py specs.json http://localhost:8001
+    import requests
+
+    with open(sys.argv[1]) as f:
+        specs = json.load(f)
+    base_url = sys.argv[2] if len(sys.argv) > 2 else "http://localhost:8001"
+    response = requests.post(f"{base_url}/api/warmup", json={"specs": specs}, timeout=30)
+    response.raise_for_status()
+    job = response.json()
+    while job["finished_at"] is None:
+        time.sleep(10)
+        job = requests.get(f"{base_url}/api/warmup/{job['id']}", timeout=30).json()
+        print(f"generated={job['generated']} skipped={job['skipped']} failed={job['failed']} pending={job['pending']}")
+    print(json.dumps(job, indent=2))
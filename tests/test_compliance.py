@@ -0,0 +1,60 @@
+from compliance import ComplianceScanner, PhraseMatcher
+from html_text import token_spans
+from languages import language_code
+
+
+def tokens(text: str):
+    return [token for token, _, _ in token_spans(text)]
+
+
+def matched(phrases, text: str):
+    matcher = PhraseMatcher([tuple(tokens(phrase)) for phrase in phrases])
+    return [(phrases[index], end) for index, end in matcher.find(tokens(text))]
+
+
+def test_overlapping_and_nested_phrases_all_match():
+    phrases = ["guaranteed", "guaranteed results", "results in days", "in days"]
+
+    found = matched(phrases, "Guaranteed results in days!")
+
+    assert sorted(found) == [("guaranteed", 0), ("guaranteed results", 1), ("in days", 3), ("results in days", 3)]
+
+
+def test_match_after_failed_partial_phrase():
+    found = matched(["lose weight fast", "weight fast"], "lose lose weight and weight fast")
+
+    assert found == [("weight fast", 5)]
+
+
+def test_only_whole_words_match():
+    assert matched(["cure", "free money"], "A secure, freely given money-back offer") == []
+    assert matched(["cure"], "No cure, no pay") == [("cure", 1)]
+
+
+def test_non_latin_scripts():
+    phrases = ["гарантированный результат", "без риска", "быстро"]
+
+    found = matched(phrases, "Гарантированный результат — без риска! Быстрое похудение.")
+
+    assert found == [("гарантированный результат", 1), ("без риска", 3)]
+
+
+def test_scanner_uses_language_rules_and_common_rules(tmp_path):
+    (tmp_path / "common.txt").write_text("health|100% cure\n", encoding="utf-8")
+    (tmp_path / "ru.txt").write_text("# comment\nfinance|без риска\nbroken line\n", encoding="utf-8")
+    scanner = ComplianceScanner(str(tmp_path))
+
+    report = scanner.scan("<p>Без риска и 100% cure.</p><script>var x = 'без риска';</script>", "Русский")
+
+    assert report.language == "ru"
+    assert not report.compliant
+    assert [(f.category, f.phrase, f.count) for f in report.findings] == [
+        ("finance", "без риска", 1), ("health", "100% cure", 1),
+    ]
+
+
+def test_language_code_normalizes_names_and_codes():
+    assert language_code("  English ") == "en"
+    assert language_code("Українська") == "uk"
+    assert language_code("pt-BR") == "pt"
+    assert language_code("Klingon") == "en"
@@ -0,0 +1,69 @@
+from html_repair import MIN_OVERLAP, HtmlValidator, continue_with, repair_html
+
+RULES = "".join(f".card-{i % 4}{{padding:{i % 4}px}}\n" for i in range(12))
+END = "</style></head><body><h1>Hi</h1></body></html>"
+
+
+def cut_page(html: str) -> HtmlValidator:
+    validator = HtmlValidator()
+    validator.feed(html)
+    return validator
+
+
+def test_continuation_starting_like_the_end_of_the_page_is_kept():
+    # The page ends with rules the continuation legitimately repeats (e.g. for another breakpoint)
+    head = "<!DOCTYPE html><html><head><style>\n" + RULES
+    continuation = RULES + "@media (max-width:600px){.card-0{padding:0}}\n" + END
+    assert len(RULES) < MIN_OVERLAP
+
+    validator = continue_with(cut_page(head), continuation)
+
+    assert validator.complete
+    assert validator.html() == head + continuation
+
+
+def test_restarted_tag_is_not_repeated():
+    head = '<!DOCTYPE html><html><body>\n<section class="hero">\n  <div cla'
+
+    validator = continue_with(cut_page(head), '<div class="inner">Go</div></section></body></html>')
+
+    assert validator.complete
+    assert validator.html() == head[:-len("<div cla")] + '<div class="inner">Go</div></section></body></html>'
+
+
+def test_restarted_lines_are_not_repeated():
+    lines = "".join(f"<p>Paragraph {i} with enough text to matter.</p>\n" for i in range(10))
+    head = "<!DOCTYPE html><html><body>\n" + lines + "<p>Last one, cut"
+    restart = lines[lines.index("<p>Paragraph 4"):] + "<p>Last one, cut"
+    assert len(restart) >= MIN_OVERLAP
+
+    validator = continue_with(cut_page(head), restart + " short.</p></body></html>")
+
+    assert validator.complete
+    assert validator.html() == head + " short.</p></body></html>"
+
+
+def test_continuation_inside_style():
+    head = "<!DOCTYPE html><html><head><style>\n.a{color:red}\n.b{margin:"
+    validator = cut_page(head)
+    assert validator.truncated_in() == "style"
+
+    validator = continue_with(validator, "0 auto}\n" + END)
+
+    assert validator.complete
+    assert ".b{margin:0 auto}\n</style>" in validator.html()
+
+
+def test_truncation_inside_script_is_closed():
+    validator = cut_page("<!DOCTYPE html><html><body><p>Hi</p><script>var a = 1;\nif (a<b) {")
+
+    assert validator.truncated_in() == "script"
+    assert validator.open_elements == ["html", "body", "script"]
+    assert validator.repaired() == "<!DOCTYPE html><html><body><p>Hi</p><script></script></body></html>"
+
+
+def test_repair_html_closes_a_cut_off_fragment():
+    html, complete = repair_html('<section id="faq"><h2>FAQ</h2><ul><li>One</li><li>Tw</li><li cl')
+
+    assert not complete
+    assert html == '<section id="faq"><h2>FAQ</h2><ul><li>One</li><li>Tw</li></ul></section>'
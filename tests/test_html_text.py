@@ -0,0 +1,31 @@
+from html_text import extract_visible_text, replace_visible_text
+
+PAGE = (
+    '<html><head><title>Buy</title><style>.Buy-btn{color:red}</style></head>'
+    '<body class="Buy"><a href="/Buy?x=1" class="Buy-btn">Buy</a>'
+    '<p>Buyers love it. Buy now!</p><script>var Buy = 1; if (a<b) {}</script></body></html>'
+)
+
+
+def test_replace_visible_text_leaves_markup_css_and_scripts_alone():
+    html = replace_visible_text(PAGE, "Buy", "Sign up")
+
+    assert '<a href="/Buy?x=1" class="Buy-btn">Sign up</a>' in html
+    assert "<p>Buyers love it. Sign up now!</p>" in html
+    assert '<body class="Buy">' in html
+    assert ".Buy-btn{color:red}" in html
+    assert "var Buy = 1; if (a<b) {}" in html
+    assert "<title>Buy</title>" in html
+
+
+def test_replace_visible_text_escapes_the_replacement():
+    html = replace_visible_text("<p>Buy</p>", "Buy", "Get <more> & save")
+
+    assert html == "<p>Get &lt;more&gt; &amp; save</p>"
+    assert extract_visible_text(html) == "Get <more> & save"
+
+
+def test_replace_visible_text_handles_multiline_pages():
+    html = replace_visible_text("<div>\n  <p>\n    Join\n  </p>\n</div>\n<p>Join us</p>", "Join", "Войти")
+
+    assert html == "<div>\n  <p>\n    Войти\n  </p>\n</div>\n<p>Войти us</p>"
@@ -0,0 +1,14 @@
+from landing_cache import LandingCache, spec_key
+
+
+def test_newest_warmed_landing_keeps_the_entry():
+    cache = LandingCache(ttl_seconds=3600)
+    key = spec_key("Yoga", "English", "fb", "Book", "full")
+
+    cache.put(key, "new", created_at=2000.0)
+    cache.put(key, "old", created_at=1000.0)
+
+    assert cache.get(key, max_age_seconds=float("inf")) == "new"
+    assert cache.get(spec_key(" yoga", "ENGLISH", "fb", "book ", "full"), max_age_seconds=float("inf")) == "new"
+    assert cache.get(spec_key("Yoga", "English", "fb", "Book", "fast"), max_age_seconds=float("inf")) is None
+    assert cache.get(key) is None
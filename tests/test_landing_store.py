@@ -0,0 +1,246 @@
+import fcntl
+import os
+import subprocess
+import sys
+import zlib
+from pathlib import Path
+
+import pytest
+
+from chunk_store import externalize_assets
+from landing_store import LogStructuredLandingStore, _HEADER
+from models import LandingPage
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+CSS = "".join(f".block-{i}{{margin:{i}px;padding:{i}px;color:#{i:03x}}}\n" for i in range(200))
+
+
+def make_landing(landing_id: str, text: str = "Hello") -> LandingPage:
+    return LandingPage(
+        id=landing_id, theme="Theme", language="English", traffic_source="Google Ads", target_action="Sign up",
+        html=f"<!DOCTYPE html><html><head><style>{CSS}</style></head><body><h1>{text}</h1></body></html>",
+        lighthouse=98,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LogStructuredLandingStore(str(tmp_path))
+    yield store
+    store.close()
+
+
+def test_put_get_keeps_latest_version(store, tmp_path):
+    store.put(make_landing("a", "first"))
+    store.put(make_landing("b"))
+    store.put(make_landing("a", "second"))
+
+    assert "second" in store.get("a").html
+    assert sorted(store.ids()) == ["a", "b"]
+    assert store.get("missing") is None
+
+    reopened = LogStructuredLandingStore(str(tmp_path))
+    try:
+        assert "second" in reopened.get("a").html
+        assert len(reopened) == 2
+    finally:
+        reopened.close()
+
+
+def test_corrupt_payload_fails_crc_check(store):
+    store.put(make_landing("a"))
+    offset, length = store._index["a"]
+    with open(store.path, "r+b") as segment:
+        segment.seek(offset + length - 1)
+        last = segment.read(1)
+        segment.seek(offset + length - 1)
+        segment.write(bytes([last[0] ^ 0xFF]))
+    store._mapped_size = -1
+
+    with pytest.raises(ValueError, match="Corrupt landing record"):
+        store.get("a")
+
+
+def test_torn_tail_is_ignored_and_truncated_by_next_append(store, tmp_path):
+    store.put(make_landing("a"))
+    complete_size = os.path.getsize(store.path)
+    record = store._encode(make_landing("torn"))
+    with open(store.path, "ab") as segment:
+        segment.write(record[:len(record) // 2])
+
+    reopened = LogStructuredLandingStore(str(tmp_path))
+    try:
+        assert reopened.ids() == ["a"]
+        landing = make_landing("b")
+        reopened.put(landing)
+        # The same landing, so its record compresses to the same size
+        assert os.path.getsize(reopened.path) == complete_size + len(reopened._encode(landing))
+        assert sorted(reopened.ids()) == ["a", "b"]
+        assert "Hello" in reopened.get("b").html
+    finally:
+        reopened.close()
+
+
+def test_torn_header_is_ignored(store, tmp_path):
+    store.put(make_landing("a"))
+    with open(store.path, "ab") as segment:
+        segment.write(_HEADER.pack(b"LC", 1, 10, 0)[:5])
+
+    reopened = LogStructuredLandingStore(str(tmp_path))
+    try:
+        assert reopened.ids() == ["a"]
+    finally:
+        reopened.close()
+
+
+def test_appends_from_another_process_are_visible(store, tmp_path):
+    store.put(make_landing("parent"))
+    script = (
+        "import sys\n"
+        f"sys.path.insert(0, {str(BACKEND_DIR)!r})\n"
+        "from landing_store import LogStructuredLandingStore\n"
+        "from models import LandingPage\n"
+        f"store = LogStructuredLandingStore({str(tmp_path)!r})\n"
+        "assert store.get('parent') is not None\n"
+        "store.put(LandingPage(id='child', theme='T', language='English', traffic_source='fb',\n"
+        "                      target_action='Buy', html='<html><body>from child</body></html>', lighthouse=97))\n"
+        "store.close()\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=str(BACKEND_DIR))
+
+    assert "child" in store
+    assert "from child" in store.get("child").html
+    assert sorted(store.ids()) == ["child", "parent"]
+
+
+def test_changes_include_rewritten_landings_from_other_workers(store, tmp_path):
+    store.put(make_landing("a"))
+    store.put(make_landing("b"))
+    changed, cursor = store.changes()
+    assert sorted(changed) == ["a", "b"]
+
+    other = LogStructuredLandingStore(str(tmp_path))
+    other.put(make_landing("b", "upgraded"))
+    other.put(make_landing("c"))
+    other.put(make_landing("b", "regenerated"))
+    other.close()
+
+    changed, cursor = store.changes(cursor)
+    assert changed == ["b", "c"]
+    assert store.changes(cursor)[0] == []
+
+    store.put(make_landing("a", "v2"))
+    assert store.maybe_compact()
+    # Offsets moved, so everything is reported once
+    changed, cursor = store.changes(cursor)
+    assert sorted(changed) == ["a", "b", "c"]
+    assert store.changes(cursor)[0] == []
+
+
+def test_compaction_keeps_latest_records_and_shrinks_segment(store):
+    for version in range(5):
+        store.put(make_landing("a", f"version {version}"))
+    store.put(make_landing("b"))
+    before = os.path.getsize(store.path)
+
+    assert store.maybe_compact()
+
+    assert os.path.getsize(store.path) < before
+    assert "version 4" in store.get("a").html
+    assert sorted(store.ids()) == ["a", "b"]
+    assert store.stats()["dead_bytes"] == 0
+    # Nothing left to reclaim
+    assert not store.maybe_compact()
+
+
+def test_compaction_keeps_records_appended_while_copying(store, tmp_path):
+    for version in range(5):
+        store.put(make_landing("a", f"version {version}"))
+    other = LogStructuredLandingStore(str(tmp_path))
+    flock = store._flock
+
+    def flock_after_concurrent_append(mode):
+        # The swap takes the exclusive lock; another worker appends just before it
+        if mode == fcntl.LOCK_EX and "late" not in other:
+            other.put(make_landing("late", "appended during compaction"))
+        return flock(mode)
+
+    store._flock = flock_after_concurrent_append
+    try:
+        assert store.maybe_compact()
+    finally:
+        store._flock = flock
+
+    assert "appended during compaction" in store.get("late").html
+    assert "version 4" in store.get("a").html
+    # The other worker follows the replaced segment
+    assert sorted(other.ids()) == ["a", "late"]
+    assert "version 4" in other.get("a").html
+    other.close()
+
+
+def test_compaction_collects_unreferenced_chunks(store):
+    store.put(make_landing("a"))
+    stale = store.chunks.put("body{color:red}" * 20)
+    for version in range(3):
+        store.put(make_landing("b", f"version {version}"))
+
+    live = store._live_chunks()
+    assert stale not in live
+    assert store.chunks.collect(live, grace_seconds=-1) == 1
+    assert store.chunks.get(stale) is None
+    assert "Hello" in store.get("a").html
+
+
+def test_chunk_reused_while_collecting_is_kept(store):
+    store.put(make_landing("a"))
+    reused = store.chunks.put("body{color:red}" * 20)
+    os.utime(store.chunks._path(reused), (0, 0))
+    exclusive = store._exclusive
+
+    def exclusive_after_reuse():
+        # A put dedupes against the chunk after it was listed as stale
+        store.chunks.put("body{color:red}" * 20)
+        return exclusive()
+
+    assert store.chunks.collect(store._live_chunks(), grace_seconds=60, exclusive=exclusive_after_reuse) == 0
+    assert store.chunks.get(reused) is not None
+
+
+def test_put_writes_back_chunks_collected_after_encoding(store):
+    encode_page = store.chunks.encode_page
+
+    def encode_then_collect(html, chunks=None):
+        recipe = encode_page(html, chunks)
+        # Collected between encoding and the append, as if its mtime had been stale
+        store.chunks.collect(set(), grace_seconds=-1, exclusive=store._exclusive)
+        return recipe
+
+    store.chunks.encode_page = encode_then_collect
+    store.put(make_landing("a"))
+    store.chunks.encode_page = encode_page
+    store.chunks._cache.clear()
+
+    assert CSS in store.get("a").html
+
+
+def test_assets_of_stored_landings_are_not_collected(store):
+    store.put(make_landing("a"))
+    html = externalize_assets(store.get("a").html, store.chunks)
+    asset = html.split("/api/assets/")[1].split(".css")[0]
+    # The asset of a page no landing has any more
+    stale = externalize_assets(f"<style>{CSS * 2}</style>", store.chunks)
+    stale_asset = stale.split("/api/assets/")[1].split(".css")[0]
+
+    assert store.chunks.collect(store._live_chunks(), grace_seconds=-1) >= 1
+    assert store.chunks.get(asset) == CSS
+    assert store.chunks.get(stale_asset) is None
+
+
+def test_records_are_zlib_compressed(store):
+    store.put(make_landing("a"))
+    offset, _ = store._index["a"]
+    magic, id_len, payload_len, _ = _HEADER.unpack_from(store._mmap, offset)
+    start = offset + _HEADER.size + id_len
+    assert magic == b"LC"
+    zlib.decompress(store._mmap[start:start + payload_len])
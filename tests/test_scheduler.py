@@ -0,0 +1,73 @@
+import asyncio
+
+from scheduler import PriorityScheduler
+
+
+async def hold(scheduler, priority, started, release):
+    async with scheduler.slot(priority):
+        started.append(priority)
+        await release.wait()
+
+
+def test_cancel_while_the_slot_is_handed_over():
+    async def main():
+        scheduler = PriorityScheduler(concurrency=1, weights={"interactive": 1})
+        release, started = asyncio.Event(), []
+        async with scheduler.slot():
+            first = asyncio.create_task(hold(scheduler, "interactive", started, release))
+            second = asyncio.create_task(hold(scheduler, "interactive", started, release))
+            await asyncio.sleep(0)
+        # The slot was just handed to the first waiter, which is cancelled before it resumes
+        first.cancel()
+        release.set()
+        await asyncio.gather(first, second, return_exceptions=True)
+
+        assert first.cancelled()
+        assert started == ["interactive"]
+        assert scheduler.snapshot()["running"] == 0
+
+    asyncio.run(main())
+
+
+def test_cancel_while_queued_just_before_release():
+    async def main():
+        scheduler = PriorityScheduler(concurrency=1, weights={"interactive": 1})
+        release, started = asyncio.Event(), []
+        async with scheduler.slot():
+            first = asyncio.create_task(hold(scheduler, "interactive", started, release))
+            second = asyncio.create_task(hold(scheduler, "interactive", started, release))
+            await asyncio.sleep(0)
+            # Its future is cancelled, but the task has not left the queue when the slot is released
+            first.cancel()
+        release.set()
+        await asyncio.gather(first, second, return_exceptions=True)
+
+        assert first.cancelled()
+        assert started == ["interactive"]
+        assert scheduler.snapshot()["running"] == 0
+
+    asyncio.run(main())
+
+
+def test_free_slots_follow_the_weights():
+    async def main():
+        scheduler = PriorityScheduler(concurrency=1, weights={"interactive": 3, "batch": 1})
+        release, order = asyncio.Event(), []
+        holder = asyncio.create_task(hold(scheduler, "interactive", [], release))
+        await asyncio.sleep(0)
+
+        async def job(priority):
+            async with scheduler.slot(priority):
+                order.append(priority)
+
+        jobs = [asyncio.create_task(job("batch")) for _ in range(3)]
+        jobs += [asyncio.create_task(job("interactive")) for _ in range(6)]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, *jobs)
+
+        # Interactive gets three slots for every batch one, and batch still drains
+        assert order == ["interactive", "batch", "interactive", "interactive", "interactive",
+                         "batch", "interactive", "interactive", "batch"]
+
+    asyncio.run(main())
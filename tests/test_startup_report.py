@@ -0,0 +1,51 @@
+import importlib
+import sys
+
+import pytest
+
+import startup_report
+
+
+@pytest.fixture
+def modules(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(startup_report, "_timings", {"imports": [], "prewarm": []})
+    yield tmp_path
+    startup_report.stop_tracing_imports()
+    for name in ("sr_library", "sr_app", "sr_broken"):
+        sys.modules.pop(name, None)
+    importlib.invalidate_caches()
+
+
+def test_import_timing_restores_the_loader_and_ignores_caught_errors(modules):
+    (modules / "sr_library.py").write_text("try:\n    import sr_missing_optional\nexcept ImportError:\n    pass\n")
+    startup_report.trace_imports()
+
+    module = importlib.import_module("sr_library")
+
+    assert "exec_module" not in vars(module.__spec__.loader)
+    assert [item["name"] for item in startup_report.report()["imports"]] == ["sr_library"]
+    assert startup_report.report()["failures"] == []
+
+
+def test_only_app_import_errors_are_failures(modules, monkeypatch):
+    (modules / "sr_broken.py").write_text("raise RuntimeError('boom')\n")
+    (modules / "sr_app.py").write_text("import sr_broken\n")
+    monkeypatch.setattr(startup_report, "APP_DIR", str(modules))
+    startup_report.trace_imports()
+
+    with pytest.raises(RuntimeError):
+        importlib.import_module("sr_app")
+
+    assert {item["name"] for item in startup_report.report()["failures"]} == {"sr_app", "sr_broken"}
+
+
+def test_stop_tracing_restores_loaders_found_but_not_executed(modules):
+    (modules / "sr_library.py").write_text("")
+    startup_report.trace_imports()
+    spec = importlib.util.find_spec("sr_library")
+    assert "exec_module" in vars(spec.loader)
+
+    startup_report.stop_tracing_imports()
+
+    assert "exec_module" not in vars(spec.loader)